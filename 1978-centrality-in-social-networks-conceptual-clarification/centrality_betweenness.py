@@ -1,8 +1,8 @@
 # Goal: measure betweenness centrality.
 
 from typing import Dict, List
-from collections import deque, defaultdict
-from itertools import combinations
+
+from brandes import betweenness
 
 Graph = Dict[str, List[str]]
 
@@ -30,43 +30,11 @@ G_clique: Graph = {
 }
 
 
-def bfs_shortest_paths(graph: Graph, start: str):
-    queue = deque([[start]])
-    shortest_paths = defaultdict(list)
-    shortest_paths[start].append([start])
-    visited_depth = {start: 0}
-
-    while queue:
-        path = queue.popleft()
-        current = path[-1]
-        for neighbor in graph[current]:
-            depth = len(path)
-            if neighbor not in visited_depth or depth < visited_depth[neighbor]:
-                visited_depth[neighbor] = depth
-                shortest_paths[neighbor] = [path + [neighbor]]
-                queue.append(path + [neighbor])
-            elif depth == visited_depth[neighbor]:
-                shortest_paths[neighbor].append(path + [neighbor])
-    return shortest_paths
-
-
-def degree_betweenness(graph: Graph, normalize: bool = False):
-    centrality = {node: 0.0 for node in graph}
-    nodes = list(graph.keys())
-
-    for s, t in combinations(nodes, 2):
-        all_paths = bfs_shortest_paths(graph, s)[t]
-        total_paths = len(all_paths)
-        if total_paths == 0:
-            continue
-        for path in all_paths:
-            for node in path[1:-1]:  
-                centrality[node] += 1 / total_paths
-    if normalize:
-        n = len(graph)
-        for node in centrality:
-            centrality[node] /= (n - 1) * (n - 2) / 2
-    return centrality
+# One Brandes BFS per source (see brandes.py) instead of a path enumerating
+# BFS per pair. Pass k / epsilon / workers through for the sampled and
+# parallel modes.
+def degree_betweenness(graph: Graph, normalize: bool = False, **kwargs):
+    return betweenness(graph, normalize, **kwargs)
 
 print("Degree Betweenness Centrality Results:")
 for name, G in [("Star", G_star), ("Chain", G_chain), ("Clique", G_clique)]:
@@ -1,7 +1,8 @@
 # Goal: find degree closeness centrality.
 
 from typing import Dict, List
-from collections import deque
+
+from closeness import closeness
 
 Graph = Dict[str, List[str]]
 
@@ -29,32 +30,10 @@ G_clique: Graph = {
 }
 
 
-def bfs_distances(G: Graph, start: str):
-    dist = {node: float("inf") for node in G}
-    dist[start] = 0
-    queue = deque([start])
-
-    while queue:
-        v = queue.popleft()
-        for neighbor in G[v]:
-            if dist[neighbor] == float("inf"):
-                dist[neighbor] = dist[v] + 1
-                queue.append(neighbor)
-    return dist
-
-
+# Thin wrapper over the bit-parallel BFS engine in closeness.py, which also
+# has harmonic, sampled and top-k modes.
 def closeness_centrality(G: Graph) -> Dict[str, float]:
-    n = len(G)
-    centrality = {}
-
-    for node in G:
-        dist = bfs_distances(G, node)
-        total_dist = sum(d for d in dist.values() if d < float("inf") and d > 0)
-        if total_dist > 0:
-            centrality[node] = (n - 1) / total_dist
-        else:
-            centrality[node] = 0.0
-    return centrality
+    return closeness(G)
 
 print("Closeness Centrality Results:")
 for name, G in [("Star", G_star), ("Chain", G_chain), ("Clique", G_clique)]:
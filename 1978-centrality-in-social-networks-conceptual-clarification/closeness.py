@@ -0,0 +1,220 @@
+# Closeness engine shared by centrality_closeness.py and the 1966
+# centrality_index: multi-source bit-parallel BFS over CSR arrays, a sampled
+# mode and a pruned top-k search.
+
+import numpy as np
+from numba import njit, prange, get_num_threads
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from brandes import Graph, to_csr
+
+
+def reverse_csr(indptr: np.ndarray, indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    n = len(indptr) - 1
+    src = np.repeat(np.arange(n, dtype=np.int32), np.diff(indptr))
+    order = np.argsort(indices, kind="stable")
+    rev_indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(indices, minlength=n), out=rev_indptr[1:])
+    return rev_indptr, src[order]
+
+
+@njit(inline="always")
+def popcount64(x):
+    x = x - ((x >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    x = (x & np.uint64(0x3333333333333333)) + ((x >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    x = (x + (x >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return (x * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+
+# Multi-source BFS, 64 sources per batch: bit b of seen[v] / frontier[v] says
+# whether source b of the batch has reached v, so one sweep over the edges
+# advances all 64 BFS by a level. Node w reached at level d by c sources of
+# the batch adds c * d to farness[w], c to reach[w] and c / d to
+# harmonic[w], all with one popcount. These are distances *to* w, so callers
+# pass the reversed graph to get distances from w. Batches are spread over
+# threads, each with its own accumulators.
+@njit(parallel=True)
+def msbfs_kernel(indptr, indices, sources):
+    n = len(indptr) - 1
+    n_batches = (len(sources) + 63) // 64
+    n_blocks = max(1, min(get_num_threads(), n_batches))
+    farness = np.zeros((n_blocks, n), dtype=np.float64)
+    reach = np.zeros((n_blocks, n), dtype=np.int64)
+    harmonic = np.zeros((n_blocks, n), dtype=np.float64)
+    for b in prange(n_blocks):
+        seen = np.zeros(n, dtype=np.uint64)
+        frontier = np.zeros(n, dtype=np.uint64)
+        nxt = np.zeros(n, dtype=np.uint64)
+        for batch in range(b, n_batches, n_blocks):
+            seen[:] = 0
+            frontier[:] = 0
+            lo = batch * 64
+            hi = min(lo + 64, len(sources))
+            for j in range(lo, hi):
+                bit = np.uint64(1) << np.uint64(j - lo)
+                seen[sources[j]] |= bit
+                frontier[sources[j]] |= bit
+
+            level = 0
+            active = True
+            while active:
+                level += 1
+                active = False
+                for v in range(n):
+                    f = frontier[v]
+                    if f:
+                        for i in range(indptr[v], indptr[v + 1]):
+                            nxt[indices[i]] |= f
+                for w in range(n):
+                    new = nxt[w] & ~seen[w]
+                    nxt[w] = 0
+                    frontier[w] = new
+                    if new:
+                        seen[w] |= new
+                        c = popcount64(new)
+                        farness[b, w] += c * level
+                        reach[b, w] += c
+                        harmonic[b, w] += c / level
+                        active = True
+    return farness.sum(axis=0), reach.sum(axis=0), harmonic.sum(axis=0)
+
+
+# Per node: sum of distances to the nodes it reaches, how many it reaches and
+# the sum of 1 / distance. With sample=k only k random sources are run and
+# the sums are rescaled to all n - 1 other nodes (Eppstein and Wang).
+def distance_sums(
+    graph: Graph, sample: Optional[int] = None, seed: Optional[int] = None
+) -> Tuple[List[Hashable], np.ndarray, np.ndarray, np.ndarray]:
+    nodes, indptr, indices = to_csr(graph)
+    n = len(nodes)
+    rev_indptr, rev_indices = reverse_csr(indptr, indices)
+    if sample is None or sample >= n:
+        sources = np.arange(n, dtype=np.int32)
+        farness, reach, harmonic = msbfs_kernel(rev_indptr, rev_indices, sources)
+        return nodes, farness, reach, harmonic
+
+    rng = np.random.default_rng(seed)
+    sources = rng.choice(n, size=sample, replace=False).astype(np.int32)
+    farness, reach, harmonic = msbfs_kernel(rev_indptr, rev_indices, sources)
+    # a sampled node is its own source, which says nothing about the others
+    others = np.full(n, sample, dtype=np.float64)
+    others[sources] -= 1
+    scale = np.divide(n - 1, others, out=np.zeros(n), where=others > 0)
+    return nodes, farness * scale, reach * scale, harmonic * scale
+
+
+# normalized=True gives (n - 1) / farness (centrality_closeness), False gives
+# 1 / farness (the 1966 centrality index). harmonic=True gives the sum of
+# 1 / distance instead, which stays meaningful on disconnected graphs.
+def closeness(
+    graph: Graph,
+    normalized: bool = True,
+    harmonic: bool = False,
+    sample: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> Dict[Hashable, float]:
+    nodes, farness, _, harm = distance_sums(graph, sample, seed)
+    n = len(nodes)
+    if harmonic:
+        scores = harm / (n - 1) if normalized and n > 1 else harm
+    else:
+        scores = np.divide(n - 1 if normalized else 1, farness, out=np.zeros(n), where=farness > 0)
+    return dict(zip(nodes, scores.tolist()))
+
+
+@njit
+def component_sizes(indptr, indices):
+    n = len(indptr) - 1
+    comp = np.full(n, -1, dtype=np.int64)
+    sizes = np.zeros(n, dtype=np.int64)
+    queue = np.empty(n, dtype=np.int32)
+    n_comp = 0
+    for root in range(n):
+        if comp[root] >= 0:
+            continue
+        comp[root] = n_comp
+        queue[0] = root
+        head = 0
+        tail = 1
+        while head < tail:
+            u = queue[head]
+            head += 1
+            for i in range(indptr[u], indptr[u + 1]):
+                w = indices[i]
+                if comp[w] < 0:
+                    comp[w] = n_comp
+                    queue[tail] = w
+                    tail += 1
+        sizes[n_comp] = tail
+        n_comp += 1
+    return sizes[comp]
+
+
+# Top-k by farness with BFS cutoff (Bergamini et al. 2016). Nodes are tried
+# by decreasing degree; after every BFS level the farness is bounded below
+# by assuming the next level holds at most sum(deg - 1) of the frontier and
+# everything else is one level further. Once the bound reaches the current
+# k-th best farness the BFS is abandoned.
+@njit
+def topk_kernel(indptr, indices, order, comp_size, k):
+    n = len(indptr) - 1
+    best_far = np.full(k, np.inf)
+    best_node = np.full(k, -1, dtype=np.int64)
+    worst = 0
+    visited = np.zeros(n, dtype=np.int64)
+    queue = np.empty(n, dtype=np.int32)
+
+    for stamp in range(1, len(order) + 1):
+        v = order[stamp - 1]
+        cutoff = best_far[worst]
+        visited[v] = stamp
+        queue[0] = v
+        head = 0
+        tail = 1
+        level = 0
+        far = 0.0
+        pruned = False
+        while head < tail:
+            level_end = tail
+            while head < level_end:
+                u = queue[head]
+                head += 1
+                for i in range(indptr[u], indptr[u + 1]):
+                    w = indices[i]
+                    if visited[w] != stamp:
+                        visited[w] = stamp
+                        queue[tail] = w
+                        tail += 1
+            level += 1
+            far += level * (tail - level_end)
+            remaining = comp_size[v] - tail
+            if remaining > 0:
+                est = 0
+                for j in range(level_end, tail):
+                    u = queue[j]
+                    est += indptr[u + 1] - indptr[u] - 1
+                nxt = min(est, remaining)
+                bound = far + (level + 1) * nxt + (level + 2) * (remaining - nxt)
+                if bound >= cutoff:
+                    pruned = True
+                    break
+
+        if not pruned and far > 0 and far < cutoff:
+            best_far[worst] = far
+            best_node[worst] = v
+            for j in range(k):
+                if best_far[j] > best_far[worst]:
+                    worst = j
+    return best_node, best_far
+
+
+# k most central nodes of an undirected graph as [(node, (n - 1) / farness)],
+# best first, without running a full BFS from most of the others.
+def top_k_closeness(graph: Graph, k: int = 10) -> List[Tuple[Hashable, float]]:
+    nodes, indptr, indices = to_csr(graph)
+    n = len(nodes)
+    k = min(k, n)
+    order = np.argsort(-np.diff(indptr), kind="stable").astype(np.int32)
+    best_node, best_far = topk_kernel(indptr, indices, order, component_sizes(indptr, indices), k)
+    ranked = sorted((far, node) for far, node in zip(best_far, best_node) if node >= 0)
+    return [(nodes[node], float((n - 1) / far)) for far, node in ranked]
@@ -0,0 +1,68 @@
+import random
+import time
+import networkx as nx
+from typing import List
+
+from pagerank import Graph, pagerank
+from incremental_pagerank import EdgeUpdate, IncrementalPageRank
+
+
+def random_batch(G: Graph, size: int, new_node_rate: float = 0.05) -> List[EdgeUpdate]:
+    # Half insertions (some to brand new nodes), half deletions, applied to G
+    # as well so the full recompute sees the same graph
+    nodes = list(G.nodes())
+    edges = list(G.edges())
+    batch: List[EdgeUpdate] = []
+    for _ in range(size):
+        if random.random() < 0.5 and edges:
+            u, v = edges.pop(random.randrange(len(edges)))
+            if G.has_edge(u, v):
+                G.remove_edge(u, v)
+                batch.append(("delete", u, v))
+        else:
+            u = random.choice(nodes)
+            v = G.number_of_nodes() if random.random() < new_node_rate else random.choice(nodes)
+            G.add_edge(u, v)
+            batch.append(("insert", u, v))
+    return batch
+
+
+def top_overlap(a: dict, b: dict, k: int = 10) -> int:
+    top_a = sorted(a, key=a.get, reverse=True)[:k]
+    top_b = sorted(b, key=b.get, reverse=True)[:k]
+    return len(set(top_a) & set(top_b))
+
+
+def bench(n: int = 100000, batches: int = 10, batch_size: int = 100, tol: float = 1.0e-6) -> None:
+    G: Graph = nx.DiGraph(nx.scale_free_graph(n, seed=42))
+    G.remove_edges_from(nx.selfloop_edges(G))
+
+    start_time = time.time()
+    ipr = IncrementalPageRank(G, tol=tol)
+    print(f"Initial build: {time.time() - start_time:.2f}s")
+
+    inc_total, full_total = 0.0, 0.0
+    print(f"{'batch':>5} {'pushes':>8} {'incremental':>12} {'full':>8} {'L1 error':>10} {'top-10':>6}")
+    for b in range(batches):
+        batch = random_batch(G, batch_size)
+
+        start_time = time.time()
+        pushes = ipr.apply_updates(batch)
+        inc_time = time.time() - start_time
+
+        start_time = time.time()
+        ref = pagerank(G, tol=tol)
+        full_time = time.time() - start_time
+
+        scores = ipr.scores()
+        l1 = sum(abs(ref[v] - scores[v]) for v in ref)
+        print(f"{b:5d} {pushes:8d} {inc_time:11.4f}s {full_time:7.3f}s {l1:10.2e} {top_overlap(ref, scores):6d}")
+        inc_total += inc_time
+        full_total += full_time
+
+    print(f"Per batch: incremental {inc_total / batches:.4f}s vs full recompute {full_total / batches:.3f}s")
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    bench(n=100000, batches=10, batch_size=100)
@@ -0,0 +1,145 @@
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Set, Tuple
+
+from pagerank import Graph, PageRankScores, power_iteration, transition_matrix
+
+# ("insert", u, v) or ("delete", u, v)
+EdgeUpdate = Tuple[str, int, int]
+
+
+# PageRank kept current under edge insertions / deletions by localized
+# residual push (forward push on a dynamic graph, as in Zhang, Lofgren and
+# Goel 2016, extended to global PageRank).
+#
+# State: estimate p, residual r and a scalar s with the invariant
+#     PR = p + Pi r + s PR,     Pi = (1 - alpha) (I - alpha P)^-1
+# Pi maps a residual to the PageRank mass it will still produce. Pushing r_u
+# settles (1 - alpha) r_u into p_u and hands alpha r_u to u's out-neighbours.
+# A dangling node hands it to every node, and a uniform residual is exactly
+# a multiple of PR itself, so that part is kept in the scalar s instead of
+# touching n entries. Every edge event changes r (and p) at O(1) nodes so the
+# invariant still holds on the new graph, then only residuals above the
+# threshold are pushed. The work per batch follows the affected region, not
+# the graph size.
+class IncrementalPageRank:
+    def __init__(self, graph: Graph, alpha: float = 0.85, tol: float = 1.0e-6):
+        self.alpha = alpha
+        self.nodes: List[int] = list(graph.nodes())
+        self.index: Dict[int, int] = {v: i for i, v in enumerate(self.nodes)}
+        self.out: List[Set[int]] = [{self.index[w] for w in graph.successors(v)} for v in self.nodes]
+        N = len(self.nodes)
+        # Residuals below eps stay put, so the L1 error is about tol
+        self.eps = tol / N
+
+        # Start from a converged vector and derive the residual that makes the
+        # invariant exact: r = (1 - s) u - (p - alpha P p) / (1 - alpha), s = 0
+        T = transition_matrix(graph)
+        p, _ = power_iteration(T, alpha, tol=tol * 1.0e-2)
+        self.dangling_mass = float(p[T.dangling].sum())  # sum of p over dangling nodes
+        Pp = T.M @ p + self.dangling_mass / N
+        r = 1.0 / N - (p - alpha * Pp) / (1 - alpha)
+        self.p: List[float] = p.tolist()
+        self.r: List[float] = r.tolist()
+        self.s = 0.0
+
+        self.queue: Deque[int] = deque()
+        self.queued: List[bool] = [False] * N
+        for i in range(N):
+            self.enqueue(i)
+        self.pushes = 0
+        self.push()
+
+    def enqueue(self, i: int) -> None:
+        if not self.queued[i] and abs(self.r[i]) > self.eps:
+            self.queued[i] = True
+            self.queue.append(i)
+
+    def push(self) -> None:
+        alpha, p, r, out = self.alpha, self.p, self.r, self.out
+        while self.queue:
+            u = self.queue.popleft()
+            self.queued[u] = False
+            ru = r[u]
+            r[u] = 0.0
+            p[u] += (1 - alpha) * ru
+            self.pushes += 1
+            if not out[u]:
+                self.dangling_mass += (1 - alpha) * ru
+                self.s += alpha * ru
+                continue
+            share = alpha * ru / len(out[u])
+            for v in out[u]:
+                r[v] += share
+                self.enqueue(v)
+
+    def add_node(self, v: int) -> int:
+        # New node z: the teleport vector becomes uniform over N + 1 nodes,
+        # which moves residual K / N onto z and -K / N of uniform residual
+        # into s (K collects the teleport and dangling terms of r).
+        N = len(self.nodes)
+        K = (1 - self.s) + self.alpha * self.dangling_mass / (1 - self.alpha)
+        z = N
+        self.index[v] = z
+        self.nodes.append(v)
+        self.out.append(set())
+        self.p.append(0.0)
+        self.r.append(K / N)
+        self.queued.append(False)
+        self.s -= K / N
+        self.enqueue(z)
+        return z
+
+    def insert_edge(self, u: int, w: int) -> None:
+        pu, d, c = self.p[u], len(self.out[u]), 1 - self.alpha
+        if w in self.out[u]:
+            return
+        if d == 0:
+            # u stops being dangling: its mass no longer goes to everyone
+            self.r[w] += self.alpha * pu / c
+            self.s -= self.alpha * pu / c
+            self.dangling_mass -= pu
+        else:
+            # Scale p_u so the old out-neighbours keep their share, O(1)
+            self.p[u] = pu * (d + 1) / d
+            self.r[u] -= pu / (d * c)
+            self.r[w] += self.alpha * pu / (d * c)
+        self.out[u].add(w)
+        self.enqueue(u)
+        self.enqueue(w)
+
+    def delete_edge(self, u: int, w: int) -> None:
+        pu, d, c = self.p[u], len(self.out[u]), 1 - self.alpha
+        if w not in self.out[u]:
+            return
+        self.out[u].remove(w)
+        if d == 1:
+            # u becomes dangling: its mass now goes to everyone
+            self.r[w] -= self.alpha * pu / c
+            self.s += self.alpha * pu / c
+            self.dangling_mass += pu
+        else:
+            self.p[u] = pu * (d - 1) / d
+            self.r[u] += pu / (d * c)
+            self.r[w] -= self.alpha * pu / (d * c)
+        self.enqueue(u)
+        self.enqueue(w)
+
+    def apply_updates(self, batch: Iterable[EdgeUpdate]) -> int:
+        # Returns the number of pushes the batch needed
+        pushes = self.pushes
+        for op, u, w in batch:
+            iu = self.index[u] if u in self.index else self.add_node(u)
+            iw = self.index[w] if w in self.index else self.add_node(w)
+            if op == "insert":
+                self.insert_edge(iu, iw)
+            elif op == "delete":
+                self.delete_edge(iu, iw)
+            else:
+                raise ValueError(f"unknown update {op!r}")
+        self.push()
+        return self.pushes - pushes
+
+    def scores(self) -> PageRankScores:
+        # PR = (p + Pi r) / (1 - s) and every residual is below eps
+        norm = 1 - self.s
+        return {v: self.p[i] / norm for i, v in enumerate(self.nodes)}
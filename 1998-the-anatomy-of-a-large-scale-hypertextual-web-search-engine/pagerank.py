@@ -1,8 +1,20 @@
 import networkx as nx
-from typing import Dict
+import numpy as np
+import scipy.sparse as sp
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
 
 Graph = nx.DiGraph
 PageRankScores = Dict[int, float]
+Scores = Union[PageRankScores, np.ndarray]
+
+
+class TransitionMatrix(NamedTuple):
+    nodes: List[int]
+    index: Dict[int, int]
+    # M[v, u] = 1 / out_degree(u) for every edge u -> v, so one PageRank step
+    # is a single sparse mat-vec M @ PR
+    M: sp.csr_matrix
+    dangling: np.ndarray  # bool, nodes without out-links
 
 
 def create_sample_graph() -> Graph:
@@ -11,35 +23,79 @@ def create_sample_graph() -> Graph:
     return nx.DiGraph(G)
 
 
-def pagerank(graph: Graph, alpha: float = 0.85, max_iter: int = 100, tol: float = 1.0e-6) -> PageRankScores:
-    N: int = graph.number_of_nodes()
-    # Initialize scores uniformly
-    PR: PageRankScores = {v: 1.0 / N for v in graph.nodes()}
+def transition_matrix(graph: Graph, dtype: type = np.float64) -> TransitionMatrix:
+    nodes: List[int] = list(graph.nodes())
+    index: Dict[int, int] = {v: i for i, v in enumerate(nodes)}
+    N: int = len(nodes)
+
+    src = np.fromiter((index[u] for u, _ in graph.edges()), dtype=np.int64, count=graph.number_of_edges())
+    dst = np.fromiter((index[v] for _, v in graph.edges()), dtype=np.int64, count=graph.number_of_edges())
+    out_degree = np.bincount(src, minlength=N)
+    data = (1.0 / out_degree[src]).astype(dtype)
+    M = sp.csr_matrix((data, (dst, src)), shape=(N, N), dtype=dtype)
+
+    return TransitionMatrix(nodes, index, M, out_degree == 0)
+
 
-    for _ in range(max_iter):
-        newPR: PageRankScores = {v: (1 - alpha) / N for v in graph.nodes()}
+def as_vector(T: TransitionMatrix, values: Optional[Scores], dtype: type) -> Optional[np.ndarray]:
+    # Dict keyed by node (missing nodes get 0) or an array in T.nodes order,
+    # normalized to sum to 1
+    if values is None:
+        return None
+    if isinstance(values, dict):
+        x = np.array([values.get(v, 0.0) for v in T.nodes], dtype=dtype)
+    else:
+        x = np.asarray(values, dtype=dtype).copy()
+    total = x.sum()
+    if total <= 0:
+        raise ValueError("scores must have a positive sum")
+    return x / total
 
-        for u in graph.nodes():
-            out_degree: int = graph.out_degree(u)
-            if out_degree == 0:
-                for v in graph.nodes():
-                    newPR[v] += alpha * PR[u] / N
-            else:
-                share: float = PR[u] / out_degree
-                for v in graph.successors(u):
-                    newPR[v] += alpha * share
 
-        diff: float = sum(abs(newPR[v] - PR[v]) for v in graph.nodes())
+def power_iteration(
+    T: TransitionMatrix,
+    alpha: float = 0.85,
+    max_iter: int = 100,
+    tol: float = 1.0e-6,
+    personalization: Optional[np.ndarray] = None,
+    x0: Optional[np.ndarray] = None,
+    dtype: type = np.float64,
+) -> Tuple[np.ndarray, int]:
+    N: int = len(T.nodes)
+    # Teleport (and dangling) distribution: uniform unless personalized
+    p = np.full(N, 1.0 / N, dtype=dtype) if personalization is None else personalization.astype(dtype)
+    # Warm start from a previous score vector, uniform otherwise
+    PR = np.full(N, 1.0 / N, dtype=dtype) if x0 is None else x0.astype(dtype)
+    M = T.M if T.M.dtype == dtype else T.M.astype(dtype)
+
+    iterations = 0
+    for iterations in range(1, max_iter + 1):
+        # All dangling mass is one scalar, spread with p in a single axpy
+        dangling_mass = PR[T.dangling].sum()
+        newPR = alpha * (M @ PR) + (alpha * dangling_mass + (1 - alpha)) * p
+
+        diff: float = np.abs(newPR - PR).sum()
         PR = newPR
         if diff < tol:
             break
 
-    # Normalize
-    norm: float = sum(PR.values())
-    for v in PR:
-        PR[v] /= norm
+    return PR / PR.sum(), iterations
 
-    return PR
+
+def pagerank(
+    graph: Graph,
+    alpha: float = 0.85,
+    max_iter: int = 100,
+    tol: float = 1.0e-6,
+    personalization: Optional[Scores] = None,
+    nstart: Optional[Scores] = None,
+    dtype: type = np.float64,
+) -> PageRankScores:
+    T = transition_matrix(graph, dtype)
+    PR, _ = power_iteration(
+        T, alpha, max_iter, tol, as_vector(T, personalization, dtype), as_vector(T, nstart, dtype), dtype
+    )
+    return dict(zip(T.nodes, PR.tolist()))
 
 
 if __name__ == "__main__":
@@ -49,4 +105,11 @@ if __name__ == "__main__":
     top_nodes = sorted(pagerank_scores.items(), key=lambda x: x[1], reverse=True)[:10]
     print("Top 10 nodes by PageRank:")
     for node, score in top_nodes:
-        print(f"Node {node}: {score:.6f}")
\ No newline at end of file
+        print(f"Node {node}: {score:.6f}")
+
+    # Re-ranking after a small change: warm start from the previous scores
+    G.add_edges_from([(10, 0), (0, 500), (500, 1)])
+    T = transition_matrix(G)
+    _, cold = power_iteration(T)
+    _, warm = power_iteration(T, x0=as_vector(T, pagerank_scores, np.float64))
+    print(f"Iterations after 3 new edges: {cold} from uniform, {warm} warm started")
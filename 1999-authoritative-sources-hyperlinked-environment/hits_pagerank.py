@@ -1,30 +1,79 @@
 import networkx as nx
 import numpy as np
-from typing import Tuple, Dict, Hashable, Mapping
+import scipy.sparse as sp
+from scipy.sparse.linalg import svds
+from typing import Iterable, List, Tuple, Dict, Hashable, Mapping
 
-def hits_algorithm(
-    graph: nx.DiGraph, max_iter: int = 100, tol: float = 1e-8
-) -> Tuple[Dict[str, float], Dict[str, float]]:
-    
+Scores = Dict[Hashable, float]
+
+
+# A[i, j] = 1 for every edge nodes[i] -> nodes[j], built once so an iteration
+# is two sparse mat-vecs instead of a Python walk over the edges.
+def adjacency_matrix(graph: nx.DiGraph) -> Tuple[List[Hashable], sp.csr_matrix]:
     nodes = list(graph.nodes())
-    n = len(nodes)
+    index = {v: i for i, v in enumerate(nodes)}
+    m = graph.number_of_edges()
+    rows = np.fromiter((index[u] for u, _ in graph.edges()), dtype=np.int64, count=m)
+    cols = np.fromiter((index[v] for _, v in graph.edges()), dtype=np.int64, count=m)
+    A = sp.csr_matrix((np.ones(m), (rows, cols)), shape=(len(nodes), len(nodes)))
+    return nodes, A
+
+
+def normalized(x: np.ndarray, ord: int = 2) -> np.ndarray:
+    norm = np.linalg.norm(x, ord)
+    return x / (norm if norm > 0 else 1)
+
+
+# HITS on an adjacency matrix. method="power" iterates a = A^T h, h = A a;
+# method="svds" takes the principal singular vectors straight from ARPACK
+# (authority = right, hub = left singular vector).
+def hits_scores(
+    A: sp.csr_matrix, max_iter: int = 100, tol: float = 1e-8, method: str = "power"
+) -> Tuple[np.ndarray, np.ndarray]:
+    n = A.shape[0]
+    if method == "svds":
+        if n < 3:
+            u, _, vt = np.linalg.svd(A.toarray())
+        else:
+            u, _, vt = svds(A.astype(np.float64), k=1)
+        return normalized(np.abs(vt[0])), normalized(np.abs(u[:, 0]))
+    if method != "power":
+        raise ValueError(f"unknown method {method!r}")
+
+    AT = A.T.tocsr()
     authority = np.ones(n)
     hub = np.ones(n)
+    for _ in range(max_iter):
+        updated_authority = normalized(AT @ hub)
+        updated_hub = normalized(A @ authority)
+
+        if np.allclose(authority, updated_authority, atol=tol) and np.allclose(hub, updated_hub, atol=tol):
+            break
+
+        authority = updated_authority
+        hub = updated_hub
+
+    return authority, hub
+
+
+# SALSA: the same bipartite hub/authority walk, but every step picks a
+# uniformly random in- or out-link, so A is normalized by in-degree and
+# out-degree and the scores are stationary distributions (L1 normalized).
+def salsa_scores(A: sp.csr_matrix, max_iter: int = 100, tol: float = 1e-8) -> Tuple[np.ndarray, np.ndarray]:
+    n = A.shape[0]
+    out_degree = np.asarray(A.sum(axis=1)).ravel()
+    in_degree = np.asarray(A.sum(axis=0)).ravel()
+    inv_out = np.divide(1.0, out_degree, out=np.zeros(n), where=out_degree > 0)
+    inv_in = np.divide(1.0, in_degree, out=np.zeros(n), where=in_degree > 0)
+    A_row = sp.diags(inv_out) @ A   # hub -> authority, 1 / out-degree
+    A_col = A @ sp.diags(inv_in)    # authority -> hub, 1 / in-degree
+    A_row_T = A_row.T.tocsr()
 
+    authority = normalized((in_degree > 0).astype(np.float64), 1)
+    hub = normalized((out_degree > 0).astype(np.float64), 1)
     for _ in range(max_iter):
-        updated_authority = np.array([
-            sum(hub[nodes.index(neighbor)] for neighbor in graph.predecessors(node))
-            for node in nodes
-        ])
-        updated_hub = np.array([
-            sum(authority[nodes.index(neighbor)] for neighbor in graph.successors(node))
-            for node in nodes
-        ])
-
-        norm_auth = np.linalg.norm(updated_authority)
-        norm_hub = np.linalg.norm(updated_hub)
-        updated_authority /= norm_auth if norm_auth > 0 else 1
-        updated_hub /= norm_hub if norm_hub > 0 else 1
+        updated_authority = normalized(A_row_T @ (A_col @ authority), 1)
+        updated_hub = normalized(A_col @ (A_row_T @ hub), 1)
 
         if np.allclose(authority, updated_authority, atol=tol) and np.allclose(hub, updated_hub, atol=tol):
             break
@@ -32,8 +81,59 @@ def hits_algorithm(
         authority = updated_authority
         hub = updated_hub
 
+    return authority, hub
+
+
+def hits_algorithm(
+    graph: nx.DiGraph, max_iter: int = 100, tol: float = 1e-8, method: str = "power"
+) -> Tuple[Dict[str, float], Dict[str, float]]:
+
+    nodes, A = adjacency_matrix(graph)
+    authority, hub = hits_scores(A, max_iter, tol, method)
+    return dict(zip(nodes, authority)), dict(zip(nodes, hub))
+
+
+def salsa(graph: nx.DiGraph, max_iter: int = 100, tol: float = 1e-8) -> Tuple[Dict[str, float], Dict[str, float]]:
+    nodes, A = adjacency_matrix(graph)
+    authority, hub = salsa_scores(A, max_iter, tol)
     return dict(zip(nodes, authority)), dict(zip(nodes, hub))
 
+
+# Query dependent HITS / SALSA on a large crawl graph. The crawl is turned
+# into a sparse matrix (and its transpose for in-links) once; each query
+# expands its root set to Kleinberg's base set and runs on that submatrix.
+class CrawlGraph:
+    def __init__(self, graph: nx.DiGraph):
+        self.nodes, self.A = adjacency_matrix(graph)
+        self.index = {v: i for i, v in enumerate(self.nodes)}
+        self.AT = self.A.T.tocsr()
+
+    # Root set plus every page a root links to and up to max_in pages linking
+    # to each root (the first max_in in-links, as in Kleinberg's d = 50).
+    def base_set(self, root: Iterable[Hashable], max_in: int = 50) -> np.ndarray:
+        root_ids = np.array([self.index[v] for v in root], dtype=np.int64)
+        parts = [root_ids]
+        for i in root_ids:
+            parts.append(self.A.indices[self.A.indptr[i]:self.A.indptr[i + 1]])
+            lo, hi = self.AT.indptr[i], self.AT.indptr[i + 1]
+            parts.append(self.AT.indices[lo:min(hi, lo + max_in)])
+        return np.unique(np.concatenate(parts))
+
+    def query(
+        self, root: Iterable[Hashable], max_in: int = 50, algorithm: str = "hits",
+        max_iter: int = 100, tol: float = 1e-8, method: str = "power",
+    ) -> Tuple[Scores, Scores]:
+        base = self.base_set(root, max_in)
+        sub = self.A[base][:, base]
+        if algorithm == "hits":
+            authority, hub = hits_scores(sub, max_iter, tol, method)
+        elif algorithm == "salsa":
+            authority, hub = salsa_scores(sub, max_iter, tol)
+        else:
+            raise ValueError(f"unknown algorithm {algorithm!r}")
+        labels = [self.nodes[i] for i in base]
+        return dict(zip(labels, authority)), dict(zip(labels, hub))
+
 def pagerank(
     graph: nx.DiGraph, alpha: float = 0.85, max_iter: int = 100, tol: float = 1e-8
 ) -> Mapping[Hashable, float]:
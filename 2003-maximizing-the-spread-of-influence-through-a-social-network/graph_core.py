@@ -0,0 +1,560 @@
+# Shared graph core for the diffusion models: one compact CSR graph type and
+# the compiled IC / LT / PageRank kernels that run on it.
+import networkx as nx
+import numpy as np
+import os
+import sys
+from numba import njit, prange, get_num_threads
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple, Union
+
+# Counter based RNG and bit-sliced coins shared with the 2007 kernels
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "2007-cost-effective-outbreak-detection-in-networks"))
+from ic_kernels import bernoulli_mask, next_epoch, next_master_seed, next_uniform, stream_state
+
+
+# Out-edge CSR: the successors of dense node i are indices[indptr[i]:indptr[i + 1]]
+# with activation weights in weights[...]. labels maps dense ids back to the
+# original node names.
+@dataclass
+class CSRGraph:
+    indptr: np.ndarray   # int64, n + 1
+    indices: np.ndarray  # int32, m
+    weights: np.ndarray  # float32, m
+    labels: List[Hashable]
+    index: Dict[Hashable, int] = field(default_factory=dict, repr=False)
+    in_csr: Optional[Tuple[np.ndarray, ...]] = field(default=None, repr=False)
+
+    @property
+    def n(self) -> int:
+        return len(self.indptr) - 1
+
+    # In-edge view, built on first use: the in-neighbours of v are
+    # in_indices[in_indptr[v]:in_indptr[v + 1]], in_weights holds their
+    # weights, in_cum the running sum of in_weights within each node and
+    # in_edge the position of the same edge in indices / weights.
+    def in_edges(self) -> Tuple[np.ndarray, ...]:
+        if self.in_csr is None:
+            n = self.n
+            src = np.repeat(np.arange(n, dtype=np.int32), np.diff(self.indptr))
+            in_edge = np.argsort(self.indices, kind="stable")
+            in_indptr = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(self.indices, minlength=n), out=in_indptr[1:])
+            in_weights = self.weights[in_edge]
+            in_cum = np.cumsum(in_weights, dtype=np.float64)
+            in_cum -= np.repeat(np.concatenate(([0.0], in_cum))[in_indptr[:-1]], np.diff(in_indptr))
+            self.in_csr = (in_indptr, src[in_edge], in_weights, in_cum, in_edge)
+        return self.in_csr
+
+    # Largest total in-weight of a node; the live-edge form of LT needs <= 1
+    def max_in_weight(self) -> float:
+        in_indptr, _, _, in_cum, _ = self.in_edges()
+        ends = in_indptr[1:][np.diff(in_indptr) > 0] - 1
+        return float(in_cum[ends].max()) if len(ends) else 0.0
+
+    def to_ids(self, nodes: Iterable[Hashable]) -> np.ndarray:
+        return np.array([self.index[v] for v in nodes], dtype=np.int32)
+
+    def to_labels(self, ids: Iterable[int]) -> Set[Hashable]:
+        return {self.labels[i] for i in ids}
+
+
+Graph = Union[nx.DiGraph, CSRGraph]
+
+
+def generate_graph(n: int = 100, m: int = 2) -> nx.DiGraph:
+    G = nx.barabasi_albert_graph(n, m)
+    directed_G = G.to_directed()
+
+    for node in directed_G.nodes():
+        in_edges = list(directed_G.in_edges(node))
+        total = len(in_edges)
+        for source_node, target_node in in_edges:
+            if total > 0:
+                directed_G[source_node][target_node]["weight"] = 1 / total
+            else:
+                directed_G[source_node][target_node]["weight"] = 0.0
+
+    return directed_G
+
+
+def build_csr(src: np.ndarray, dst: np.ndarray, weights: np.ndarray, labels: List[Hashable]) -> CSRGraph:
+    n = len(labels)
+    order = np.argsort(src, kind="stable")
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    index = {label: i for i, label in enumerate(labels)}
+    return CSRGraph(
+        indptr,
+        dst[order].astype(np.int32),
+        weights[order].astype(np.float32),
+        labels,
+        index,
+    )
+
+
+# Missing "weight" attributes fall back to default_weight, the same 0.1 the
+# networkx based simulations used.
+def from_networkx(G: nx.DiGraph, weight: str = "weight", default_weight: float = 0.1) -> CSRGraph:
+    labels = list(G.nodes())
+    index = {v: i for i, v in enumerate(labels)}
+    m = G.number_of_edges()
+    src = np.empty(m, dtype=np.int64)
+    dst = np.empty(m, dtype=np.int64)
+    w = np.empty(m, dtype=np.float64)
+    for e, (u, v, data) in enumerate(G.edges(data=True)):
+        src[e] = index[u]
+        dst[e] = index[v]
+        w[e] = data.get(weight, default_weight)
+    if not G.is_directed():
+        src, dst, w = np.concatenate((src, dst)), np.concatenate((dst, src)), np.concatenate((w, w))
+    return build_csr(src, dst, w, labels)
+
+
+# Edge list file (SNAP style, '#' comments). Undirected lists get both
+# directions. weight=None gives every edge 1 / in-degree of its target,
+# like generate_graph, otherwise all edges get the constant weight.
+def from_edge_list(path: str, directed: bool = False, weight: Optional[float] = None) -> CSRGraph:
+    edges = np.loadtxt(path, dtype=np.int64, comments="#", usecols=(0, 1), ndmin=2)
+    labels, dense = np.unique(edges, return_inverse=True)
+    dense = dense.reshape(-1, 2)
+    src, dst = dense[:, 0], dense[:, 1]
+    if not directed:
+        src, dst = np.concatenate((src, dst)), np.concatenate((dst, src))
+    if weight is None:
+        in_deg = np.bincount(dst, minlength=len(labels))
+        w = 1.0 / in_deg[dst]
+    else:
+        w = np.full(len(src), weight, dtype=np.float64)
+    return build_csr(src, dst, w, labels.tolist())
+
+
+def as_csr(G: Graph) -> CSRGraph:
+    if isinstance(G, CSRGraph):
+        return G
+    return from_networkx(G)
+
+
+# IC cascade, returns the number of active nodes; queue[0:count] holds them
+# in activation order. `active` must be all zeros on entry and is cleared
+# again through the queue, so a cascade only costs what it touches.
+@njit
+def ic_kernel(indptr, indices, weights, seeds, active, queue):
+    q_len = 0
+    for s in seeds:
+        if active[s] == 0:
+            active[s] = 1
+            queue[q_len] = s
+            q_len += 1
+    idx = 0
+    while idx < q_len:
+        u = queue[idx]
+        idx += 1
+        for i in range(indptr[u], indptr[u + 1]):
+            v = indices[i]
+            if active[v] == 0 and np.random.random() < weights[i]:
+                active[v] = 1
+                queue[q_len] = v
+                q_len += 1
+    for i in range(q_len):
+        active[queue[i]] = 0
+    return q_len
+
+
+@njit
+def ic_spread_kernel(indptr, indices, weights, seeds, simulations):
+    n = len(indptr) - 1
+    active = np.zeros(n, dtype=np.uint8)
+    queue = np.empty(n, dtype=np.int32)
+    total = 0
+    for _ in range(simulations):
+        total += ic_kernel(indptr, indices, weights, seeds, active, queue)
+    return total / simulations
+
+
+# LT cascade over the weights of active in-neighbours. A node's threshold
+# is only drawn when influence first reaches it, and those nodes are listed
+# in touched, so on return thresholds (all -1 = not drawn), influence (all
+# 0) and active are reset through touched and the queue: a cascade costs
+# what it touches, not O(n).
+@njit
+def lt_kernel(indptr, indices, weights, seeds, active, queue, thresholds, influence, touched):
+    q_len = 0
+    n_touched = 0
+    for s in seeds:
+        if active[s] == 0:
+            active[s] = 1
+            queue[q_len] = s
+            q_len += 1
+    idx = 0
+    while idx < q_len:
+        u = queue[idx]
+        idx += 1
+        for i in range(indptr[u], indptr[u + 1]):
+            v = indices[i]
+            if active[v] == 0:
+                if thresholds[v] < 0.0:
+                    thresholds[v] = np.random.random()
+                    touched[n_touched] = v
+                    n_touched += 1
+                influence[v] += weights[i]
+                if influence[v] >= thresholds[v]:
+                    active[v] = 1
+                    queue[q_len] = v
+                    q_len += 1
+    for j in range(n_touched):
+        thresholds[touched[j]] = -1.0
+        influence[touched[j]] = 0.0
+    for j in range(q_len):
+        active[queue[j]] = 0
+    return q_len
+
+
+# lt_kernel buffers in their reset state: active, queue, thresholds,
+# influence, touched
+def new_lt_scratch(n):
+    return (
+        np.zeros(n, dtype=np.uint8),
+        np.empty(n, dtype=np.int32),
+        np.full(n, -1.0, dtype=np.float64),
+        np.zeros(n, dtype=np.float64),
+        np.empty(n, dtype=np.int32),
+    )
+
+
+@njit
+def lt_spread_kernel(indptr, indices, weights, seeds, simulations, active, queue, thresholds, influence, touched):
+    total = 0
+    for _ in range(simulations):
+        total += lt_kernel(indptr, indices, weights, seeds, active, queue, thresholds, influence, touched)
+    return total / simulations
+
+
+# LT reverse reachable set from `root` (live-edge form: every node keeps at
+# most one in-edge, edge e with probability in_weight[e]), so it is a single
+# backward walk that ends when a node keeps no edge or the walk closes a
+# loop. Copies the set to out[0:size] when `write` is set, returns its size.
+@njit
+def lt_rr_set(in_indptr, in_indices, in_cum, root, state, visited, stamp, path, out, write):
+    visited[root] = stamp
+    path[0] = root
+    size = 1
+    v = root
+    while True:
+        lo, hi = in_indptr[v], in_indptr[v + 1]
+        state, r = next_uniform(state)
+        k = lo + np.searchsorted(in_cum[lo:hi], r, side="right")
+        if k >= hi:
+            break
+        v = in_indices[k]
+        if visited[v] == stamp:
+            break
+        visited[v] = stamp
+        path[size] = v
+        size += 1
+    if write:
+        for i in range(size):
+            out[i] = path[i]
+    return size
+
+
+# Sizes / contents of LT RR sets first..first+count-1, set j drawn from
+# stream j (same two pass layout as the IC pool in the 2007 ris module).
+@njit(parallel=True)
+def lt_rr_sizes(in_indptr, in_indices, in_cum, first, count, master_seed):
+    n = len(in_indptr) - 1
+    sizes = np.empty(count, dtype=np.int64)
+    n_blocks = max(1, min(get_num_threads(), count))
+    for b in prange(n_blocks):
+        visited = np.zeros(n, dtype=np.uint32)
+        path = np.empty(n, dtype=np.int32)
+        epoch = np.zeros(1, dtype=np.uint32)
+        for j in range(b, count, n_blocks):
+            state = stream_state(master_seed, first + j)
+            state, r = next_uniform(state)
+            root = min(int(r * n), n - 1)
+            stamp = next_epoch(visited, epoch)
+            sizes[j] = lt_rr_set(in_indptr, in_indices, in_cum, root, state, visited, stamp, path, path, False)
+    return sizes
+
+
+@njit(parallel=True)
+def lt_rr_fill(in_indptr, in_indices, in_cum, first, offsets, master_seed, pool):
+    n = len(in_indptr) - 1
+    count = len(offsets) - 1
+    n_blocks = max(1, min(get_num_threads(), count))
+    for b in prange(n_blocks):
+        visited = np.zeros(n, dtype=np.uint32)
+        path = np.empty(n, dtype=np.int32)
+        epoch = np.zeros(1, dtype=np.uint32)
+        for j in range(b, count, n_blocks):
+            state = stream_state(master_seed, first + j)
+            state, r = next_uniform(state)
+            root = min(int(r * n), n - 1)
+            stamp = next_epoch(visited, epoch)
+            lt_rr_set(
+                in_indptr, in_indices, in_cum, root, state, visited, stamp, path,
+                pool[offsets[j]:offsets[j + 1]], True,
+            )
+
+
+# Number of set bits; every activation is counted once, so the loop costs
+# no more than the cascade itself.
+@njit(inline="always")
+def count_bits(x):
+    c = 0
+    while x:
+        x &= x - np.uint64(1)
+        c += 1
+    return c
+
+
+# Lanes of word `word` that hold a simulation: all 64 except in the last,
+# partially filled word of a batch of `simulations`.
+@njit(inline="always")
+def word_lanes(word, simulations):
+    left = simulations - word * 64
+    if left >= 64:
+        return ~np.uint64(0)
+    return (np.uint64(1) << np.uint64(left)) - np.uint64(1)
+
+
+# Batched IC: 64 simulations per uint64 word, bit b of active[v] says v is
+# active in simulation b. pending[v] holds the lanes v was activated in but
+# has not spread from yet; a queued node spreads all of them with one pass
+# over its out-edges, and the coins of an edge for all lanes still waiting
+# on it come from one bernoulli_mask call. IC only depends on which coins
+# come up, not on the order edges are tried, so lanes reaching a node at
+# different steps can share a pass. Words are spread over threads; word w
+# always draws from stream w, so the total only depends on master_seed.
+# Returns the number of activations summed over all simulations.
+@njit(parallel=True)
+def ic_batch_kernel(indptr, indices, weights, seeds, simulations, master_seed):
+    n = len(indptr) - 1
+    words = (simulations + 63) // 64
+    n_blocks = max(1, min(get_num_threads(), words))
+    totals = np.zeros(n_blocks, dtype=np.int64)
+    for b in prange(n_blocks):
+        active = np.zeros(n, dtype=np.uint64)
+        pending = np.zeros(n, dtype=np.uint64)
+        queue = np.empty(n, dtype=np.int32)
+        touched = np.empty(n, dtype=np.int32)
+        for word in range(b, words, n_blocks):
+            rng = stream_state(master_seed, word)
+            lanes = word_lanes(word, simulations)
+            n_touched = 0
+            for s in seeds:
+                if active[s] == 0:
+                    active[s] = lanes
+                    pending[s] = lanes
+                    queue[n_touched] = s
+                    touched[n_touched] = s
+                    n_touched += 1
+            count = n_touched * count_bits(lanes)
+
+            # queue is circular, a node is in it at most once (pending != 0)
+            head = 0
+            size = n_touched
+            while size > 0:
+                u = queue[head]
+                head = head + 1 if head + 1 < n else 0
+                size -= 1
+                f = pending[u]
+                pending[u] = 0
+                for i in range(indptr[u], indptr[u + 1]):
+                    w = indices[i]
+                    todo = f & ~active[w]
+                    if not todo:
+                        continue
+                    rng, hit = bernoulli_mask(rng, weights[i], todo)
+                    if hit:
+                        if active[w] == 0:
+                            touched[n_touched] = w
+                            n_touched += 1
+                        active[w] |= hit
+                        count += count_bits(hit)
+                        if pending[w] == 0:
+                            queue[(head + size) % n] = w
+                            size += 1
+                        pending[w] |= hit
+
+            for j in range(n_touched):
+                active[touched[j]] = 0
+            totals[b] += count
+    return totals.sum()
+
+
+# Batched LT in its live-edge form (Kempe et al.): every node keeps at most
+# one in-edge, edge e with probability weight[e], and is active iff that
+# edge comes from an active node. Same word layout and queue as
+# ic_batch_kernel. A node's choice is drawn only for the lanes that reach
+# it, the first time they do, and stored on the chosen edges (live[e] =
+# lanes that kept e), so edge tests are a bitwise and. Only valid when every
+# node's in-weights sum to at most 1.
+@njit(parallel=True)
+def lt_batch_kernel(indptr, indices, in_indptr, in_cum, in_edge, seeds, simulations, master_seed):
+    n = len(indptr) - 1
+    words = (simulations + 63) // 64
+    n_blocks = max(1, min(get_num_threads(), words))
+    totals = np.zeros(n_blocks, dtype=np.int64)
+    for b in prange(n_blocks):
+        active = np.zeros(n, dtype=np.uint64)
+        pending = np.zeros(n, dtype=np.uint64)
+        drawn = np.zeros(n, dtype=np.uint64)
+        live = np.zeros(len(indices), dtype=np.uint64)
+        queue = np.empty(n, dtype=np.int32)
+        touched = np.empty(n, dtype=np.int32)
+        drawn_nodes = np.empty(n, dtype=np.int32)
+        for word in range(b, words, n_blocks):
+            rng = stream_state(master_seed, word)
+            lanes = word_lanes(word, simulations)
+            n_touched = 0
+            n_drawn = 0
+            for s in seeds:
+                if active[s] == 0:
+                    active[s] = lanes
+                    pending[s] = lanes
+                    queue[n_touched] = s
+                    touched[n_touched] = s
+                    n_touched += 1
+            count = n_touched * count_bits(lanes)
+
+            head = 0
+            size = n_touched
+            while size > 0:
+                u = queue[head]
+                head = head + 1 if head + 1 < n else 0
+                size -= 1
+                f = pending[u]
+                pending[u] = 0
+                for i in range(indptr[u], indptr[u + 1]):
+                    w = indices[i]
+                    todo = f & ~active[w]
+                    if not todo:
+                        continue
+                    fresh = todo & ~drawn[w]
+                    if fresh:
+                        if drawn[w] == 0:
+                            drawn_nodes[n_drawn] = w
+                            n_drawn += 1
+                        drawn[w] |= fresh
+                        lo, hi = in_indptr[w], in_indptr[w + 1]
+                        while fresh:
+                            lane = fresh & (~fresh + np.uint64(1))
+                            fresh ^= lane
+                            rng, r = next_uniform(rng)
+                            k = lo + np.searchsorted(in_cum[lo:hi], r, side="right")
+                            if k < hi:
+                                live[in_edge[k]] |= lane
+                    hit = todo & live[i]
+                    if hit:
+                        if active[w] == 0:
+                            touched[n_touched] = w
+                            n_touched += 1
+                        active[w] |= hit
+                        count += count_bits(hit)
+                        if pending[w] == 0:
+                            queue[(head + size) % n] = w
+                            size += 1
+                        pending[w] |= hit
+
+            for j in range(n_touched):
+                active[touched[j]] = 0
+            for j in range(n_drawn):
+                w = drawn_nodes[j]
+                drawn[w] = 0
+                for k in range(in_indptr[w], in_indptr[w + 1]):
+                    live[in_edge[k]] = 0
+            totals[b] += count
+    return totals.sum()
+
+
+# Weighted PageRank by power iteration, same model as nx.pagerank: each node
+# splits its score over out-edges in proportion to their weights and dangling
+# mass is spread uniformly. Stops when the L1 change is below n * tol.
+@njit
+def pagerank_kernel(indptr, indices, weights, alpha, max_iter, tol):
+    n = len(indptr) - 1
+    out_weight = np.zeros(n, dtype=np.float64)
+    for u in range(n):
+        for i in range(indptr[u], indptr[u + 1]):
+            out_weight[u] += weights[i]
+    x = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        new_x = np.zeros(n, dtype=np.float64)
+        dangling = 0.0
+        for u in range(n):
+            if out_weight[u] == 0.0:
+                dangling += x[u]
+                continue
+            share = alpha * x[u] / out_weight[u]
+            for i in range(indptr[u], indptr[u + 1]):
+                new_x[indices[i]] += share * weights[i]
+        new_x += (alpha * dangling + 1.0 - alpha) / n
+        err = np.abs(new_x - x).sum()
+        x = new_x
+        if err < n * tol:
+            break
+    return x
+
+
+def run_ic(G: Graph, seeds: Set[int]) -> Set[int]:
+    csr = as_csr(G)
+    active = np.zeros(csr.n, dtype=np.uint8)
+    queue = np.empty(csr.n, dtype=np.int32)
+    count = ic_kernel(csr.indptr, csr.indices, csr.weights, csr.to_ids(seeds), active, queue)
+    return csr.to_labels(queue[:count])
+
+
+# batched=True runs 64 simulations per word (ic_batch_kernel), reproducible
+# from master_seed; batched=False runs them one by one.
+def ic_spread(
+    G: Graph, seeds: Set[int], simulations: int = 1000, batched: bool = True, master_seed: Optional[int] = None
+) -> float:
+    csr = as_csr(G)
+    if not batched:
+        return ic_spread_kernel(csr.indptr, csr.indices, csr.weights, csr.to_ids(seeds), simulations)
+    if master_seed is None:
+        master_seed = next_master_seed()
+    total = ic_batch_kernel(csr.indptr, csr.indices, csr.weights, csr.to_ids(seeds), simulations, master_seed)
+    return total / simulations
+
+
+def run_lt(G: Graph, seeds: Set[int]) -> Set[int]:
+    csr = as_csr(G)
+    active, queue, thresholds, influence, touched = new_lt_scratch(csr.n)
+    count = lt_kernel(
+        csr.indptr, csr.indices, csr.weights, csr.to_ids(seeds), active, queue, thresholds, influence, touched
+    )
+    return csr.to_labels(queue[:count])
+
+
+# One by one on the lazy threshold kernel by default: it only pays for the
+# nodes a cascade touches and is as fast as the batched live-edge kernel even
+# when cascades cover a fifth of the graph. batched=True is ignored on graphs
+# where some node's in-weights add up to more than 1 (no live-edge form).
+def lt_spread(
+    G: Graph, seeds: Set[int], simulations: int = 1000, batched: bool = False, master_seed: Optional[int] = None
+) -> float:
+    csr = as_csr(G)
+    if not batched or csr.max_in_weight() > 1.0 + 1e-6:
+        return lt_spread_kernel(
+            csr.indptr, csr.indices, csr.weights, csr.to_ids(seeds), simulations, *new_lt_scratch(csr.n)
+        )
+    if master_seed is None:
+        master_seed = next_master_seed()
+    in_indptr, _, _, in_cum, in_edge = csr.in_edges()
+    total = lt_batch_kernel(
+        csr.indptr, csr.indices, in_indptr, in_cum, in_edge, csr.to_ids(seeds), simulations, master_seed
+    )
+    return total / simulations
+
+
+def pagerank(G: Graph, alpha: float = 0.85, max_iter: int = 100, tol: float = 1.0e-6) -> np.ndarray:
+    csr = as_csr(G)
+    return pagerank_kernel(csr.indptr, csr.indices, csr.weights, alpha, max_iter, tol)
+
+
+def top_k_labels(csr: CSRGraph, scores: np.ndarray, k: int) -> List[Hashable]:
+    order = np.argsort(-scores, kind="stable")[:k]
+    return [csr.labels[i] for i in order]
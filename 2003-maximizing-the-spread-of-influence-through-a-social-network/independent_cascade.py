@@ -1,80 +1,31 @@
 # This is for the Independent Cascade Model
-import networkx as nx
-import random
-from matplotlib import pyplot as plt
 from typing import List, Set, Optional
 
+import graph_core
+from graph_core import Graph, as_csr, generate_graph, ic_spread
+from lazy_greedy import celf_select
 
-def generate_graph(n: int = 100, m: int = 2) -> nx.DiGraph:
-    G = nx.barabasi_albert_graph(n, m)
-    directed_G = G.to_directed()
 
-    for node in directed_G.nodes():
-        in_edges = list(directed_G.in_edges(node))
-        total = len(in_edges)
-        for source_node, target_node in in_edges:
-            if total > 0:
-                directed_G[source_node][target_node]["weight"] = 1 / total
-            else:
-                directed_G[source_node][target_node]["weight"] = 0.0
+def run_ic(G: Graph, seeds: Set[int]) -> Set[int]:
+    return graph_core.run_ic(G, seeds)
 
-    return directed_G
 
+def estimate_spread(G: Graph, seeds: Set[int], simulations: int = 1000) -> float:
+    return ic_spread(G, seeds, simulations)
 
-def run_ic(G: nx.DiGraph, seeds: Set[int]) -> Set[int]:
-    active = set(seeds)
-    newly_active = set(seeds)
 
-    while newly_active:
-        next_active = set()
-        for node in newly_active:
-            for neighbor in G.successors(node):
-                if neighbor not in active:
-                    p = G[node][neighbor].get("weight", 0.1)
-                    if random.random() < p:
-                        next_active.add(neighbor)
-        newly_active = next_active
-        active.update(newly_active)
-    return active
+def greedy_select(
+    G: Graph, k: int, simulations: int, target: Optional[float] = None, min_gain: Optional[float] = None,
+    workers: int = 1,
+) -> Set[int]:
+    # Lazy greedy, see lazy_greedy.celf_select for the stop rules and workers
+    return celf_select(G, k, estimate_spread, simulations, target, min_gain, workers)
 
 
-def estimate_spread(G: nx.DiGraph, seeds: Set[int], simulations: int = 1000) -> float:
-    total_spread = 0
-
-    for _ in range(simulations):
-        active = run_ic(G, seeds)
-        total_spread += len(active)
-
-    return total_spread / simulations
-
-
-def greedy_select(G: nx.DiGraph, k: int, simulations: int) -> Set[int]:
-    selected: Set[int] = set()
-    all_nodes: Set[int] = set(G.nodes())
-
-    for _ in range(k):
-        best_node = None
-        best_gain = -1
-
-        for node in all_nodes - selected:
-            temp_seed = selected | {node}
-            gain = estimate_spread(G, temp_seed, simulations)
-
-            if gain > best_gain:
-                best_gain = gain
-                best_node = node
-        if best_node is not None:
-            selected.add(best_node)
-            print(f"Selected: {best_node} | Estimated Spread: {best_gain:.2f}")
-        else:
-            print("No valid node found to add.")
-
-    return selected
-
-
-def run_simulation(n: int = 100, m: int = 2, k: int = 5, simulations: int = 1000, G: Optional[nx.DiGraph] = None):
+def run_simulation(n: int = 100, m: int = 2, k: int = 5, simulations: int = 1000, G: Optional[Graph] = None):
     if G is None:
         G = generate_graph(n, m)
+    G = as_csr(G)
 
     seeds = greedy_select(G, k, simulations)
     print("Final seed set:", seeds)
@@ -0,0 +1,108 @@
+# Lazy greedy (CELF, Leskovec et al. 2007) seed selection for any diffusion
+# model. A model is just its spread estimator, spread(G, seeds, simulations),
+# so independent_cascade.estimate_spread and linear_threshold.estimate_spread
+# both plug in.
+import heapq
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, Set
+
+from graph_core import CSRGraph, Graph, as_csr
+
+SpreadFn = Callable[[Graph, Set[int], int], float]
+
+# Set in every pool worker by _init_worker, so the graph is pickled once per
+# worker instead of once per task.
+_worker_graph: Optional[CSRGraph] = None
+
+
+def _init_worker(G: CSRGraph) -> None:
+    global _worker_graph
+    _worker_graph = G
+
+
+def _spreads(spread: SpreadFn, selected: Set[int], nodes: List[int], simulations: int) -> List[float]:
+    return [spread(_worker_graph, selected | {v}, simulations) for v in nodes]
+
+
+# spread(S + v) for every v in nodes, in `workers` chunks on the pool or
+# inline without one.
+def spreads_with(
+    G: CSRGraph, spread: SpreadFn, selected: Set[int], nodes: List[int], simulations: int,
+    pool: Optional[ProcessPoolExecutor], workers: int,
+) -> List[float]:
+    if pool is None or len(nodes) < 2:
+        return [spread(G, selected | {v}, simulations) for v in nodes]
+    chunks = [nodes[i::workers] for i in range(workers) if nodes[i::workers]]
+    results = list(pool.map(_spreads, [spread] * len(chunks), [selected] * len(chunks), chunks, [simulations] * len(chunks)))
+    # undo the round robin split
+    out = [0.0] * len(nodes)
+    for i, values in enumerate(results):
+        out[i::workers] = values
+    return out
+
+
+# CELF: the heap holds (-gain, node id, round the gain was computed in).
+# Gains only shrink as the seed set grows (submodularity), so a gain that is
+# current and on top of the heap beats every stale one below it and is
+# picked without re-estimating the rest. With workers > 1 the n initial
+# estimates are split over a process pool, and each re-evaluation takes the
+# `workers` stale entries on top of the heap at once.
+#
+# Stop rules: `target` stops once the estimated spread reaches it, and
+# `min_gain` once the best marginal gain left is below it.
+def celf_select(
+    G: Graph,
+    k: int,
+    spread: SpreadFn,
+    simulations: int = 1000,
+    target: Optional[float] = None,
+    min_gain: Optional[float] = None,
+    workers: int = 1,
+) -> Set[int]:
+    G = as_csr(G)
+    selected: Set[int] = set()
+    current = 0.0
+    pool = None
+    if workers > 1:
+        # spawn, since forking a process with numba worker threads running is unsafe
+        pool = ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker, initargs=(G,)
+        )
+    try:
+        gains = spreads_with(G, spread, selected, G.labels, simulations, pool, workers)
+        heap = [(-gain, v, 0) for v, gain in enumerate(gains)]
+        heapq.heapify(heap)
+        evaluations = len(gains)
+
+        while len(selected) < k and heap:
+            neg_gain, v, last = heap[0]
+            if last == len(selected):
+                heapq.heappop(heap)
+                if min_gain is not None and -neg_gain < min_gain:
+                    print(f"Stopping: best marginal gain {-neg_gain:.2f} is below {min_gain}")
+                    break
+                selected.add(G.labels[v])
+                current += -neg_gain
+                print(f"Selected: {G.labels[v]} | Estimated Spread: {current:.2f}")
+                if target is not None and current >= target:
+                    print(f"Stopping: spread target {target} reached")
+                    break
+                continue
+
+            stale = []
+            while heap and heap[0][2] != len(selected) and len(stale) < workers:
+                stale.append(heapq.heappop(heap)[1])
+            values = spreads_with(G, spread, selected, [G.labels[u] for u in stale], simulations, pool, workers)
+            evaluations += len(stale)
+            for u, value in zip(stale, values):
+                heapq.heappush(heap, (-(value - current), u, len(selected)))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    if len(selected) < k and not heap:
+        print("No more nodes to select.")
+    full = sum(G.n - i for i in range(len(selected)))
+    print(f"Spread estimates: {evaluations} (full greedy: {full})")
+    return selected
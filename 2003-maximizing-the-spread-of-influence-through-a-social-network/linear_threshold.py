@@ -1,91 +1,66 @@
 # This is for the Linear Threshold Model
-import networkx as nx
-import random
-from matplotlib import pyplot as plt
 from typing import List, Set, Optional
 
+import numpy as np
 
-def generate_graph(n: int = 100, m: int = 2) -> nx.DiGraph:
-    G = nx.barabasi_albert_graph(n, m)
-    directed_G = G.to_directed()
+import graph_core
+from graph_core import CSRGraph, Graph, as_csr, generate_graph, lt_rr_fill, lt_rr_sizes, lt_spread, next_master_seed
+from lazy_greedy import celf_select
+# graph_core has put the 2007 folder on sys.path, the RR pool and max
+# coverage come from its IMM code
+from ris import RRPool, select_seeds
 
-    for node in directed_G.nodes():
-        in_edges = list(directed_G.in_edges(node))
-        total = len(in_edges)
-        for source_node, target_node in in_edges:
-            if total > 0:
-                directed_G[source_node][target_node]["weight"] = 1 / total
-            else:
-                directed_G[source_node][target_node]["weight"] = 0.0
 
-    return directed_G
+def run_lt(G: Graph, seeds: Set[int]) -> Set[int]:
+    return graph_core.run_lt(G, seeds)
 
 
-def run_lt(G: nx.DiGraph, seeds: set[int]) -> Set[int]:
-    active = set(seeds)
-    thresholds = {}
+def estimate_spread(G: Graph, seeds: Set[int], simulations: int = 1000) -> float:
+    return lt_spread(G, seeds, simulations)
 
-    for node in G.nodes():
-        thresholds[node] = random.uniform(0, 1)
 
-    influences = {node: 0 for node in G.nodes()}
-    newly_active = set(seeds)
+def greedy_select(
+    G: Graph, k: int, simulations: int, target: Optional[float] = None, min_gain: Optional[float] = None,
+    workers: int = 1,
+) -> Set[int]:
+    # Lazy greedy, see lazy_greedy.celf_select for the stop rules and workers
+    return celf_select(G, k, estimate_spread, simulations, target, min_gain, workers)
 
-    while newly_active:
-        next_active = set()
-        for node in newly_active:
-            for neighbor in G.successors(node):
-                if neighbor not in active:
-                    weight = G[node][neighbor].get("weight", 0.1)
-                    influences[neighbor] += weight
 
-                    if influences[neighbor] >= thresholds[neighbor]:
-                        next_active.add(neighbor)
+# RR sets of the LT model (one backward walk each, see graph_core.lt_rr_set)
+# in the same pool layout as the IC ones, so the IMM max coverage works on
+# them unchanged.
+class LTRRPool(RRPool):
+    def __init__(self, G: CSRGraph, master_seed: int):
+        self.n = G.n
+        self.in_indptr, self.in_indices, _, self.in_cum, _ = G.in_edges()
+        self.master_seed = master_seed
+        self.pool = np.empty(0, dtype=np.int32)
+        self.offsets = np.zeros(1, dtype=np.int64)
 
-        newly_active = next_active
-        active.update(newly_active)
+    def sizes(self, first: int, count: int) -> np.ndarray:
+        return lt_rr_sizes(self.in_indptr, self.in_indices, self.in_cum, first, count, self.master_seed)
 
-    return active
+    def fill(self, first: int, offsets: np.ndarray, pool: np.ndarray) -> None:
+        lt_rr_fill(self.in_indptr, self.in_indices, self.in_cum, first, offsets, self.master_seed, pool)
 
 
-def estimate_spread(G: nx.DiGraph, seeds: set[int], simulations: int = 1000) -> float:
-    total_spread = 0
+# Seed selection for large graphs: k nodes covering the most of `rr_sets`
+# LT RR sets instead of k * n spread estimates. The spread of the set is
+# n * (fraction of RR sets it covers).
+def rr_select(G: Graph, k: int, rr_sets: int = 100000, master_seed: Optional[int] = None) -> Set[int]:
+    G = as_csr(G)
+    pool = LTRRPool(G, next_master_seed() if master_seed is None else master_seed)
+    pool.extend_to(rr_sets)
+    seeds, covered = select_seeds(pool, k)
+    print(f"Selected: {G.to_labels(seeds)} | Estimated Spread: {G.n * covered:.2f}")
+    return G.to_labels(seeds)
 
-    for _ in range(simulations):
-        active = run_lt(G, seeds)
-        total_spread += len(active)
 
-    return total_spread / simulations
-
-
-def greedy_select(G: nx.DiGraph, k: int, simulations: int) -> Set[int]:
-    selected: Set[int] = set()
-    all_nodes: Set[int] = set(G.nodes())
-
-    for _ in range(k):
-        best_node = None
-        best_gain = -1
-
-        for node in all_nodes - selected:
-            temp_seed = selected | {node}
-            gain = estimate_spread(G, temp_seed, simulations)
-
-            if gain > best_gain:
-                best_gain = gain
-                best_node = node
-        if best_node is not None:
-            selected.add(best_node)
-            print(f"Selected: {best_node} | Estimated Spread: {best_gain:.2f}")
-        else:
-            print("No more nodes to select.")
-            break
-
-    return selected
-
-
-def run_simulation(n: int = 100, m: int = 2, k: int = 5, simulations: int = 1000, G: Optional[nx.DiGraph] = None):
+def run_simulation(n: int = 100, m: int = 2, k: int = 5, simulations: int = 1000, G: Optional[Graph] = None):
     if G is None:
         G = generate_graph(n, m)
+    G = as_csr(G)
 
     seeds = greedy_select(G, k, simulations)
     print("Final seed set:", seeds)
@@ -3,24 +3,9 @@ import linear_threshold
 import page_rank
 from matplotlib import pyplot as plt
 import networkx as nx
-import threading
+from graph_core import as_csr, generate_graph
 
 
-def generate_graph(n: int = 100, m: int = 2) -> nx.DiGraph:
-    G = nx.barabasi_albert_graph(n, m)
-    directed_G = G.to_directed()
-
-    for node in directed_G.nodes():
-        in_edges = list(directed_G.in_edges(node))
-        total = len(in_edges)
-        for source_node, target_node in in_edges:
-            if total > 0:
-                directed_G[source_node][target_node]["weight"] = 1 / total
-            else:
-                directed_G[source_node][target_node]["weight"] = 0.0
-
-    return directed_G
-
 def display_graph(G: nx.DiGraph) -> None:
     plt.figure(figsize=(10, 10))
     pos = nx.spring_layout(G)
@@ -38,8 +23,11 @@ def display_graph(G: nx.DiGraph) -> None:
 
 
 if __name__ == "__main__":
-    # You can adjust these parameters as needed, but be careful with large values
-    # as they can lead to long computation times. I will add parallelization later.
+    # You can adjust these parameters as needed. The simulations run on the
+    # compiled CSR kernels in graph_core and greedy selection is lazy (CELF):
+    # n spread estimates for the first seed, then usually a handful per seed.
+    # For big graphs pass workers to greedy_select to split the first round
+    # over processes, or use linear_threshold.rr_select.
     NODES = 100
     EDGES_PER_NODE = 2
     NUM_SEEDS = 4
@@ -47,15 +35,19 @@ if __name__ == "__main__":
 
     try:
         G = generate_graph(NODES, EDGES_PER_NODE)
+        # Convert once, all three models share the same CSR graph
+        csr = as_csr(G)
 
         print("Independent Cascade Model Simulation: ")
-        independent_cascade.run_simulation(NODES, EDGES_PER_NODE, NUM_SEEDS, NUM_SIMULATIONS, G)
+        independent_cascade.run_simulation(NODES, EDGES_PER_NODE, NUM_SEEDS, NUM_SIMULATIONS, csr)
         print("\nLinear Threshold Model Simulation: ")
-        linear_threshold.run_simulation(NODES, EDGES_PER_NODE, NUM_SEEDS, NUM_SIMULATIONS, G)
+        linear_threshold.run_simulation(NODES, EDGES_PER_NODE, NUM_SEEDS, NUM_SIMULATIONS, csr)
         print("\nPageRank Model Simulation: ")
-        page_rank.run_simulation(NODES, EDGES_PER_NODE, NUM_SEEDS, NUM_SIMULATIONS, G)
+        page_rank.run_simulation(NODES, EDGES_PER_NODE, NUM_SEEDS, NUM_SIMULATIONS, csr)
 
-        display_graph(G)
+        # Drawing is only readable (and affordable) for small graphs
+        if NODES <= 1000:
+            display_graph(G)
 
     except KeyboardInterrupt: 
         print("Simulation interrupted by user.")
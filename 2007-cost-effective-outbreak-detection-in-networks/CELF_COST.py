@@ -1,64 +1,14 @@
 import numpy as np
 import heapq
-from numba import njit
+import os
 from tqdm import tqdm
 import time
 
-def build_adj_list(edge_list_path):
-    edges = np.loadtxt(edge_list_path, dtype=np.int32)
-    n = edges.max() + 1
-    adj = [[] for _ in range(n)]
-    for u, v in edges:
-        adj[u].append(v)
-        adj[v].append(u)
-    return adj
-
-def flatten_adj_list(adj):
-    n = len(adj)
-    start_idx = np.zeros(n + 1, dtype=np.int32)
-    total_edges = sum(len(neigh) for neigh in adj)
-    flat_adj = np.zeros(total_edges, dtype=np.int32)
-    
-    idx = 0
-    for i, neigh in enumerate(adj):
-        start_idx[i] = idx
-        flat_adj[idx : idx + len(neigh)] = neigh
-        idx += len(neigh)
-    start_idx[n] = idx
-    return flat_adj, start_idx
-
-@njit
-def run_IC(flat_adj, start_idx, seeds, seeds_len, p):
-    n = len(start_idx) - 1
-    active = np.zeros(n, dtype=np.uint8)
-    queue = np.empty(n, dtype=np.int32)
-    q_len = 0
-    
-    for i in range(seeds_len):
-        s = seeds[i]
-        if active[s] == 0:
-            active[s] = 1
-            queue[q_len] = s
-            q_len += 1
-    
-    idx = 0
-    while idx < q_len:
-        u = queue[idx]
-        idx += 1
-        for i in range(start_idx[u], start_idx[u + 1]):
-            v = flat_adj[i]
-            if active[v] == 0 and np.random.random() <= p:
-                active[v] = 1
-                queue[q_len] = v
-                q_len += 1
-    return active.sum()
-
-@njit
-def estimate_spread(flat_adj, start_idx, seeds, seeds_len, MC, p):
-    total = 0
-    for _ in range(MC):
-        total += run_IC(flat_adj, start_idx, seeds, seeds_len, p)
-    return total / MC
+import checkpoint
+import instrument
+from graph_loader import load_csr
+from ic_kernels import seed_kernels
+from spread_oracle import CRNOracle, MonteCarloOracle, SequentialMonteCarloOracle
 
 def node_cost(start_idx, u):
     if u < 0 or u >= len(start_idx) - 1:
@@ -66,99 +16,147 @@ def node_cost(start_idx, u):
     deg = int(start_idx[u + 1] - start_idx[u])
     return 1.0 + 0.01 * deg
 
-def compute_init_gains(flat_adj, start_idx, MC, p):
+def node_costs(start_idx):
+    return 1.0 + 0.01 * np.diff(start_idx).astype(np.float64)
+
+# Heap entry fields as stored in a checkpoint
+HEAP_FIELDS = ("neg_ratio", "node", "gain", "cost", "last_updated")
+HEAP_DTYPES = (np.float64, np.int64, np.float64, np.float64, np.int64)
+
+# Singleton spreads from one oracle pass (or checkpoint_dir, see
+# checkpoint.initial_gains), costs from start_idx,
+# and the heap is built in one heapify instead of n pushes.
+def compute_init_gains(oracle, start_idx, checkpoint_dir=None):
     n = len(start_idx) - 1
-    heap = []
-    seed_array = np.zeros(1, dtype=np.int32)
-    
-    for v in tqdm(range(n), desc="Computing initial gains"):
-        seed_array[0] = v
-        gain = estimate_spread(flat_adj, start_idx, seed_array, 1, MC, p)
-        cost = node_cost(start_idx, v)
-        ratio = gain / cost
-        heapq.heappush(heap, (-ratio, v, gain, cost, 0))
-    
+    with tqdm(total=n, desc="Computing initial gains") as bar:
+        gains = checkpoint.initial_gains(
+            oracle, n, checkpoint_dir, progress=lambda done, total: bar.update(done * n // total - bar.n)
+        )
+    costs = node_costs(start_idx)
+    ratios = gains / costs
+    heap = list(zip((-ratios).tolist(), range(n), gains.tolist(), costs.tolist(), [0] * n))
+    heapq.heapify(heap)
     return heap
 
-def CELF_C(flat_adj, start_idx, budget=30.0, MC_init=10, MC_final=100, p=0.1):
+# spread_oracle: anything implementing the spread_oracle.py interface, e.g.
+# live_edge.LiveEdgeOracle. Defaults to Monte Carlo cascades.
+# checkpoint_dir / checkpoint_every: as in CELF_SET_K.CELF_K. Selections
+# depend on the budget, so only the initial gains are shared between runs
+# with different budgets.
+def CELF_C(flat_adj, start_idx, budget=30.0, MC_init=10, MC_final=100, p=0.1, parallel=False, spread_oracle=None,
+           checkpoint_dir=None, checkpoint_every=1000):
     n = len(start_idx) - 1
-    selected = []
-    current_spread = 0.0
-    total_cost = 0.0
-    
-    max_seeds = min(int(budget) + 10, n)
-    seed_array = np.zeros(max_seeds, dtype=np.int32)
-    
-    heap = compute_init_gains(flat_adj, start_idx, MC_init, p)
-    
-    while total_cost < budget and heap:
-        neg_ratio, v, gain, cost, last_updated = heapq.heappop(heap)
-        
-        if v in selected:
-            continue
-        
-        if total_cost + cost > budget:
-            continue
-
-        if last_updated < len(selected):
-            temp_len = len(selected) + 1
-            for i, node in enumerate(selected):
-                seed_array[i] = node
-            seed_array[len(selected)] = v
-            
-            spread_with_v = estimate_spread(flat_adj, start_idx, seed_array, temp_len, MC_init, p)
-            marginal_gain = spread_with_v - current_spread
-            ratio = marginal_gain / cost
-
-            heapq.heappush(heap, (-ratio, v, marginal_gain, cost, len(selected)))
-            continue
-        
-        selected.append(v)
-        seed_array[len(selected) - 1] = v
-        total_cost += cost
-        
-        current_spread = estimate_spread(flat_adj, start_idx, seed_array, len(selected), MC_final, p)
-        
-        print(f"Selected {v}, marginal gain = {gain:.2f}, current spread = {current_spread:.2f}")
-    
+    oracle = spread_oracle
+    if oracle is None:
+        oracle = MonteCarloOracle(flat_adj, start_idx, MC_init, MC_final, p, parallel)
+    key = checkpoint.oracle_key(oracle, n)
+    name = f"celf_c_budget_{budget:g}"
+    state = checkpoint.load(checkpoint_dir, name, key) if checkpoint_dir is not None else None
+
+    if state is None:
+        selected = []
+        current_spread = 0.0
+        total_cost = 0.0
+        evaluations = 0
+        with instrument.phase("initial_gains"):
+            heap = compute_init_gains(oracle, start_idx, checkpoint_dir)
+    else:
+        selected = state["selected"].tolist()
+        current_spread = float(state["spread"])
+        total_cost = float(state["total_cost"])
+        evaluations = int(state["evaluations"])
+        heap = checkpoint.heap_entries(state, HEAP_FIELDS)
+        oracle.restore(selected, current_spread)
+        print(f"Resuming from {checkpoint_dir} with {len(selected)} seeds")
+    is_selected = np.zeros(n, dtype=np.bool_)
+    is_selected[selected] = True
+
+    def save():
+        checkpoint.save(
+            checkpoint_dir, name, key,
+            selected=np.array(selected, dtype=np.int64),
+            spread=current_spread,
+            total_cost=total_cost,
+            evaluations=evaluations,
+            **checkpoint.heap_arrays(heap, HEAP_FIELDS, HEAP_DTYPES),
+        )
+
+    with instrument.phase("selection"):
+        while total_cost < budget and heap:
+            neg_ratio, v, gain, cost, last_updated = heapq.heappop(heap)
+            instrument.count("heap_pops")
+
+            if is_selected[v]:
+                continue
+
+            if total_cost + cost > budget:
+                continue
+
+            if last_updated < len(selected):
+                instrument.count("lazy_reevaluations")
+                # compared with the next heap entry's ratio, in gain units
+                marginal_gain = oracle.marginal_gain(v, -heap[0][0] * cost if heap else None)
+                ratio = marginal_gain / cost
+
+                heapq.heappush(heap, (-ratio, v, marginal_gain, cost, len(selected)))
+                evaluations += 1
+                if checkpoint_dir is not None and evaluations % checkpoint_every == 0:
+                    save()
+                continue
+
+            selected.append(v)
+            is_selected[v] = True
+            total_cost += cost
+
+            current_spread = oracle.add(v)
+
+            print(f"Selected {v}, marginal gain = {gain:.2f}, current spread = {current_spread:.2f}")
+            if checkpoint_dir is not None:
+                save()
+
+    if hasattr(oracle, "summary"):
+        print(oracle.summary())
     return set(selected), total_cost, current_spread
 
-def main(path, budget = 30.0, MC_init = 100, MC_final = 1000, p = 0.1):
+# sequential=True / crn=True / metrics / checkpoint_dir: see CELF_SET_K.main
+def main(path, budget = 30.0, MC_init = 100, MC_final = 1000, p = 0.1, parallel = False, sequential = False,
+         crn = False, metrics = None, checkpoint_dir = None):
     path_to_list = path
 
     print("Building adjacency list...")
     start_time = time.time()
-    adj = build_adj_list(path_to_list)
-    flat_adj, start_idx = flatten_adj_list(adj)
+    instrument.reset()  # one record per run, not per process
+    with instrument.phase("load"):
+        flat_adj, start_idx = load_csr(path_to_list)
 
     print("Running CELF-C...")
-    chosen_nodes, total_cost, spread = CELF_C(flat_adj, start_idx, budget, MC_init, MC_final, p)
+    oracle = None
+    if sequential:
+        oracle = SequentialMonteCarloOracle(flat_adj, start_idx, MC_init, MC_final, p, parallel)
+    elif crn:
+        oracle = CRNOracle(flat_adj, start_idx, MC_init, p)
+    chosen_nodes, total_cost, spread = CELF_C(
+        flat_adj, start_idx, budget, MC_init, MC_final, p, parallel, oracle, checkpoint_dir=checkpoint_dir
+    )
 
     print("\nChosen nodes:", chosen_nodes)
     print(f"Total cost: {total_cost:.2f}")
     print(f"Estimated spread: {spread:.2f}")
     print(f"Elapsed time: {time.time() - start_time:.2f} seconds")
-    
-if __name__ == "__main__": # I have it this way to make a benchmark later on.
+    if instrument.ENABLED:
+        print(instrument.report())
+        if metrics is not None:
+            instrument.export(metrics, algorithm="CELF_C", graph=os.path.basename(path))
+
+
+if __name__ == "__main__":
     np.random.seed(42)
-    path = "2007-cost-effective-outbreak-detection-in-networks/facebook_combined.txt"
+    seed_kernels(42)
+    path = "2007-cost-effective-outbreak-detection-in-networks/Data/facebook_combined.txt"
     # Parameters
     budget = 30.0      # Total budget
     MC_init = 100      # MC for lazy recomputations
     MC_final = 1000   # MC for final spread estimates
     p = 0.1            # Transmission probability
 
-    path_to_list = path
-
-    print("Building adjacency list...")
-    start_time = time.time()
-    adj = build_adj_list(path_to_list)
-    flat_adj, start_idx = flatten_adj_list(adj)
-
-    print("Running CELF-C...")
-    chosen_nodes, total_cost, spread = CELF_C(flat_adj, start_idx, budget, MC_init, MC_final, p)
-
-    print("\nChosen nodes:", chosen_nodes)
-    print(f"Total cost: {total_cost:.2f}")
-    print(f"Estimated spread: {spread:.2f}")
-    print(f"Elapsed time: {time.time() - start_time:.2f} seconds")
\ No newline at end of file
+    main(path, budget, MC_init, MC_final, p)
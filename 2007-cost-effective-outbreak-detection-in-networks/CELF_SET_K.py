@@ -1,128 +1,207 @@
 import numpy as np
 import heapq
-from numba import njit, prange
+import os
 from tqdm import tqdm
 import time
+import warnings
 
+import checkpoint
+import instrument
+from graph_loader import load_csr, stream_csr
+from ic_kernels import seed_kernels
+from spread_oracle import CRNOracle, MonteCarloOracle, SequentialMonteCarloOracle
 
-# Make our graph
-def build_adj_list(edge_list_path):
-    edges = np.loadtxt(edge_list_path, dtype=np.int32)
-    n = edges.max() + 1
-    adj = [[] for _ in range(n)]
-    for u, v in edges:
-        adj[u].append(v)
-        adj[v].append(u)
-    return adj
 
+# Heap entry fields as stored in a checkpoint
+HEAP_FIELDS = ("neg_gain", "node", "last_updated", "mg2", "prev_best")
+HEAP_DTYPES = (np.float64, np.int64, np.int64, np.float64, np.int64)
 
-def flatten_adj_list(adj):
-    n = len(adj)
-    start_idx = np.zeros(n + 1, dtype=np.int32)
-    total_edges = sum(len(neigh) for neigh in adj)
-    flat_adj = np.zeros(total_edges, dtype=np.int32)
 
-    idx = 0
-    for i, neigh in enumerate(adj):
-        start_idx[i] = idx
-        flat_adj[idx : idx + len(neigh)] = neigh
-        idx += len(neigh)
-    start_idx[n] = idx
-    return flat_adj, start_idx
-
-
-# IC Model
-@njit
-def run_IC(flat_adj, start_idx, seeds, p):
-    n = len(start_idx) - 1
-    active = np.zeros(n, dtype=np.uint8)
-    queue = np.empty(n, dtype=np.int32)
-    q_len = 0
-
-    for s in seeds:
-        if active[s] == 0:
-            active[s] = 1
-            queue[q_len] = s
-            q_len += 1
-
-    idx = 0
-    while idx < q_len:
-        u = queue[idx]
-        idx += 1
-        for i in range(start_idx[u], start_idx[u + 1]):
-            v = flat_adj[i]
-            if active[v] == 0 and np.random.rand() <= p:
-                active[v] = 1
-                queue[q_len] = v
-                q_len += 1
-    return active.sum()
-
-
-@njit
-def estimate_spread(flat_adj, start_idx, seeds, MC, p):
-    total = 0
-    for _ in range(MC):
-        total += run_IC(flat_adj, start_idx, seeds, p)
-    return total / MC
-
-
-def compute_init_gains(flat_adj, start_idx, nodes, MC, p):
-    heap = []
-    for v in tqdm(nodes, desc="Computing initial gains"):
-        gain = estimate_spread(flat_adj, start_idx, [v], MC, p)
-        heapq.heappush(heap, (-gain, v, 0))  # max heap
+# All singleton spreads come from one oracle pass (or from checkpoint_dir,
+# see checkpoint.initial_gains), then the heap is built in one heapify
+# instead of n pushes.
+def compute_init_gains(oracle, n, checkpoint_dir=None):
+    with tqdm(total=n, desc="Computing initial gains") as bar:
+        gains = checkpoint.initial_gains(
+            oracle, n, checkpoint_dir, progress=lambda done, total: bar.update(done * n // total - bar.n)
+        )
+    heap = list(zip((-gains).tolist(), range(n), [0] * n))  # max heap
+    heapq.heapify(heap)
     return heap
 
 
 # CELF-K Algo choose how many nodes
-def CELF_K(flat_adj, start_idx, k=5, MC_init=10, MC_final=100, p=0.1):
+# spread_oracle: anything implementing the spread_oracle.py interface, e.g.
+# live_edge.LiveEdgeOracle. Defaults to Monte Carlo cascades.
+#
+# celfpp=True runs CELF++: every re-evaluation also measures the node's gain
+# with the current best candidate of the round already added (mg2, prev_best).
+# If that candidate is the next seed, the node's gain in the following round
+# is just mg2 and the oracle is not asked again. That only pays off when mg2
+# and a fresh gain come from the same worlds (oracle.common_random_numbers,
+# e.g. CRNOracle, LiveEdgeOracle): with independent Monte Carlo the noise
+# between them reorders the heap, the look-ahead almost never hits and every
+# re-evaluation costs two cascades per world (k=4 on facebook: 637 oracle
+# calls against 282 for plain CELF). For such oracles celfpp warns and runs
+# plain CELF.
+#
+# checkpoint_dir: the state is saved there after every seed and every
+# checkpoint_every re-evaluations (see checkpoint.py), and a run resumes
+# from what it finds there. The greedy seeds do not depend on k, so a
+# checkpoint of a run with a smaller k is continued and one with a larger k
+# already holds the answer.
+def CELF_K(flat_adj, start_idx, k=5, MC_init=10, MC_final=100, p=0.1, parallel=False, spread_oracle=None,
+           celfpp=False, checkpoint_dir=None, checkpoint_every=1000):
     n = len(start_idx) - 1
-    nodes = list(range(n))
-    selected = []
-    heap = compute_init_gains(flat_adj, start_idx, nodes, MC_init, p)
-    current_spread = 0.0
-
-    while len(selected) < k:
-        neg_gain, v, last_updated = heapq.heappop(heap)
-        if v in selected:
-            continue
-
-        if last_updated != len(selected):
-            spread_with_v = estimate_spread(
-                flat_adj, start_idx, selected + [v], MC_init, p
-            )
-            marginal_gain = spread_with_v - current_spread
-            heapq.heappush(heap, (-marginal_gain, v, len(selected)))
-            continue
-
-        selected.append(v)
-
-        current_spread = estimate_spread(flat_adj, start_idx, selected, MC_final, p)
-        print(
-            f"Selected {v}, marginal gain = {-neg_gain:.2f}, current spread = {current_spread:.2f}"
+    oracle = spread_oracle
+    if oracle is None:
+        oracle = MonteCarloOracle(flat_adj, start_idx, MC_init, MC_final, p, parallel)
+    if celfpp and not getattr(oracle, "common_random_numbers", False):
+        warnings.warn(
+            f"CELF++ needs an oracle with common random numbers, {type(oracle).__name__} has none; "
+            "running plain CELF", RuntimeWarning,
+        )
+        celfpp = False
+    key = checkpoint.oracle_key(oracle, n)
+    name = "celfpp" if celfpp else "celf_k"
+    state = checkpoint.load(checkpoint_dir, name, key) if checkpoint_dir is not None else None
+
+    if state is None:
+        selected = []
+        spreads = []
+        # heap entries: (-gain, node, round of the gain, mg2, prev_best)
+        with instrument.phase("initial_gains"):
+            heap = [entry + (0.0, -1) for entry in compute_init_gains(oracle, n, checkpoint_dir)]
+        last_seed = -1
+        cur_best = -1         # best node re-evaluated in this round
+        cur_best_gain = -np.inf
+        oracle_calls = 0
+        avoided_calls = 0
+    else:
+        selected = state["selected"].tolist()
+        spreads = state["spreads"].tolist()
+        if len(selected) >= k:
+            print(f"Checkpoint in {checkpoint_dir} already has {len(selected)} seeds")
+            return set(selected[:k]), spreads[k - 1] if k > 0 else 0.0
+        heap = checkpoint.heap_entries(state, HEAP_FIELDS)
+        last_seed, cur_best, oracle_calls, avoided_calls = state["counters"].tolist()
+        cur_best_gain = float(state["cur_best_gain"])
+        oracle.restore(selected, spreads[-1] if spreads else 0.0)
+        print(f"Resuming from {checkpoint_dir} with {len(selected)} seeds")
+    is_selected = np.zeros(n, dtype=np.bool_)
+    is_selected[selected] = True
+    current_spread = spreads[-1] if spreads else 0.0
+
+    def save():
+        checkpoint.save(
+            checkpoint_dir, name, key,
+            selected=np.array(selected, dtype=np.int64),
+            spreads=np.array(spreads, dtype=np.float64),
+            counters=np.array([last_seed, cur_best, oracle_calls, avoided_calls], dtype=np.int64),
+            cur_best_gain=cur_best_gain,
+            **checkpoint.heap_arrays(heap, HEAP_FIELDS, HEAP_DTYPES),
         )
 
+    with instrument.phase("selection"):
+        while len(selected) < k and heap:
+            neg_gain, v, last_updated, mg2, prev_best = heapq.heappop(heap)
+            instrument.count("heap_pops")
+            if is_selected[v]:
+                continue
+
+            if last_updated != len(selected):
+                instrument.count("lazy_reevaluations")
+                if celfpp and prev_best == last_seed and last_updated == len(selected) - 1:
+                    marginal_gain = mg2
+                    avoided_calls += 1
+                elif celfpp:
+                    # cur_best is -1 for the round's first re-evaluation, which then gets no mg2
+                    marginal_gain, mg2 = oracle.marginal_gain_pair(v, cur_best)
+                    prev_best = cur_best
+                    oracle_calls += 1
+                else:
+                    # v stays below the next heap entry or overtakes it
+                    marginal_gain = oracle.marginal_gain(v, -heap[0][0] if heap else None)
+                    prev_best = -1
+                    oracle_calls += 1
+                if marginal_gain > cur_best_gain:
+                    cur_best = v
+                    cur_best_gain = marginal_gain
+                heapq.heappush(heap, (-marginal_gain, v, len(selected), mg2, prev_best))
+                if checkpoint_dir is not None and (oracle_calls + avoided_calls) % checkpoint_every == 0:
+                    save()
+                continue
+
+            selected.append(v)
+            is_selected[v] = True
+            last_seed = v
+            cur_best = -1
+            cur_best_gain = -np.inf
+
+            current_spread = oracle.add(v)
+            spreads.append(current_spread)
+            print(
+                f"Selected {v}, marginal gain = {-neg_gain:.2f}, current spread = {current_spread:.2f}"
+            )
+            if checkpoint_dir is not None:
+                save()
+
+    # Every avoided call is a re-evaluation plain CELF would have made
+    instrument.count("oracle_calls", oracle_calls)
+    instrument.count("celfpp_avoided_calls", avoided_calls)
+    print(f"Oracle calls: {oracle_calls}, avoided by CELF++ look-ahead: {avoided_calls}")
+    if hasattr(oracle, "summary"):
+        print(oracle.summary())
     return set(selected), current_spread
 
 
-def main(path, k = 5, MC_init = 100, MC_final = 1000, p = 0.1):
+# sequential=True stops each estimate once it is settled, see
+# SequentialMonteCarloOracle; MC_init / MC_final are then upper limits.
+# crn=True answers everything in MC_init shared worlds (CRNOracle).
+# metrics: file the instrumentation is exported to (instrument.export) when
+# the run has IM_INSTRUMENT=1.
+# checkpoint_dir: see CELF_K. The oracle must be the same as in the run that
+# wrote the checkpoint, so keep the seed set by the caller (np.random.seed)
+# and the parameters unchanged.
+def main(path, k = 5, MC_init = 100, MC_final = 1000, p = 0.1, stream = False, parallel = False, celfpp = False,
+         sequential = False, crn = False, metrics = None, checkpoint_dir = None):
     path_to_list = path
 
     print("Building adjacency list...")
     start_time = time.time()
-    adj = build_adj_list(path_to_list)
-    flat_adj, start_idx = flatten_adj_list(adj)
-
-    print("Running CELF-K...")
-    chosen_nodes, spread = CELF_K(flat_adj, start_idx, k, MC_init, MC_final, p)
+    instrument.reset()  # one record per run, not per process
+    with instrument.phase("load"):
+        if stream:
+            # Big SNAP files: chunked ingest with ids remapped to a dense range
+            flat_adj, start_idx, node_ids = stream_csr(path_to_list)
+        else:
+            flat_adj, start_idx = load_csr(path_to_list)
+
+    print("Running CELF++..." if celfpp else "Running CELF-K...")
+    oracle = None
+    if sequential:
+        oracle = SequentialMonteCarloOracle(flat_adj, start_idx, MC_init, MC_final, p, parallel)
+    elif crn:
+        oracle = CRNOracle(flat_adj, start_idx, MC_init, p)
+    chosen_nodes, spread = CELF_K(
+        flat_adj, start_idx, k, MC_init, MC_final, p, parallel, spread_oracle=oracle, celfpp=celfpp,
+        checkpoint_dir=checkpoint_dir,
+    )
+    if stream:
+        chosen_nodes = {int(node_ids[v]) for v in chosen_nodes}
 
     print("\nChosen nodes:", chosen_nodes)
     print(f"Estimated spread: {spread:.2f}")
     print(f"Elapsed time: {time.time() - start_time:.2f} seconds")
+    if instrument.ENABLED:
+        print(instrument.report())
+        if metrics is not None:
+            instrument.export(metrics, algorithm="CELF_K", graph=os.path.basename(path))
     return chosen_nodes, spread
     
 if __name__ == "__main__":
     np.random.seed(2)
+    seed_kernels(2)
     path = ("2007-cost-effective-outbreak-detection-in-networks/Data/soc-LiveJournal1.txt")
     # Parameters
     k = 5                # Number of seeds
@@ -130,5 +209,5 @@ if __name__ == "__main__":
     MC_final = 1000      # MC for final spread estimates
     p = 0.1              # Transmission probability
     
-    main(path, k, MC_init, MC_final, p)
+    main(path, k, MC_init, MC_final, p, stream=True, parallel=True)
     
\ No newline at end of file
@@ -1,125 +1,83 @@
 import numpy as np
-from numba import njit
+import os
 from tqdm import tqdm
 import time
 
-def build_adj_list(edge_list_path):
-    edges = np.loadtxt(edge_list_path, dtype=np.int32)
-    n = edges.max() + 1
-    adj = [[] for _ in range(n)]
-    for u, v in edges:
-        adj[u].append(v)
-        adj[v].append(u)
-    return adj
-
-
-def flatten_adj_list(adj):
-    n = len(adj)
-    start_idx = np.zeros(n + 1, dtype=np.int32)
-    total_edges = sum(len(neigh) for neigh in adj)
-    flat_adj = np.zeros(total_edges, dtype=np.int32)
-
-    idx = 0
-    for i, neigh in enumerate(adj):
-        start_idx[i] = idx
-        flat_adj[idx : idx + len(neigh)] = neigh
-        idx += len(neigh)
-    start_idx[n] = idx
-    return flat_adj, start_idx
-
-
-@njit
-def run_IC(flat_adj, start_idx, seeds, p):
-    n = len(start_idx) - 1
-    active = np.zeros(n, dtype=np.uint8)
-    queue = np.empty(n, dtype=np.int32)
-    q_len = 0
-
-    for s in seeds:
-        if active[s] == 0:
-            active[s] = 1
-            queue[q_len] = s
-            q_len += 1
-
-    idx = 0
-    while idx < q_len:
-        u = queue[idx]
-        idx += 1
-        for i in range(start_idx[u], start_idx[u + 1]):
-            v = flat_adj[i]
-            if active[v] == 0 and np.random.rand() <= p:
-                active[v] = 1
-                queue[q_len] = v
-                q_len += 1
-
-    return active.sum()
-
-
-@njit
-def estimate_spread(flat_adj, start_idx, seeds, MC, p):
-    total = 0
-    for _ in range(MC):
-        total += run_IC(flat_adj, start_idx, seeds, p)
-    return total / MC
-
-
-def greedy_naive(flat_adj, start_idx, k=5, MC=100, p=0.1):
+import instrument
+from graph_loader import load_csr
+from ic_kernels import seed_kernels
+from spread_oracle import CRNOracle, MonteCarloOracle
+
+
+# spread_oracle: anything implementing the spread_oracle.py interface, e.g.
+# live_edge.LiveEdgeOracle. Defaults to Monte Carlo cascades with MC
+# simulations per estimate.
+def greedy_naive(flat_adj, start_idx, k=5, MC=100, p=0.1, parallel=False, spread_oracle=None):
     n = len(start_idx) - 1
     nodes = list(range(n))
     selected = []
     current_spread = 0.0
+    oracle = spread_oracle
+    if oracle is None:
+        oracle = MonteCarloOracle(flat_adj, start_idx, MC, MC, p, parallel)
 
-    for step in range(k):
-        best_node = -1
-        best_gain = -1.0
+    with instrument.phase("selection"):
+        for step in range(k):
+            best_node = -1
+            best_gain = -1.0
 
-        for v in tqdm(nodes, desc=f"Iteration {step+1}/{k}"):
-            if v in selected:
-                continue
+            for v in tqdm(nodes, desc=f"Iteration {step+1}/{k}"):
+                if v in selected:
+                    continue
 
-            spread_with_v = estimate_spread(
-                flat_adj, start_idx, selected + [v], MC, p
-            )
-            marginal_gain = spread_with_v - current_spread
+                marginal_gain = oracle.marginal_gain(v, best_gain)
+                instrument.count("oracle_calls")
 
-            if marginal_gain > best_gain:
-                best_gain = marginal_gain
-                best_node = v
+                if marginal_gain > best_gain:
+                    best_gain = marginal_gain
+                    best_node = v
 
-        selected.append(best_node)
-        current_spread = estimate_spread(
-            flat_adj, start_idx, selected, MC, p
-        )
+            selected.append(best_node)
+            current_spread = oracle.add(best_node)
 
-        print(
-            f"Selected {best_node}, marginal gain = {best_gain:.2f}, "
-            f"current spread = {current_spread:.2f}"
-        )
+            print(
+                f"Selected {best_node}, marginal gain = {best_gain:.2f}, "
+                f"current spread = {current_spread:.2f}"
+            )
 
     return set(selected), current_spread
 
 
-def main(path, k=5, MC=1000, p=0.1):
+# crn=True answers every gain in the same MC worlds (spread_oracle.CRNOracle)
+# metrics: see CELF_SET_K.main
+def main(path, k=5, MC=1000, p=0.1, parallel=False, crn=False, metrics=None):
     print("Building adjacency list...")
     start_time = time.time()
+    instrument.reset()  # one record per run, not per process
 
-    adj = build_adj_list(path)
-    flat_adj, start_idx = flatten_adj_list(adj)
+    with instrument.phase("load"):
+        flat_adj, start_idx = load_csr(path)
 
     print("Running Naive Greedy...")
-    chosen_nodes, spread = greedy_naive(flat_adj, start_idx, k, MC, p)
+    oracle = CRNOracle(flat_adj, start_idx, MC, p) if crn else None
+    chosen_nodes, spread = greedy_naive(flat_adj, start_idx, k, MC, p, parallel, oracle)
 
     print("\nChosen nodes:", chosen_nodes)
     print(f"Estimated spread: {spread:.2f}")
     print(f"Elapsed time: {time.time() - start_time:.2f} seconds")
+    if instrument.ENABLED:
+        print(instrument.report())
+        if metrics is not None:
+            instrument.export(metrics, algorithm="greedy_naive", graph=os.path.basename(path))
 
     return chosen_nodes, spread
 
 
 if __name__ == "__main__":
     np.random.seed(2)
+    seed_kernels(2)
 
-    path = "2007-cost-effective-outbreak-detection-in-networks/facebook_combined.txt"
+    path = "2007-cost-effective-outbreak-detection-in-networks/Data/facebook_combined.txt"
 
     # Parameters
     k = 5
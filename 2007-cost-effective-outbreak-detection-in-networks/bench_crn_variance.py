@@ -0,0 +1,81 @@
+import numpy as np
+import time
+
+from graph_loader import load_csr
+from ic_kernels import estimate_spread_parallel, new_block_scratch, seed_kernels
+from spread_oracle import CRNOracle, MonteCarloOracle
+from CELF_SET_K import CELF_K
+
+
+# Spread of the committed seeds S + v - spread of S, estimated `repeats` times
+# by each oracle for the same candidates. Independent draws (MonteCarloOracle)
+# vs common random numbers (CRNOracle) at the same MC: per candidate standard
+# deviation over the repeats, share of negative estimates, and how often the
+# best candidate is the one a high-MC reference picks.
+def gain_variance(flat_adj, start_idx, seeds, candidates, MC, repeats, p, MC_ref):
+    ref = CRNOracle(flat_adj, start_idx, MC_ref, p, master_seed=0)
+    for s in seeds:
+        ref.add(s)
+    ref_best = candidates[int(np.argmax([ref.marginal_gain(v) for v in candidates]))]
+
+    results = {}
+    for name in ("independent", "crn"):
+        gains = np.empty((repeats, len(candidates)))
+        for r in range(repeats):
+            if name == "independent":
+                oracle = MonteCarloOracle(flat_adj, start_idx, MC, MC, p, parallel=True)
+            else:
+                oracle = CRNOracle(flat_adj, start_idx, MC, p, master_seed=r + 1)
+            for s in seeds:
+                oracle.add(s)
+            gains[r] = [oracle.marginal_gain(v) for v in candidates]
+        hits = np.mean([candidates[int(np.argmax(g))] == ref_best for g in gains])
+        results[name] = (gains.std(axis=0, ddof=1).mean(), (gains < 0).mean(), hits)
+    return results
+
+
+# CELF-K at a low MC with CRN vs the usual MC, both seed sets scored by the
+# same high-MC estimator.
+def selection_quality(flat_adj, start_idx, k, MC_crn, MC_init, MC_final, p, MC_eval):
+    blocks = new_block_scratch(len(start_idx) - 1)
+    results = {}
+    for name in ("monte_carlo", "crn"):
+        start_time = time.time()
+        if name == "monte_carlo":
+            oracle = MonteCarloOracle(flat_adj, start_idx, MC_init, MC_final, p)
+        else:
+            oracle = CRNOracle(flat_adj, start_idx, MC_crn, p)
+        chosen, _ = CELF_K(flat_adj, start_idx, k, p=p, spread_oracle=oracle)
+        elapsed = time.time() - start_time
+        seeds = np.array(sorted(chosen), dtype=np.int32)
+        spread = estimate_spread_parallel(flat_adj, start_idx, seeds, MC_eval, p, 12345, *blocks)
+        results[name] = (elapsed, seeds, spread)
+    return results
+
+
+def bench(path, n_seeds=3, n_candidates=20, MC=100, repeats=20, p=0.01, MC_ref=5000,
+          k=5, MC_crn=50, MC_init=100, MC_final=1000, MC_eval=10000):
+    flat_adj, start_idx = load_csr(path)
+    by_degree = np.argsort(-np.diff(start_idx), kind="stable").astype(np.int32)
+    seeds = by_degree[:n_seeds].tolist()
+    candidates = by_degree[n_seeds:n_seeds + n_candidates].tolist()
+
+    variance = gain_variance(flat_adj, start_idx, seeds, candidates, MC, repeats, p, MC_ref)
+    quality = selection_quality(flat_adj, start_idx, k, MC_crn, MC_init, MC_final, p, MC_eval)
+
+    print(f"\nMarginal gains of {n_candidates} candidates after {n_seeds} seeds, MC = {MC}, {repeats} repeats:")
+    print(f"{'oracle':12s} {'mean sd':>8s} {'negative':>9s} {'best = ref':>11s}")
+    for name, (sd, negative, hits) in variance.items():
+        print(f"{name:12s} {sd:8.3f} {negative:9.1%} {hits:11.0%}")
+    print(f"variance ratio: {(variance['independent'][0] / variance['crn'][0]) ** 2:.0f}x")
+
+    print(f"\nCELF-K, k = {k}: Monte Carlo MC = {MC_init}/{MC_final} vs CRN MC = {MC_crn}")
+    for name, (elapsed, chosen, spread) in quality.items():
+        print(f"{name:12s}: {elapsed:7.2f}s  seeds = {chosen.tolist()}  spread ({MC_eval} MC) = {spread:.2f}")
+
+
+if __name__ == "__main__":
+    np.random.seed(2)
+    seed_kernels(2)
+    path = "2007-cost-effective-outbreak-detection-in-networks/Data/facebook_combined.txt"
+    bench(path)
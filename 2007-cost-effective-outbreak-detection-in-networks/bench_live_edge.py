@@ -0,0 +1,42 @@
+import numpy as np
+import time
+
+from graph_loader import load_csr
+from ic_kernels import estimate_spread_parallel, new_block_scratch, seed_kernels
+from live_edge import LiveEdgeOracle
+from spread_oracle import MonteCarloOracle
+from CELF_SET_K import CELF_K
+
+
+# CELF-K with the Monte Carlo oracle vs the live-edge snapshot oracle. Both
+# seed sets are scored afterwards by the same high-MC estimator (fixed master
+# seed) so the spreads are directly comparable.
+def bench(path, k=5, MC_init=100, MC_final=1000, R=200, p=0.01, MC_eval=10000):
+    flat_adj, start_idx = load_csr(path)
+    blocks = new_block_scratch(len(start_idx) - 1)
+
+    results = {}
+    for name in ("monte_carlo", "live_edge"):
+        start_time = time.time()
+        if name == "monte_carlo":
+            oracle = MonteCarloOracle(flat_adj, start_idx, MC_init, MC_final, p)
+        else:
+            oracle = LiveEdgeOracle(flat_adj, start_idx, p, R)
+        chosen, _ = CELF_K(flat_adj, start_idx, k, p=p, spread_oracle=oracle)
+        elapsed = time.time() - start_time
+        seeds = np.array(sorted(chosen), dtype=np.int32)
+        spread = estimate_spread_parallel(flat_adj, start_idx, seeds, MC_eval, p, 12345, *blocks)
+        results[name] = (elapsed, seeds, spread)
+
+    print()
+    for name, (elapsed, seeds, spread) in results.items():
+        print(f"{name:12s}: {elapsed:7.2f}s  seeds = {seeds.tolist()}  spread ({MC_eval} MC) = {spread:.2f}")
+    speedup = results["monte_carlo"][0] / results["live_edge"][0]
+    print(f"live-edge speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    np.random.seed(2)
+    seed_kernels(2)
+    path = "2007-cost-effective-outbreak-detection-in-networks/Data/facebook_combined.txt"
+    bench(path, k=5, MC_init=100, MC_final=1000, R=200, p=0.01)
@@ -0,0 +1,48 @@
+import numpy as np
+import numba
+import time
+
+from graph_loader import load_csr
+from ic_kernels import new_block_scratch, new_scratch, estimate_spread_sparse, estimate_spread_parallel
+
+
+# Serial estimate_spread_sparse vs the parallel estimator for 1..max threads.
+# Also checks that the parallel result does not change with the thread count.
+def bench(path, seeds, MC=10000, p=0.1, master_seed=2, repeats=3):
+    flat_adj, start_idx = load_csr(path)
+    seeds = np.asarray(seeds, dtype=np.int32)
+    scratch = new_scratch(len(start_idx) - 1)
+
+    # compile both kernels before timing
+    estimate_spread_sparse(flat_adj, start_idx, seeds, 1, p, *scratch)
+    estimate_spread_parallel(flat_adj, start_idx, seeds, 1, p, master_seed, *new_block_scratch(len(start_idx) - 1))
+
+    start_time = time.time()
+    for _ in range(repeats):
+        serial = estimate_spread_sparse(flat_adj, start_idx, seeds, MC, p, *scratch)
+    serial_time = (time.time() - start_time) / repeats
+    print(f"serial   : {serial_time:.3f}s  spread = {serial:.2f}")
+
+    max_threads = numba.config.NUMBA_NUM_THREADS
+    thread_counts = sorted({2**i for i in range(max_threads.bit_length())} | {max_threads})
+    reference = None
+    for threads in thread_counts:
+        numba.set_num_threads(threads)
+        blocks = new_block_scratch(len(start_idx) - 1)
+        start_time = time.time()
+        for _ in range(repeats):
+            spread = estimate_spread_parallel(flat_adj, start_idx, seeds, MC, p, master_seed, *blocks)
+        elapsed = (time.time() - start_time) / repeats
+        if reference is None:
+            reference = spread
+        status = "ok" if spread == reference else "MISMATCH"
+        print(
+            f"{threads:3d} thr  : {elapsed:.3f}s  spread = {spread:.2f}  "
+            f"speedup vs serial = {serial_time / elapsed:5.2f}x  [{status}]"
+        )
+    numba.set_num_threads(max_threads)
+
+
+if __name__ == "__main__":
+    path = "2007-cost-effective-outbreak-detection-in-networks/Data/facebook_combined.txt"
+    bench(path, seeds=[0, 107, 1684, 1912, 3437], MC=10000, p=0.1)
@@ -0,0 +1,365 @@
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import networkx as nx
+import numba
+import numpy as np
+
+from graph_loader import load_csr, peak_rss_bytes
+from ic_kernels import estimate_spread_parallel, new_block_scratch, seed_kernels
+from spread_oracle import MonteCarloOracle
+from CELF_SET_K import CELF_K
+from CELF_COST import CELF_C
+from Naive_Algo import greedy_naive
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, "..", "2003-maximizing-the-spread-of-influence-through-a-social-network"))
+sys.path.append(os.path.join(HERE, "..", "2010-Identification-of-infuentail-spreaders-in-complex-networks"))
+import graph_core
+import independent_cascade
+import linear_threshold
+from lazy_greedy import celf_select
+from page_rank import top_pagerank_nodes
+from kcore_analysis import core_numbers_kernel, load_csr as load_dedup_csr, rank_nodes
+
+# End to end benchmark of every seed selector in the repo. Each
+# (graph, algorithm) case runs in a fresh process, so the JIT compile time
+# and the peak RSS are those of that case alone:
+#   load          reading the edge list into the selector's own graph format
+#   compile       the same selector on a 200 node graph first, which is
+#                 almost all numba compilation
+#   initial_gains the n singleton estimates (CELF variants, greedy_select)
+#   selection     the rest of the selection
+# plus the oracle calls and cascades behind them, and the spread of the
+# chosen seeds. Every seed set is scored by the same IC estimator (p,
+# MC_eval worlds from a fixed master seed), so the spreads compare across
+# selectors and runs.
+#
+#   python bench_suite.py run --out new.json
+#   python bench_suite.py compare old.json new.json
+
+GRAPHS = {
+    "facebook": os.path.join(HERE, "Data", "facebook_combined.txt"),
+    "email-Eu-core": os.path.join(
+        HERE, "..", "2010-Identification-of-infuentail-spreaders-in-complex-networks", "data", "email-Eu-core.txt"
+    ),
+}
+ALGORITHMS = (
+    "greedy_naive", "CELF_K", "CELF_C", "greedy_select_ic", "greedy_select_lt", "pagerank", "kcore",
+)
+DEFAULT_GRAPHS = ("facebook", "email-Eu-core", "ba-1000", "ba-10000", "ba-100000")
+WARMUP_GRAPH = "ba-200"
+
+# metric, better when ("higher" / "lower")
+CHECKS = (
+    ("time.initial_gains", "lower"),
+    ("time.selection", "lower"),
+    ("time.total", "lower"),
+    ("cascades_per_sec", "higher"),
+    ("peak_rss_mb", "lower"),
+    ("spread", "higher"),
+)
+
+
+# "ba-<n>" is a Barabasi-Albert graph with n nodes and 3 edges per new node,
+# written once as an edge list so it goes through the same loaders as the
+# bundled files.
+def graph_path(name, graph_dir):
+    if name in GRAPHS:
+        return GRAPHS[name]
+    n = int(name.split("-")[1])
+    path = os.path.join(graph_dir, f"{name}.txt")
+    if not os.path.exists(path):
+        os.makedirs(graph_dir, exist_ok=True)
+        edges = np.array(nx.barabasi_albert_graph(n, 3, seed=n).edges(), dtype=np.int64)
+        np.savetxt(path + ".tmp", edges, fmt="%d")
+        os.replace(path + ".tmp", path)
+    return path
+
+
+# Spread oracle in front of another one, counting the calls and the IC
+# cascades behind them (MC_init per gain, MC_final per add) and timing the
+# initial gains pass.
+class CountingOracle:
+    def __init__(self, oracle, n):
+        self.oracle = oracle
+        self.n = n
+        self.common_random_numbers = getattr(oracle, "common_random_numbers", False)
+        self.calls = 0
+        self.cascades = 0
+        self.initial_time = 0.0
+
+    def initial_gains(self, progress=None):
+        start_time = time.perf_counter()
+        gains = self.oracle.initial_gains(progress)
+        self.initial_time = time.perf_counter() - start_time
+        self.cascades += self.n * self.oracle.MC_init
+        return gains
+
+    def marginal_gain(self, v, threshold=None):
+        self.calls += 1
+        self.cascades += self.oracle.MC_init
+        return self.oracle.marginal_gain(v, threshold)
+
+    def marginal_gain_pair(self, v, best):
+        self.calls += 1
+        self.cascades += self.oracle.MC_init
+        return self.oracle.marginal_gain_pair(v, best)
+
+    def add(self, v):
+        self.cascades += self.oracle.MC_final
+        return self.oracle.add(v)
+
+
+# The same for a 2003 spread function. celf_select starts with one estimate
+# per node, so the initial gains pass ends with the n-th call.
+class CountingSpread:
+    def __init__(self, spread, n):
+        self.spread = spread
+        self.n = n
+        self.calls = 0
+        self.cascades = 0
+        self.start_time = time.perf_counter()
+        self.initial_time = 0.0
+
+    def __call__(self, G, seeds, simulations):
+        value = self.spread(G, seeds, simulations)
+        self.calls += 1
+        self.cascades += simulations
+        if self.calls == self.n:
+            self.initial_time = time.perf_counter() - self.start_time
+        return value
+
+
+# Every selector returns (load time, counter or None, chosen node ids); the
+# ids are the ones in the edge list.
+def select(algorithm, path, cfg):
+    start_time = time.perf_counter()
+    if algorithm in ("greedy_naive", "CELF_K", "CELF_C"):
+        flat_adj, start_idx = load_csr(path, use_cache=False)
+        load_time = time.perf_counter() - start_time
+        n = len(start_idx) - 1
+        MC_final = cfg["MC_init"] if algorithm == "greedy_naive" else cfg["MC_final"]
+        counter = CountingOracle(
+            MonteCarloOracle(flat_adj, start_idx, cfg["MC_init"], MC_final, cfg["p"], cfg["parallel"]), n
+        )
+        if algorithm == "greedy_naive":
+            chosen, _ = greedy_naive(flat_adj, start_idx, cfg["k"], spread_oracle=counter)
+        elif algorithm == "CELF_K":
+            chosen, _ = CELF_K(flat_adj, start_idx, cfg["k"], spread_oracle=counter)
+        else:
+            chosen, _, _ = CELF_C(flat_adj, start_idx, cfg["budget"], spread_oracle=counter)
+        return load_time, counter, chosen
+
+    if algorithm in ("greedy_select_ic", "greedy_select_lt"):
+        # IC on edges of weight p, LT on 1 / in-degree weights
+        ic = algorithm == "greedy_select_ic"
+        G = graph_core.from_edge_list(path, weight=cfg["p"] if ic else None)
+        load_time = time.perf_counter() - start_time
+        model = independent_cascade if ic else linear_threshold
+        counter = CountingSpread(model.estimate_spread, G.n)
+        chosen = celf_select(G, cfg["k"], counter, cfg["MC_init"])
+        return load_time, counter, chosen
+
+    if algorithm == "pagerank":
+        G = graph_core.from_edge_list(path)
+        load_time = time.perf_counter() - start_time
+        return load_time, None, top_pagerank_nodes(G, cfg["k"])
+
+    if algorithm == "kcore":
+        indptr, indices, node_ids = load_dedup_csr(path)
+        load_time = time.perf_counter() - start_time
+        order = rank_nodes(core_numbers_kernel(indptr, indices), np.diff(indptr))
+        return load_time, None, set(node_ids[order[:cfg["k"]]].tolist())
+
+    raise ValueError(f"unknown algorithm {algorithm!r}")
+
+
+def run_case(graph, algorithm, cfg):
+    np.random.seed(cfg["seed"])
+    seed_kernels(cfg["seed"])
+    with open(os.devnull, "w") as null, contextlib.redirect_stdout(null), contextlib.redirect_stderr(null):
+        start_time = time.perf_counter()
+        warmup = dict(cfg, k=2, budget=2.0, MC_init=2, MC_final=2)
+        select(algorithm, graph_path(WARMUP_GRAPH, cfg["graph_dir"]), warmup)
+        compile_time = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        load_time, counter, chosen = select(algorithm, graph_path(graph, cfg["graph_dir"]), cfg)
+        total = time.perf_counter() - start_time
+    peak_rss = peak_rss_bytes()
+
+    initial_time = counter.initial_time if counter is not None else 0.0
+    selection_time = total - load_time - initial_time
+    cascades = counter.cascades if counter is not None else 0
+    search_time = initial_time + selection_time
+
+    flat_adj, start_idx = load_csr(graph_path(graph, cfg["graph_dir"]), use_cache=False)
+    seeds = np.array(sorted(int(v) for v in chosen), dtype=np.int32)
+    spread = estimate_spread_parallel(
+        flat_adj, start_idx, seeds, cfg["MC_eval"], cfg["p"], cfg["eval_seed"], *new_block_scratch(len(start_idx) - 1)
+    )
+    return {
+        "graph": graph,
+        "algorithm": algorithm,
+        "nodes": len(start_idx) - 1,
+        "edges": len(flat_adj) // 2,
+        "time": {
+            "load": load_time,
+            "compile": compile_time,
+            "initial_gains": initial_time,
+            "selection": selection_time,
+            "total": total,
+        },
+        "oracle_calls": counter.calls if counter is not None else 0,
+        "cascades": cascades,
+        "cascades_per_sec": cascades / search_time if cascades and search_time > 0 else 0.0,
+        "peak_rss_mb": peak_rss / 2**20,
+        "spread": float(spread),
+        "seeds": seeds.tolist(),
+    }
+
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], cwd=HERE, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def run(graphs, algorithms, cfg, out, naive_max_nodes=2000):
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for graph in graphs:
+        path = graph_path(graph, cfg["graph_dir"])
+        for algorithm in algorithms:
+            if algorithm == "greedy_naive" and len(load_csr(path)[1]) - 1 > naive_max_nodes:
+                print(f"{graph:15s} {algorithm:17s} skipped (more than {naive_max_nodes} nodes)")
+                continue
+            with ctx.Pool(1) as pool:
+                record = pool.apply(run_case, (graph, algorithm, cfg))
+            results.append(record)
+            t = record["time"]
+            print(
+                f"{graph:15s} {algorithm:17s} load {t['load']:6.2f}s  compile {t['compile']:6.2f}s  "
+                f"init {t['initial_gains']:7.2f}s  select {t['selection']:7.2f}s  "
+                f"calls {record['oracle_calls']:7d}  {record['cascades_per_sec']:11.0f} casc/s  "
+                f"rss {record['peak_rss_mb']:7.1f}MB  spread {record['spread']:8.2f}"
+            )
+
+    report = {
+        "meta": {
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "numba": numba.__version__,
+            "threads": numba.config.NUMBA_NUM_THREADS,
+            "machine": platform.machine(),
+        },
+        "config": cfg,
+        "results": results,
+    }
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {out}")
+    return report
+
+
+def metric(record, key):
+    for part in key.split("."):
+        record = record[part]
+    return record
+
+
+# Cases of `new` whose metrics are more than `tolerance` (relative) worse
+# than in `old`. Times where both runs took under min_seconds are noise and
+# are not compared.
+def compare(old, new, tolerance=0.10, min_seconds=0.1):
+    if old["config"] != new["config"]:
+        print("Warning: the two runs used different settings")
+    baseline = {(r["graph"], r["algorithm"]): r for r in old["results"]}
+    regressions = []
+    for record in new["results"]:
+        case = (record["graph"], record["algorithm"])
+        if case not in baseline:
+            print(f"{case[0]:15s} {case[1]:17s} new case")
+            continue
+        for key, better in CHECKS:
+            before, after = metric(baseline[case], key), metric(record, key)
+            if key.startswith("time.") and max(before, after) < min_seconds:
+                continue
+            change = (after - before) / before if before else 0.0
+            worse = change > tolerance if better == "lower" else change < -tolerance
+            status = "REGRESSION" if worse else "ok"
+            print(f"{case[0]:15s} {case[1]:17s} {key:18s} {before:12.3f} -> {after:12.3f}  {change:+7.1%}  {status}")
+            if worse:
+                regressions.append((case, key, before, after))
+    for case in sorted(baseline.keys() - {(r["graph"], r["algorithm"]) for r in new["results"]}):
+        print(f"{case[0]:15s} {case[1]:17s} missing from the new run")
+    print(f"{len(regressions)} regression(s) beyond {tolerance:.0%}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Influence maximization benchmark suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmark and write the results as JSON")
+    run_parser.add_argument("--graphs", nargs="+", default=list(DEFAULT_GRAPHS),
+                            help=f"{', '.join(GRAPHS)} or ba-<n> for a synthetic graph")
+    run_parser.add_argument("--algorithms", nargs="+", default=list(ALGORITHMS), choices=ALGORITHMS)
+    run_parser.add_argument("--k", type=int, default=5)
+    run_parser.add_argument("--budget", type=float, default=10.0, help="CELF_C budget")
+    run_parser.add_argument("--MC-init", type=int, default=100)
+    run_parser.add_argument("--MC-final", type=int, default=1000)
+    run_parser.add_argument("--MC-eval", type=int, default=2000)
+    run_parser.add_argument("--p", type=float, default=0.01)
+    run_parser.add_argument("--serial", action="store_true", help="serial Monte Carlo in the 2007 oracles")
+    run_parser.add_argument("--seed", type=int, default=2)
+    run_parser.add_argument("--naive-max-nodes", type=int, default=2000,
+                            help="skip greedy_naive on bigger graphs")
+    run_parser.add_argument("--graph-dir", default=os.path.join(tempfile.gettempdir(), "im_bench_graphs"))
+    run_parser.add_argument("--out", default="bench_suite.json")
+
+    compare_parser = commands.add_parser("compare", help="flag regressions between two result files")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--tolerance", type=float, default=0.10)
+    compare_parser.add_argument("--min-seconds", type=float, default=0.1)
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        cfg = {
+            "k": args.k,
+            "budget": args.budget,
+            "MC_init": args.MC_init,
+            "MC_final": args.MC_final,
+            "MC_eval": args.MC_eval,
+            "p": args.p,
+            "parallel": not args.serial,
+            "seed": args.seed,
+            "eval_seed": 12345,
+            "graph_dir": args.graph_dir,
+        }
+        run(args.graphs, args.algorithms, cfg, args.out, args.naive_max_nodes)
+        return 0
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    return 1 if compare(old, new, args.tolerance, args.min_seconds) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import json
+import os
+
+import numpy as np
+
+from ic_kernels import seed_kernels
+
+# Checkpoints for long CELF runs, as .npz files in one directory per run:
+#   initial_gains.npz  the n singleton spreads, shared by CELF_K and CELF_C
+#                      and reused whatever k or budget the next run asks for
+#   <name>.npz         the latest selection state (heap as parallel arrays,
+#                      selected seeds with the spread after each, counters)
+# Every file also holds the RNG state, so a resumed run draws exactly what
+# the interrupted one would have drawn next. numba's RNG (used by the serial
+# Monte Carlo kernels) cannot be read back from Python, so saving reseeds it
+# from numpy's RNG and the seed is stored with the rest: a run gives the
+# same result whether it was interrupted or not, as long as it checkpoints
+# at the same points.
+#
+# Files are written to a temporary name and renamed, a crash mid-write
+# leaves the previous checkpoint in place.
+
+# Oracle attributes that change its answers; a checkpoint only loads into an
+# oracle that agrees on all of them.
+ORACLE_SETTINGS = ("p", "MC_init", "MC_final", "MC", "R", "master_seed")
+
+
+def oracle_key(oracle, n):
+    key = {"oracle": type(oracle).__name__, "n": int(n)}
+    for name in ORACLE_SETTINGS:
+        value = getattr(oracle, name, None)
+        if value is not None:
+            key[name] = value.item() if isinstance(value, np.generic) else value
+    return key
+
+
+def save_rng():
+    kernel_seed = int(np.random.randint(0, 2**31 - 1))
+    seed_kernels(kernel_seed)
+    _, keys, pos, has_gauss, gauss = np.random.get_state()
+    return {"rng_keys": keys, "rng_pos": pos, "rng_has_gauss": has_gauss, "rng_gauss": gauss,
+            "kernel_seed": kernel_seed}
+
+
+def restore_rng(data):
+    np.random.set_state(
+        ("MT19937", data["rng_keys"], int(data["rng_pos"]), int(data["rng_has_gauss"]), float(data["rng_gauss"]))
+    )
+    seed_kernels(int(data["kernel_seed"]))
+
+
+def save(directory, name, key, **arrays):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, name + ".npz")
+    tmp = os.path.join(directory, name + ".tmp.npz")
+    np.savez(tmp, key=json.dumps(key, sort_keys=True), **arrays, **save_rng())
+    os.replace(tmp, path)
+
+
+# The arrays of <directory>/<name>.npz with the RNG restored from it, or
+# None if there is no such checkpoint. A checkpoint written for another
+# graph or oracle raises instead of being silently ignored.
+def load(directory, name, key):
+    path = os.path.join(directory, name + ".npz")
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        saved = json.loads(str(data["key"]))
+        if saved != json.loads(json.dumps(key, sort_keys=True)):
+            raise ValueError(f"checkpoint {path} was written for {saved}, not {key}")
+        restore_rng(data)
+        return {field: data[field] for field in data.files}
+
+
+# Heap entries (tuples) as one array per tuple field and back; heapify is
+# not needed on the way back since the order is kept.
+def heap_arrays(heap, fields, dtypes):
+    columns = list(zip(*heap)) if heap else [()] * len(fields)
+    return {field: np.array(column, dtype=dtype) for field, column, dtype in zip(fields, columns, dtypes)}
+
+
+def heap_entries(state, fields):
+    return list(zip(*(state[field].tolist() for field in fields)))
+
+
+# oracle.initial_gains(progress) loaded from `directory` when an earlier run
+# with the same oracle saved it there, computed and saved otherwise.
+def initial_gains(oracle, n, directory=None, progress=None):
+    if directory is None:
+        return oracle.initial_gains(progress=progress)
+    key = oracle_key(oracle, n)
+    saved = load(directory, "initial_gains", key)
+    if saved is not None:
+        print(f"Initial gains loaded from {directory}")
+        return saved["gains"]
+    gains = oracle.initial_gains(progress=progress)
+    save(directory, "initial_gains", key, gains=gains)
+    return gains
@@ -0,0 +1,220 @@
+import numpy as np
+import hashlib
+import itertools
+import json
+import os
+import resource
+import sys
+import time
+import warnings
+
+# Bump this whenever the on-disk layout or the CSR construction changes,
+# old caches are then ignored and rebuilt.
+CACHE_VERSION = 1
+CACHE_DIR_NAME = ".csr_cache"
+
+
+# Build the undirected CSR arrays straight from an (m, 2) edge array.
+# Each edge (u, v) is emitted as u->v followed by v->u and a stable sort on
+# the source keeps neighbours in file order, so the result is identical to
+# build_adj_list + flatten_adj_list.
+def build_csr(edges, n=None):
+    edges = np.asarray(edges).reshape(-1, 2)
+    if n is None:
+        n = int(edges.max()) + 1 if len(edges) else 0
+
+    src = edges.ravel()
+    dst = edges[:, ::-1].ravel()
+    order = np.argsort(src, kind="stable")
+
+    total = len(src)
+    index_dtype = np.int32 if total <= np.iinfo(np.int32).max else np.int64
+    flat_adj = dst[order].astype(np.int32)
+    start_idx = np.zeros(n + 1, dtype=index_dtype)
+    np.cumsum(np.bincount(src, minlength=n), out=start_idx[1:])
+    return flat_adj, start_idx
+
+
+def cache_key(edge_list_path):
+    st = os.stat(edge_list_path)
+    ident = f"{os.path.abspath(edge_list_path)}|{st.st_size}|{st.st_mtime_ns}"
+    return hashlib.sha1(ident.encode()).hexdigest()[:16]
+
+
+def cache_path(edge_list_path, cache_dir=None, kind="csr"):
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(edge_list_path)), CACHE_DIR_NAME)
+    name = os.path.basename(edge_list_path)
+    return os.path.join(cache_dir, f"{name}-{kind}-v{CACHE_VERSION}-{cache_key(edge_list_path)}")
+
+
+def save_csr_cache(path, flat_adj, start_idx, **extra):
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, "flat_adj.npy"), flat_adj)
+    np.save(os.path.join(path, "start_idx.npy"), start_idx)
+    write_cache_meta(path, len(start_idx) - 1, len(flat_adj), **extra)
+
+
+# meta.json is written last, a cache directory without it is incomplete
+# (e.g. the process died mid-write) and is never read.
+def write_cache_meta(path, n, nnz, **extra):
+    meta = {"version": CACHE_VERSION, "n": int(n), "nnz": int(nnz)}
+    meta.update(extra)
+    tmp = os.path.join(path, "meta.json.tmp")
+    with open(tmp, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(path, "meta.json"))
+
+
+def read_cache_meta(path):
+    try:
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("version") != CACHE_VERSION:
+        return None
+    return meta
+
+
+def load_csr_cache(path, mmap_mode="r"):
+    if read_cache_meta(path) is None:
+        return None
+    flat_adj = np.load(os.path.join(path, "flat_adj.npy"), mmap_mode=mmap_mode)
+    start_idx = np.load(os.path.join(path, "start_idx.npy"), mmap_mode=mmap_mode)
+    return flat_adj, start_idx
+
+
+# Load an edge list as CSR arrays. The first run parses the text file and
+# writes a binary cache next to it, later runs just memory-map the cache.
+def load_csr(edge_list_path, use_cache=True, cache_dir=None, mmap_mode="r"):
+    if use_cache:
+        path = cache_path(edge_list_path, cache_dir)
+        cached = load_csr_cache(path, mmap_mode)
+        if cached is not None:
+            return cached
+
+    edges = np.loadtxt(edge_list_path, dtype=np.int32)
+    flat_adj, start_idx = build_csr(edges)
+
+    if use_cache:
+        save_csr_cache(path, flat_adj, start_idx, source=os.path.abspath(edge_list_path))
+        return load_csr_cache(path, mmap_mode)
+    return flat_adj, start_idx
+
+
+def peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# Yield the edge list as (<= chunk_edges, 2) int64 arrays. Handles SNAP style
+# files: '#' comments, tab or space separators and extra columns.
+def read_edge_chunks(edge_list_path, chunk_edges=5_000_000):
+    with open(edge_list_path) as f:
+        while True:
+            lines = list(itertools.islice(f, chunk_edges))
+            if not lines:
+                return
+            with warnings.catch_warnings():
+                # a chunk made only of comment lines is fine, just skip it
+                warnings.simplefilter("ignore", UserWarning)
+                chunk = np.loadtxt(lines, dtype=np.int64, comments="#", usecols=(0, 1), ndmin=2)
+            if len(chunk):
+                yield chunk
+
+
+# Merge (ids, counts) pairs into one sorted id array with summed counts.
+def merge_id_counts(parts):
+    ids = np.concatenate([p[0] for p in parts])
+    counts = np.concatenate([p[1] for p in parts])
+    ids, inverse = np.unique(ids, return_inverse=True)
+    return ids, np.bincount(inverse, weights=counts, minlength=len(ids)).astype(np.int64)
+
+
+# Pass 1: collect the distinct external ids and their degrees. Chunk results
+# are buffered and only merged once the buffer outgrows the merged table, so
+# the total merge work stays O(n log n) per doubling instead of per chunk.
+def count_degrees(edge_list_path, chunk_edges):
+    ids = np.empty(0, dtype=np.int64)
+    deg = np.empty(0, dtype=np.int64)
+    pending = []
+    pending_size = 0
+    m = 0
+    for chunk in read_edge_chunks(edge_list_path, chunk_edges):
+        m += len(chunk)
+        pending.append(np.unique(chunk.ravel(), return_counts=True))
+        pending_size += len(pending[-1][0])
+        if pending_size > max(len(ids), chunk_edges):
+            ids, deg = merge_id_counts([(ids, deg)] + pending)
+            pending = []
+            pending_size = 0
+    if pending:
+        ids, deg = merge_id_counts([(ids, deg)] + pending)
+    return ids, deg, m
+
+
+# Pass 2: map every chunk to dense ids and scatter it into its final CSR slots.
+# Within a chunk entries are stably sorted by source, so each node keeps its
+# neighbours in file order.
+def fill_csr(edge_list_path, chunk_edges, node_ids, start_idx, flat_adj):
+    cursor = start_idx[:-1].astype(np.int64)
+    for chunk in read_edge_chunks(edge_list_path, chunk_edges):
+        src = np.searchsorted(node_ids, chunk.ravel())
+        dst = np.searchsorted(node_ids, chunk[:, ::-1].ravel()).astype(np.int32)
+        order = np.argsort(src, kind="stable")
+        src = src[order]
+        uniq, first, counts = np.unique(src, return_index=True, return_counts=True)
+        within = np.arange(len(src)) - np.repeat(first, counts)
+        flat_adj[cursor[src] + within] = dst[order]
+        cursor[uniq] += counts
+
+
+# Two pass, bounded memory ingest for edge lists that don't fit in RAM.
+# External ids (any sparse 64-bit ids) are remapped to a dense int32 range,
+# the id map is stored as node_ids.npy (dense id -> external id), and
+# flat_adj is written straight into a memory-mapped .npy file, so peak memory
+# is O(n + chunk_edges) rather than O(m).
+def stream_csr(edge_list_path, chunk_edges=5_000_000, cache_dir=None, verbose=True):
+    path = cache_path(edge_list_path, cache_dir, kind="stream")
+    cached = load_csr_cache(path)
+    if cached is not None:
+        return cached + (np.load(os.path.join(path, "node_ids.npy"), mmap_mode="r"),)
+
+    start_time = time.time()
+    node_ids, deg, m = count_degrees(edge_list_path, chunk_edges)
+    n = len(node_ids)
+    if n > np.iinfo(np.int32).max:
+        raise ValueError(f"{n} distinct nodes do not fit in int32 ids")
+
+    nnz = int(deg.sum())
+    index_dtype = np.int32 if nnz <= np.iinfo(np.int32).max else np.int64
+    start_idx = np.zeros(n + 1, dtype=index_dtype)
+    np.cumsum(deg, out=start_idx[1:])
+    del deg
+
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, "node_ids.npy"), node_ids)
+    np.save(os.path.join(path, "start_idx.npy"), start_idx)
+    flat_adj = np.lib.format.open_memmap(
+        os.path.join(path, "flat_adj.npy"), mode="w+", dtype=np.int32, shape=(nnz,)
+    )
+    fill_csr(edge_list_path, chunk_edges, node_ids, start_idx, flat_adj)
+    flat_adj.flush()
+    del flat_adj
+
+    elapsed = time.time() - start_time
+    stats = {
+        "edges": m,
+        "seconds": elapsed,
+        "edges_per_second": m / elapsed if elapsed > 0 else 0.0,
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+    write_cache_meta(path, n, nnz, source=os.path.abspath(edge_list_path), ingest=stats)
+    if verbose:
+        print(
+            f"Ingested {m} edges / {n} nodes in {elapsed:.2f} seconds "
+            f"({stats['edges_per_second']:,.0f} edges/s, peak RSS {stats['peak_rss_bytes'] / 2**30:.2f} GiB)"
+        )
+    return load_csr_cache(path) + (np.load(os.path.join(path, "node_ids.npy"), mmap_mode="r"),)
@@ -0,0 +1,416 @@
+import numpy as np
+from numba import njit, prange, get_num_threads
+
+from instrument import CASCADES, EDGES_EXAMINED, ENABLED, KERNEL_COUNTERS, NODES_ACTIVATED, RNG_DRAWS
+
+# Counter based RNG (splitmix64). Every Monte Carlo simulation gets its own
+# stream derived from (master_seed, simulation index), so a result only
+# depends on the master seed and never on how simulations land on threads.
+GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+
+
+@njit(inline="always")
+def mix64(z):
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+@njit(inline="always")
+def stream_state(master_seed, stream):
+    return mix64(np.uint64(master_seed) ^ mix64(np.uint64(stream) * GOLDEN_GAMMA + GOLDEN_GAMMA))
+
+
+# Returns (new_state, uniform in [0, 1))
+@njit(inline="always")
+def next_uniform(state):
+    state = state + GOLDEN_GAMMA
+    return state, (mix64(state) >> np.uint64(11)) * (1.0 / 9007199254740992.0)
+
+
+# 64 Bernoulli(p) coins at once, one per bit of `lanes` (bits outside lanes
+# stay 0). Compares 64 uniforms with p bit by bit, most significant first:
+# a lane is decided at the first bit where its random bit differs from p's,
+# so the loop usually stops after log2(popcount(lanes)) + 2 words instead of
+# drawing one uniform per lane. Returns (new_state, mask of successes).
+@njit(inline="always")
+def bernoulli_mask(state, p, lanes):
+    result = np.uint64(0)
+    if p >= 1.0:
+        return state, lanes
+    undecided = lanes
+    while undecided and p > 0.0:
+        state = state + GOLDEN_GAMMA
+        r = mix64(state)
+        p *= 2.0
+        if p >= 1.0:
+            p -= 1.0
+            result |= undecided & ~r
+            undecided &= r
+        else:
+            undecided &= ~r
+    return state, result
+
+
+# Instrumentation: the cascade kernels below take `tally`, this thread's row
+# of the instrument.py counters. Every update is under `if ENABLED:`, a
+# compile time constant, so with instrumentation off none of it is compiled.
+# The drivers take counters=None (one row per prange block) and use a
+# throwaway row when it is not given.
+@njit(inline="always")
+def tally_row(counters, b):
+    if counters is None:
+        return np.zeros(len(KERNEL_COUNTERS), dtype=np.int64)
+    return counters[b]
+
+
+# Reusable cascade buffers: visited[v] == epoch[0] marks v as active in the
+# current cascade. Starting a cascade just bumps the epoch, so nothing is
+# cleared or allocated per simulation.
+def new_scratch(n):
+    return np.zeros(n, dtype=np.uint32), np.empty(n, dtype=np.int32), np.zeros(1, dtype=np.uint32)
+
+
+# The same buffers for the parallel kernels, row b for prange block b:
+# (visited, queue, epochs) of shape (n_blocks, n), (n_blocks, n), (n_blocks,).
+# Allocated once per run by the oracle that owns them, a kernel call then
+# neither allocates nor clears anything. A kernel runs min(n_blocks, work)
+# blocks, so n_blocks defaults to one per thread.
+def new_block_scratch(n, n_blocks=None):
+    if n_blocks is None:
+        n_blocks = get_num_threads()
+    return (
+        np.zeros((n_blocks, n), dtype=np.uint32),
+        np.empty((n_blocks, n), dtype=np.int32),
+        np.zeros(n_blocks, dtype=np.uint32),
+    )
+
+
+@njit(inline="always")
+def next_epoch(visited, epoch):
+    epoch[0] += np.uint32(1)
+    if epoch[0] == 0:
+        # wrapped after 2**32 - 1 cascades, old stamps could collide
+        visited[:] = 0
+        epoch[0] = 1
+    return epoch[0]
+
+
+# IC cascade on caller owned buffers with the counter based RNG (`state`):
+# visited[v] == stamp marks v active, as in run_IC_sparse, so a thread can
+# reuse the same buffers for every simulation without clearing them.
+@njit
+def run_IC_scratch(flat_adj, start_idx, seeds, p, state, visited, stamp, queue, tally):
+    q_len = 0
+    for s in seeds:
+        if visited[s] != stamp:
+            visited[s] = stamp
+            queue[q_len] = s
+            q_len += 1
+
+    idx = 0
+    while idx < q_len:
+        u = queue[idx]
+        idx += 1
+        if ENABLED:
+            tally[EDGES_EXAMINED] += start_idx[u + 1] - start_idx[u]
+        for i in range(start_idx[u], start_idx[u + 1]):
+            v = flat_adj[i]
+            if visited[v] != stamp:
+                state, r = next_uniform(state)
+                if ENABLED:
+                    tally[RNG_DRAWS] += 1
+                if r <= p:
+                    visited[v] = stamp
+                    queue[q_len] = v
+                    q_len += 1
+
+    if ENABLED:
+        tally[CASCADES] += 1
+        tally[NODES_ACTIVATED] += q_len
+    return q_len
+
+
+# IC cascade in O(nodes touched + edges touched), returns the spread (q_len)
+@njit
+def run_IC_sparse(flat_adj, start_idx, seeds, p, visited, queue, epoch, tally):
+    stamp = next_epoch(visited, epoch)
+    q_len = 0
+    for s in seeds:
+        if visited[s] != stamp:
+            visited[s] = stamp
+            queue[q_len] = s
+            q_len += 1
+
+    idx = 0
+    while idx < q_len:
+        u = queue[idx]
+        idx += 1
+        if ENABLED:
+            tally[EDGES_EXAMINED] += start_idx[u + 1] - start_idx[u]
+        for i in range(start_idx[u], start_idx[u + 1]):
+            v = flat_adj[i]
+            if visited[v] != stamp:
+                if ENABLED:
+                    tally[RNG_DRAWS] += 1
+                if np.random.random() <= p:
+                    visited[v] = stamp
+                    queue[q_len] = v
+                    q_len += 1
+    if ENABLED:
+        tally[CASCADES] += 1
+        tally[NODES_ACTIVATED] += q_len
+    return q_len
+
+
+@njit
+def estimate_spread_sparse(flat_adj, start_idx, seeds, MC, p, visited, queue, epoch, counters=None):
+    tally = tally_row(counters, 0)
+    total = 0
+    for _ in range(MC):
+        total += run_IC_sparse(flat_adj, start_idx, seeds, p, visited, queue, epoch, tally)
+    return total / MC
+
+
+# np.random.seed from Python does not reach numba's RNG, it has to be called
+# from compiled code.
+@njit
+def seed_kernels(seed):
+    np.random.seed(seed)
+
+
+# Same estimate as estimate_spread_sparse, but the MC simulations are split
+# into one block per row of the new_block_scratch buffers. Simulation `sim`
+# always draws from stream `sim`, so the result is reproducible from
+# master_seed for any number of threads or blocks.
+@njit(parallel=True)
+def estimate_spread_parallel(flat_adj, start_idx, seeds, MC, p, master_seed, visited, queue, epochs,
+                             counters=None):
+    n_blocks = max(1, min(visited.shape[0], MC))
+    totals = np.zeros(n_blocks, dtype=np.int64)
+    for b in prange(n_blocks):
+        tally = tally_row(counters, b)
+        for sim in range(b, MC, n_blocks):
+            state = stream_state(master_seed, sim)
+            stamp = next_epoch(visited[b], epochs[b:b + 1])
+            totals[b] += run_IC_scratch(flat_adj, start_idx, seeds, p, state, visited[b], stamp, queue[b], tally)
+    return totals.sum() / MC
+
+
+# Sizes of simulations first..first+count-1 one by one (simulation `sim`
+# draws from stream `sim`), for estimators that need the spread's variance
+# and not just its mean. Calling it again with the next `first` continues
+# the same sequence, so batches add up to one long run. Small batches are
+# the point here, so the buffers are the caller's new_block_scratch set and a
+# call costs only the cascades it runs.
+@njit(parallel=True)
+def spread_samples_parallel(flat_adj, start_idx, seeds, first, count, p, master_seed, visited, queue, epochs,
+                            counters=None):
+    sizes = np.empty(count, dtype=np.float64)
+    n_blocks = max(1, min(visited.shape[0], count))
+    for b in prange(n_blocks):
+        tally = tally_row(counters, b)
+        for j in range(b, count, n_blocks):
+            state = stream_state(master_seed, first + j)
+            stamp = next_epoch(visited[b], epochs[b:b + 1])
+            sizes[j] = run_IC_scratch(flat_adj, start_idx, seeds, p, state, visited[b], stamp, queue[b], tally)
+    return sizes
+
+
+@njit(parallel=True)
+def singleton_spreads_kernel(flat_adj, start_idx, lo, hi, MC, p, master_seed, out, visited, queue, epochs,
+                             counters=None):
+    n_blocks = max(1, min(visited.shape[0], hi - lo))
+    for b in prange(n_blocks):
+        seed = np.empty(1, dtype=np.int32)
+        tally = tally_row(counters, b)
+        for v in range(lo + b, hi, n_blocks):
+            seed[0] = v
+            total = 0
+            for sim in range(MC):
+                state = stream_state(master_seed, np.uint64(v) * np.uint64(MC) + np.uint64(sim))
+                stamp = next_epoch(visited[b], epochs[b:b + 1])
+                total += run_IC_scratch(flat_adj, start_idx, seed, p, state, visited[b], stamp, queue[b], tally)
+            out[v] = total / MC
+
+
+# Spread of every single node {v} as one float64 array, computed in parallel
+# compiled code instead of n separate estimate_spread calls. Without a
+# progress callback it is a single kernel call, with one the nodes are done
+# in chunks and progress(done, n) is called after each chunk. `kernel` picks
+# the worlds: fresh ones per node, or crn_singletons_kernel's shared ones.
+# Every chunk runs on the same new_block_scratch buffers, the caller's
+# (`scratch`) or a set allocated here once.
+def singleton_spreads(flat_adj, start_idx, MC, p, master_seed, progress=None, chunk=65536,
+                      kernel=singleton_spreads_kernel, counters=None, scratch=None):
+    n = len(start_idx) - 1
+    if scratch is None:
+        scratch = new_block_scratch(n)
+    gains = np.empty(n, dtype=np.float64)
+    if progress is None:
+        kernel(flat_adj, start_idx, 0, n, MC, p, master_seed, gains, *scratch, counters)
+        return gains
+    for lo in range(0, n, chunk):
+        hi = min(lo + chunk, n)
+        kernel(flat_adj, start_idx, lo, hi, MC, p, master_seed, gains, *scratch, counters)
+        progress(hi, n)
+    return gains
+
+
+# Fresh master seed for the next parallel estimate, drawn from numpy's global
+# RNG so np.random.seed(...) in a script's main makes whole runs reproducible.
+def next_master_seed():
+    return np.random.randint(0, 2**63 - 1, dtype=np.int64)
+
+
+# Common random numbers: the coin of flat_adj entry i in world `world` is a
+# hash of (world, i), so any number of cascades in the same world see the
+# same live edges without storing them.
+@njit(inline="always")
+def edge_live(world, i, p):
+    return (mix64(world ^ (np.uint64(i) * GOLDEN_GAMMA + GOLDEN_GAMMA)) >> np.uint64(11)) * (
+        1.0 / 9007199254740992.0
+    ) <= p
+
+
+# Grows the cascade in queue[0:q_len] (nodes stamped in visited) by the nodes
+# reachable from `sources` in `world`, returns the new q_len. Edges out of
+# already active nodes were decided earlier in the same world, so extending
+# a cascade from S with {v} gives exactly the cascade of S + {v}.
+@njit
+def extend_IC_world(flat_adj, start_idx, sources, p, world, visited, stamp, queue, q_len, tally):
+    start = idx = q_len
+    for s in sources:
+        if visited[s] != stamp:
+            visited[s] = stamp
+            queue[q_len] = s
+            q_len += 1
+
+    while idx < q_len:
+        u = queue[idx]
+        idx += 1
+        if ENABLED:
+            tally[EDGES_EXAMINED] += start_idx[u + 1] - start_idx[u]
+        for i in range(start_idx[u], start_idx[u + 1]):
+            v = flat_adj[i]
+            if visited[v] != stamp:
+                if ENABLED:
+                    tally[RNG_DRAWS] += 1
+                if edge_live(world, i, p):
+                    visited[v] = stamp
+                    queue[q_len] = v
+                    q_len += 1
+    if ENABLED:
+        tally[CASCADES] += 1
+        tally[NODES_ACTIVATED] += q_len - start
+    return q_len
+
+
+# CELF++ look-ahead in one MC pass. In every world it measures
+#   mg1 = |R(S + v)| - |R(S)|                  gain of v now
+#   mg2 = |R(S + best + v)| - |R(S + best)|     gain of v once best is picked
+# on the same live edges, so both are low variance differences. best < 0
+# skips mg2. The worlds are fresh on every call, so with independent Monte
+# Carlo elsewhere the saved mg2 is as noisy as any estimate (see CELF_K).
+@njit(parallel=True)
+def gain_pair_parallel(flat_adj, start_idx, seeds, v, best, MC, p, master_seed, visited, queue, epochs,
+                       counters=None):
+    n_blocks = max(1, min(visited.shape[0], MC))
+    mg1 = np.zeros(n_blocks, dtype=np.int64)
+    mg2 = np.zeros(n_blocks, dtype=np.int64)
+    for b in prange(n_blocks):
+        seen = visited[b]
+        order = queue[b]
+        epoch = epochs[b:b + 1]
+        one = np.empty(1, dtype=np.int32)
+        tally = tally_row(counters, b)
+        for sim in range(b, MC, n_blocks):
+            world = stream_state(master_seed, sim)
+            stamp = next_epoch(seen, epoch)
+            base = extend_IC_world(flat_adj, start_idx, seeds, p, world, seen, stamp, order, 0, tally)
+            one[0] = v
+            mg1[b] += extend_IC_world(flat_adj, start_idx, one, p, world, seen, stamp, order, base, tally) - base
+            if best >= 0:
+                stamp = next_epoch(seen, epoch)
+                q_len = extend_IC_world(flat_adj, start_idx, seeds, p, world, seen, stamp, order, 0, tally)
+                one[0] = best
+                base = extend_IC_world(flat_adj, start_idx, one, p, world, seen, stamp, order, q_len, tally)
+                one[0] = v
+                mg2[b] += extend_IC_world(flat_adj, start_idx, one, p, world, seen, stamp, order, base, tally) - base
+    return mg1.sum() / MC, mg2.sum() / MC
+
+
+# extend_IC_world for a cascade kept as a per-world bitset (covered) instead
+# of a stamped queue: the BFS from v stops at covered nodes, whose region is
+# covered already, so it only walks the activations v adds. Returns their
+# number and marks them covered when commit is set.
+@njit
+def extend_uncovered(flat_adj, start_idx, v, p, world, covered, visited, stamp, queue, commit, tally):
+    if ENABLED:
+        tally[CASCADES] += 1
+    if (covered[v >> 6] >> np.uint64(v & 63)) & np.uint64(1):
+        return 0
+    visited[v] = stamp
+    queue[0] = v
+    q_len = 1
+    idx = 0
+    while idx < q_len:
+        u = queue[idx]
+        idx += 1
+        if ENABLED:
+            tally[EDGES_EXAMINED] += start_idx[u + 1] - start_idx[u]
+        for i in range(start_idx[u], start_idx[u + 1]):
+            w = flat_adj[i]
+            if visited[w] != stamp and not (covered[w >> 6] >> np.uint64(w & 63)) & np.uint64(1):
+                if ENABLED:
+                    tally[RNG_DRAWS] += 1
+                if edge_live(world, i, p):
+                    visited[w] = stamp
+                    queue[q_len] = w
+                    q_len += 1
+    if ENABLED:
+        tally[NODES_ACTIVATED] += q_len
+    if commit:
+        for j in range(q_len):
+            w = queue[j]
+            covered[w >> 6] |= np.uint64(1) << np.uint64(w & 63)
+    return q_len
+
+
+# Gain of v averaged over the worlds of covered (row sim is R(S) in world
+# stream_state(master_seed, sim)), one block of worlds per thread with the
+# block's own visited / queue / epoch.
+@njit(parallel=True)
+def crn_gain_parallel(flat_adj, start_idx, covered, v, commit, p, master_seed, visited, queue, epochs,
+                      counters=None):
+    MC = covered.shape[0]
+    counts = np.zeros(MC, dtype=np.int64)
+    n_blocks = visited.shape[0]
+    for b in prange(n_blocks):
+        tally = tally_row(counters, b)
+        for sim in range(b, MC, n_blocks):
+            world = stream_state(master_seed, sim)
+            stamp = next_epoch(visited[b], epochs[b:b + 1])
+            counts[sim] = extend_uncovered(
+                flat_adj, start_idx, v, p, world, covered[sim], visited[b], stamp, queue[b], commit, tally
+            )
+    return counts.sum() / MC
+
+
+# singleton_spreads_kernel on the MC shared worlds of crn_gain_parallel, so
+# initial gains and later marginal gains see the same coins.
+@njit(parallel=True)
+def crn_singletons_kernel(flat_adj, start_idx, lo, hi, MC, p, master_seed, out, visited, queue, epochs,
+                          counters=None):
+    n_blocks = max(1, min(visited.shape[0], hi - lo))
+    for b in prange(n_blocks):
+        one = np.empty(1, dtype=np.int32)
+        tally = tally_row(counters, b)
+        for v in range(lo + b, hi, n_blocks):
+            one[0] = v
+            total = 0
+            for sim in range(MC):
+                world = stream_state(master_seed, sim)
+                stamp = next_epoch(visited[b], epochs[b:b + 1])
+                total += extend_IC_world(flat_adj, start_idx, one, p, world, visited[b], stamp, queue[b], 0, tally)
+            out[v] = total / MC
@@ -0,0 +1,145 @@
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+from numba import config
+from numba.core import event
+
+# Counters and phase timers for the spread kernels, oracles and selectors.
+# Off unless IM_INSTRUMENT=1 is set before the kernels are imported: numba
+# freezes ENABLED into the compiled code as a constant, so with it off every
+# `if ENABLED:` block in a kernel is removed at compile time and the Python
+# helpers below return straight away.
+#
+#   IM_INSTRUMENT=1 python CELF_SET_K.py
+#
+# Compiled kernels count into a (threads, len(KERNEL_COUNTERS)) int64
+# array, one row per prange block, which counted() sums into the totals
+# after the call. Python code counts with count() and times with phase().
+ENABLED = os.environ.get("IM_INSTRUMENT", "0") not in ("", "0")
+
+KERNEL_COUNTERS = ("cascades", "nodes_activated", "edges_examined", "rng_draws")
+CASCADES, NODES_ACTIVATED, EDGES_EXAMINED, RNG_DRAWS = range(len(KERNEL_COUNTERS))
+
+totals = {}
+timers = {}
+
+
+def reset():
+    totals.clear()
+    timers.clear()
+    for name in KERNEL_COUNTERS:
+        totals[name] = 0
+
+
+def count(name, amount=1):
+    if ENABLED:
+        totals[name] = totals.get(name, 0) + amount
+
+
+def add_time(name, seconds):
+    calls, total = timers.get(name, (0, 0.0))
+    timers[name] = (calls + 1, total + seconds)
+
+
+@contextmanager
+def timed(name):
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_time(name, time.perf_counter() - start_time)
+
+
+# with phase("initial_gains"): ...  -- wall time per named phase
+def phase(name):
+    return timed(name) if ENABLED else nullcontext()
+
+
+# func(*args, **kwargs, counters=...) with the per-thread counters summed
+# into the totals afterwards; the time spent in kernels (numba compilation
+# of a first call included) is the "kernels" timer. Disabled, it is just
+# func(*args, **kwargs) and the kernel gets counters=None.
+def counted(func, *args, **kwargs):
+    if not ENABLED:
+        return func(*args, **kwargs)
+    # a row for every thread numba may run, however many are active now
+    counters = np.zeros((config.NUMBA_NUM_THREADS, len(KERNEL_COUNTERS)), dtype=np.int64)
+    with timed("kernels"):
+        result = func(*args, counters=counters, **kwargs)
+    for name, value in zip(KERNEL_COUNTERS, counters.sum(axis=0).tolist()):
+        totals[name] += value
+    return result
+
+
+# Time numba spends compiling, top level compilations only (compiling a
+# kernel compiles its callees inside the same event).
+class CompileTimer(event.Listener):
+    def __init__(self):
+        self.depth = 0
+        self.start_time = 0.0
+
+    def on_start(self, ev):
+        if self.depth == 0:
+            self.start_time = time.perf_counter()
+        self.depth += 1
+
+    def on_end(self, ev):
+        self.depth -= 1
+        if self.depth == 0:
+            add_time("numba_compile", time.perf_counter() - self.start_time)
+
+
+def snapshot():
+    return {
+        "counters": dict(totals),
+        "timers": {name: {"calls": calls, "seconds": seconds} for name, (calls, seconds) in timers.items()},
+    }
+
+
+def report():
+    lines = [f"{name:>22s}: {value}" for name, value in totals.items()]
+    lines += [f"{name + ' [s]':>22s}: {seconds:.3f} ({calls} calls)" for name, (calls, seconds) in timers.items()]
+    return "\n".join(lines)
+
+
+# Prometheus text exposition format: one im_<counter>_total per counter and
+# im_phase_seconds_total / im_phase_calls_total labelled by phase.
+def prometheus_text(labels=None):
+    base = ",".join(f'{key}="{value}"' for key, value in sorted((labels or {}).items()))
+
+    def sample(name, value, extra=""):
+        label_text = ",".join(part for part in (base, extra) if part)
+        return f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}"
+
+    lines = []
+    for name, value in totals.items():
+        lines += [f"# TYPE im_{name}_total counter", sample(f"im_{name}_total", value)]
+    if timers:
+        lines.append("# TYPE im_phase_seconds_total counter")
+        lines += [sample("im_phase_seconds_total", f"{seconds:.6f}", f'phase="{name}"')
+                  for name, (_, seconds) in timers.items()]
+        lines.append("# TYPE im_phase_calls_total counter")
+        lines += [sample("im_phase_calls_total", calls, f'phase="{name}"') for name, (calls, _) in timers.items()]
+    return "\n".join(lines) + "\n"
+
+
+# *.prom files get the Prometheus text format (rewritten, for the node
+# exporter's textfile collector), anything else one JSON object per run
+# appended as a structured log line.
+def export(path, **labels):
+    if path.endswith(".prom"):
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(prometheus_text(labels))
+        os.replace(tmp, path)
+        return
+    with open(path, "a") as f:
+        f.write(json.dumps(dict(time=time.time(), **labels, **snapshot())) + "\n")
+
+
+reset()
+if ENABLED:
+    event.register("numba:compile", CompileTimer())
@@ -0,0 +1,329 @@
+import numpy as np
+from numba import njit, prange, get_num_threads
+
+from ic_kernels import stream_state, next_uniform, next_epoch, next_master_seed
+
+# Live-edge ("possible worlds") spread oracle for the IC model.
+#
+# Under IC, a cascade is the same as flipping every edge coin up front and
+# taking everything reachable from the seeds over the live edges. So instead
+# of redrawing coins for every estimate we sample R live-edge graphs once,
+# stored as packed bit masks over flat_adj (bit i of masks[r] says whether
+# entry i of flat_adj is live in world r), and answer every question on these
+# fixed worlds:
+#   - singleton spreads use an SCC condensation per world: all nodes in one
+#     strongly connected component reach the same set, so reach is computed
+#     per component on the condensation DAG (see component_reach).
+#   - marginal gains reuse a per-world "covered" bitset (everything the
+#     committed seeds reach). Nothing reachable from a covered node is new,
+#     so the BFS for v stops at covered nodes and only walks v's new region.
+
+
+# Geometric skipping: jump straight to the next live edge instead of
+# drawing a coin for every entry, ~p * nnz draws per world.
+@njit(parallel=True)
+def sample_live_masks(nnz, R, p, master_seed):
+    masks = np.zeros((R, (nnz + 7) // 8), dtype=np.uint8)
+    if p <= 0.0:
+        return masks
+    log_q = np.log1p(-p) if p < 1.0 else -np.inf
+    for r in prange(R):
+        state = stream_state(master_seed, r)
+        i = -1
+        while True:
+            state, u = next_uniform(state)
+            i += 1 + int(np.log(1.0 - u) / log_q)
+            if i >= nnz:
+                break
+            masks[r, i >> 3] |= np.uint8(1 << (i & 7))
+    return masks
+
+
+@njit(inline="always")
+def is_live(mask, i):
+    return (mask[i >> 3] >> (i & 7)) & 1
+
+
+@njit(inline="always")
+def is_covered(covered, v):
+    return (covered[v >> 6] >> np.uint64(v & 63)) & np.uint64(1)
+
+
+# Iterative Tarjan over the live edges of one world. Fills comp with
+# component ids and returns the number of components.
+@njit
+def live_scc(flat_adj, start_idx, mask, comp, index, low, on_stack, stack, call_node, call_edge):
+    n = len(start_idx) - 1
+    index[:] = -1
+    on_stack[:] = 0
+    counter = 0
+    n_comp = 0
+    sp = 0
+    for root in range(n):
+        if index[root] != -1:
+            continue
+        index[root] = counter
+        low[root] = counter
+        counter += 1
+        stack[sp] = root
+        sp += 1
+        on_stack[root] = 1
+        call_node[0] = root
+        call_edge[0] = start_idx[root]
+        csp = 1
+        while csp > 0:
+            u = call_node[csp - 1]
+            i = call_edge[csp - 1]
+            if i < start_idx[u + 1]:
+                call_edge[csp - 1] = i + 1
+                if is_live(mask, i):
+                    w = flat_adj[i]
+                    if index[w] == -1:
+                        index[w] = counter
+                        low[w] = counter
+                        counter += 1
+                        stack[sp] = w
+                        sp += 1
+                        on_stack[w] = 1
+                        call_node[csp] = w
+                        call_edge[csp] = start_idx[w]
+                        csp += 1
+                    elif on_stack[w] and index[w] < low[u]:
+                        low[u] = index[w]
+            else:
+                csp -= 1
+                if low[u] == index[u]:
+                    while True:
+                        sp -= 1
+                        w = stack[sp]
+                        on_stack[w] = 0
+                        comp[w] = n_comp
+                        if w == u:
+                            break
+                    n_comp += 1
+                if csp > 0:
+                    parent = call_node[csp - 1]
+                    if low[u] < low[parent]:
+                        low[parent] = low[u]
+    return n_comp
+
+
+# BFS from v over live edges, skipping covered nodes. Returns the number of
+# newly reached nodes, and marks them covered when commit is set.
+@njit
+def reach_uncovered(flat_adj, start_idx, mask, covered, v, commit, visited, queue, epoch):
+    if is_covered(covered, v):
+        return 0
+    stamp = next_epoch(visited, epoch)
+    visited[v] = stamp
+    queue[0] = v
+    q_len = 1
+    idx = 0
+    while idx < q_len:
+        u = queue[idx]
+        idx += 1
+        for i in range(start_idx[u], start_idx[u + 1]):
+            if is_live(mask, i):
+                w = flat_adj[i]
+                if visited[w] != stamp and not is_covered(covered, w):
+                    visited[w] = stamp
+                    queue[q_len] = w
+                    q_len += 1
+    if commit:
+        for j in range(q_len):
+            w = queue[j]
+            covered[w >> 6] |= np.uint64(1) << np.uint64(w & 63)
+    return q_len
+
+
+# Condensation DAG of one world as CSR (dag_start, dag_adj) over component
+# ids, without duplicate edges, plus the size of every component. Tarjan
+# numbers components sinks first, so every DAG edge goes from a higher to a
+# lower id and increasing ids are a reverse topological order.
+@njit
+def condensation(flat_adj, start_idx, mask, comp, n_comp):
+    n = len(start_idx) - 1
+    size = np.zeros(n_comp, dtype=np.int64)
+    for v in range(n):
+        size[comp[v]] += 1
+    member_start = np.zeros(n_comp + 1, dtype=np.int64)
+    member_start[1:] = np.cumsum(size)
+    fill = member_start[:-1].copy()
+    members = np.empty(n, dtype=np.int32)
+    for v in range(n):
+        members[fill[comp[v]]] = v
+        fill[comp[v]] += 1
+
+    # two passes over the live edges leaving each component: count, then fill
+    dag_start = np.zeros(n_comp + 1, dtype=np.int64)
+    dag_adj = np.empty(0, dtype=np.int32)
+    seen = np.empty(n_comp, dtype=np.int64)
+    for fill_pass in range(2):
+        seen[:] = -1
+        for c in range(n_comp):
+            deg = 0
+            for j in range(member_start[c], member_start[c + 1]):
+                u = members[j]
+                for i in range(start_idx[u], start_idx[u + 1]):
+                    if is_live(mask, i):
+                        d = comp[flat_adj[i]]
+                        if d != c and seen[d] != c:
+                            seen[d] = c
+                            if fill_pass:
+                                dag_adj[dag_start[c] + deg] = d
+                            deg += 1
+            if not fill_pass:
+                dag_start[c + 1] = dag_start[c] + deg
+        if not fill_pass:
+            dag_adj = np.empty(dag_start[n_comp], dtype=np.int32)
+    return size, dag_start, dag_adj
+
+
+# Number of nodes reachable from component c: BFS over the condensation DAG
+# summing component sizes.
+@njit
+def dag_reach(size, dag_start, dag_adj, c, visited, queue, epoch):
+    stamp = next_epoch(visited, epoch)
+    visited[c] = stamp
+    queue[0] = c
+    q_len = 1
+    idx = 0
+    total = 0
+    while idx < q_len:
+        d = queue[idx]
+        idx += 1
+        total += size[d]
+        for i in range(dag_start[d], dag_start[d + 1]):
+            e = dag_adj[i]
+            if visited[e] != stamp:
+                visited[e] = stamp
+                queue[q_len] = e
+                q_len += 1
+    return total
+
+
+# Reach size of every component of one world. A component with at most one
+# DAG successor reaches itself plus what that successor reaches, so those
+# are a DP in reverse topological order and chains of components cost O(1)
+# each. Components with several successors can reach a node along more than
+# one branch, so their (exact) reach is a BFS over the DAG, in parallel.
+@njit(parallel=True)
+def component_reach(size, dag_start, dag_adj, visited, queue, epochs):
+    n_comp = len(size)
+    reach = size.copy()
+    branching = np.nonzero(dag_start[1:] - dag_start[:-1] > 1)[0]
+    n_blocks = visited.shape[0]
+    for b in prange(n_blocks):
+        for j in range(b, len(branching), n_blocks):
+            c = branching[j]
+            reach[c] = dag_reach(size, dag_start, dag_adj, c, visited[b], queue[b], epochs[b:b + 1])
+    for c in range(n_comp):
+        if dag_start[c + 1] - dag_start[c] == 1:
+            reach[c] += reach[dag_adj[dag_start[c]]]
+    return reach
+
+
+# Marginal gain of v averaged over all worlds, one world per block of work.
+@njit(parallel=True)
+def live_edge_gain(flat_adj, start_idx, masks, covered, v, commit, visited, queue, epochs):
+    R = masks.shape[0]
+    counts = np.zeros(R, dtype=np.int64)
+    n_blocks = visited.shape[0]
+    for b in prange(n_blocks):
+        for r in range(b, R, n_blocks):
+            counts[r] = reach_uncovered(
+                flat_adj, start_idx, masks[r], covered[r], v, commit,
+                visited[b], queue[b], epochs[b:b + 1],
+            )
+    return counts.sum() / R
+
+
+# Drop-in spread_oracle (see spread_oracle.py) backed by R sampled worlds.
+# The spreads are exact on the sample, so MC_init/MC_final do not apply and
+# R plays the role of the number of simulations.
+class LiveEdgeOracle:
+    common_random_numbers = True
+
+    def __init__(self, flat_adj, start_idx, p=0.1, R=200, master_seed=None):
+        if master_seed is None:
+            master_seed = next_master_seed()
+        n = len(start_idx) - 1
+        self.flat_adj = flat_adj
+        self.start_idx = start_idx
+        self.p = p
+        self.R = R
+        self.master_seed = master_seed
+        self.masks = sample_live_masks(len(flat_adj), R, p, master_seed)
+        self.covered = np.zeros((R, (n + 63) // 64), dtype=np.uint64)
+        n_blocks = max(1, min(get_num_threads(), R))
+        self.visited = np.zeros((n_blocks, n), dtype=np.uint32)
+        self.queue = np.empty((n_blocks, n), dtype=np.int32)
+        self.epochs = np.zeros(n_blocks, dtype=np.uint32)
+        self.selected = []
+        self.current_spread = 0.0
+        self.lookahead = None
+        self.lookahead_key = None
+
+    def initial_gains(self, progress=None):
+        n = len(self.start_idx) - 1
+        comp = np.empty(n, dtype=np.int32)
+        index = np.empty(n, dtype=np.int64)
+        low = np.empty(n, dtype=np.int64)
+        on_stack = np.zeros(n, dtype=np.uint8)
+        stack = np.empty(n, dtype=np.int32)
+        call_node = np.empty(n, dtype=np.int32)
+        call_edge = np.empty(n, dtype=np.int64)
+        gains = np.zeros(n, dtype=np.float64)
+        for r in range(self.R):
+            mask = self.masks[r]
+            n_comp = live_scc(
+                self.flat_adj, self.start_idx, mask, comp, index, low, on_stack, stack, call_node, call_edge
+            )
+            size, dag_start, dag_adj = condensation(self.flat_adj, self.start_idx, mask, comp, n_comp)
+            reach = component_reach(size, dag_start, dag_adj, self.visited, self.queue, self.epochs)
+            gains += reach[comp]
+            if progress is not None:
+                progress(r + 1, self.R)
+        return gains / self.R
+
+    def marginal_gain(self, v, threshold=None):
+        return live_edge_gain(
+            self.flat_adj, self.start_idx, self.masks, self.covered, v, False,
+            self.visited, self.queue, self.epochs,
+        )
+
+    # The covered sets with best committed are built once per (best, number
+    # of seeds) and reused while best stays the look-ahead candidate.
+    def marginal_gain_pair(self, v, best):
+        if best < 0:
+            return self.marginal_gain(v), 0.0
+        key = (best, len(self.selected))
+        if self.lookahead_key != key:
+            self.lookahead = self.covered.copy()
+            live_edge_gain(
+                self.flat_adj, self.start_idx, self.masks, self.lookahead, best, True,
+                self.visited, self.queue, self.epochs,
+            )
+            self.lookahead_key = key
+        mg2 = live_edge_gain(
+            self.flat_adj, self.start_idx, self.masks, self.lookahead, v, False,
+            self.visited, self.queue, self.epochs,
+        )
+        return self.marginal_gain(v), mg2
+
+    def add(self, v):
+        self.current_spread += live_edge_gain(
+            self.flat_adj, self.start_idx, self.masks, self.covered, v, True,
+            self.visited, self.queue, self.epochs,
+        )
+        self.selected.append(v)
+        return self.current_spread
+
+    # Replays the adds on the same sampled worlds
+    def restore(self, selected, spread):
+        self.covered[:] = 0
+        self.selected = []
+        self.current_spread = 0.0
+        self.lookahead_key = None
+        for v in selected:
+            self.add(v)
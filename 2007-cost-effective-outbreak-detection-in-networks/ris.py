@@ -0,0 +1,353 @@
+import numpy as np
+import heapq
+import math
+import time
+from numba import njit, prange, get_num_threads
+
+from graph_loader import load_csr, stream_csr
+from ic_kernels import stream_state, next_uniform, next_epoch, next_master_seed, seed_kernels
+from CELF_COST import node_costs
+
+# Reverse influence sampling (RIS) for IC, IMM style (Tang et al. 2015).
+#
+# A reverse-reachable (RR) set is everything that reaches a uniformly random
+# root over a random live-edge graph. The spread of S is n times the chance
+# that S hits a random RR set, so seed selection becomes max coverage over a
+# pool of RR sets. The pool is one flat int32 array (`pool`) plus int64
+# offsets, RR set j being pool[offsets[j]:offsets[j + 1]].
+
+
+# In-edge CSR of the graph (the CELF arrays are out-edges). For the
+# undirected edge lists in this folder it is the same graph, but RR sets are
+# defined on reversed edges so we never rely on that.
+def reverse_csr(flat_adj, start_idx):
+    n = len(start_idx) - 1
+    src = np.repeat(np.arange(n, dtype=np.int32), np.diff(start_idx))
+    order = np.argsort(flat_adj, kind="stable")
+    rev_adj = src[order]
+    rev_start = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(flat_adj, minlength=n), out=rev_start[1:])
+    return rev_adj, rev_start
+
+
+# Backward IC cascade from `root`. Copies the RR set to out[0:size] when
+# `write` is set, returns its size either way.
+@njit
+def sample_rr_set(rev_adj, rev_start, root, p, state, visited, queue, epoch, out, write):
+    stamp = next_epoch(visited, epoch)
+    visited[root] = stamp
+    queue[0] = root
+    q_len = 1
+    idx = 0
+    while idx < q_len:
+        u = queue[idx]
+        idx += 1
+        for i in range(rev_start[u], rev_start[u + 1]):
+            w = rev_adj[i]
+            if visited[w] != stamp:
+                state, r = next_uniform(state)
+                if r <= p:
+                    visited[w] = stamp
+                    queue[q_len] = w
+                    q_len += 1
+    if write:
+        for i in range(q_len):
+            out[i] = queue[i]
+    return q_len
+
+
+# RR sets first..first+count-1. Set j always comes from RNG stream j, so the
+# sizes pass and the fill pass see identical sets and the pool depends only
+# on master_seed, not on the thread count.
+@njit(parallel=True)
+def rr_sizes(rev_adj, rev_start, first, count, p, master_seed):
+    n = len(rev_start) - 1
+    sizes = np.empty(count, dtype=np.int64)
+    n_blocks = max(1, min(get_num_threads(), count))
+    for b in prange(n_blocks):
+        visited = np.zeros(n, dtype=np.uint32)
+        queue = np.empty(n, dtype=np.int32)
+        epoch = np.zeros(1, dtype=np.uint32)
+        for j in range(b, count, n_blocks):
+            state = stream_state(master_seed, first + j)
+            state, r = next_uniform(state)
+            root = min(int(r * n), n - 1)
+            sizes[j] = sample_rr_set(rev_adj, rev_start, root, p, state, visited, queue, epoch, queue, False)
+    return sizes
+
+
+@njit(parallel=True)
+def rr_fill(rev_adj, rev_start, first, offsets, p, master_seed, pool):
+    n = len(rev_start) - 1
+    count = len(offsets) - 1
+    n_blocks = max(1, min(get_num_threads(), count))
+    for b in prange(n_blocks):
+        visited = np.zeros(n, dtype=np.uint32)
+        queue = np.empty(n, dtype=np.int32)
+        epoch = np.zeros(1, dtype=np.uint32)
+        for j in range(b, count, n_blocks):
+            state = stream_state(master_seed, first + j)
+            state, r = next_uniform(state)
+            root = min(int(r * n), n - 1)
+            sample_rr_set(
+                rev_adj, rev_start, root, p, state, visited, queue, epoch,
+                pool[offsets[j]:offsets[j + 1]], True,
+            )
+
+
+# Growable RR set pool. extend_to() samples the next batch in parallel;
+# other diffusion models subclass it and override sizes() / fill().
+class RRPool:
+    def __init__(self, flat_adj, start_idx, p, master_seed):
+        self.n = len(start_idx) - 1
+        self.rev_adj, self.rev_start = reverse_csr(flat_adj, start_idx)
+        self.p = p
+        self.master_seed = master_seed
+        self.pool = np.empty(0, dtype=np.int32)
+        self.offsets = np.zeros(1, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def sizes(self, first, count):
+        return rr_sizes(self.rev_adj, self.rev_start, first, count, self.p, self.master_seed)
+
+    def fill(self, first, offsets, pool):
+        rr_fill(self.rev_adj, self.rev_start, first, offsets, self.p, self.master_seed, pool)
+
+    def extend_to(self, theta):
+        count = int(theta) - len(self)
+        if count <= 0:
+            return
+        first = len(self)
+        sizes = self.sizes(first, count)
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        pool = np.empty(offsets[-1], dtype=np.int32)
+        self.fill(first, offsets, pool)
+        self.pool = np.concatenate((self.pool, pool))
+        self.offsets = np.concatenate((self.offsets, offsets[1:] + self.offsets[-1]))
+
+    # node -> RR sets containing it, as CSR (node_sets, node_start)
+    def inverted_index(self):
+        set_ids = np.repeat(np.arange(len(self), dtype=np.int32), np.diff(self.offsets))
+        order = np.argsort(self.pool, kind="stable")
+        node_start = np.zeros(self.n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.pool, minlength=self.n), out=node_start[1:])
+        return set_ids[order], node_start
+
+
+# Greedy max coverage with lazy counters: the heap holds possibly stale
+# coverage counts, a popped node is only taken if its count is current,
+# otherwise it is pushed back with the fresh count.
+@njit
+def max_coverage(pool, offsets, node_sets, node_start, k):
+    n = len(node_start) - 1
+    theta = len(offsets) - 1
+    count = np.diff(node_start)
+    covered = np.zeros(theta, dtype=np.uint8)
+    heap = [(-count[0], 0)]
+    heap.pop()
+    for v in range(n):
+        if count[v] > 0:
+            heap.append((-count[v], v))
+    heapq.heapify(heap)
+
+    seeds = np.empty(k, dtype=np.int32)
+    n_seeds = 0
+    n_covered = 0
+    while n_seeds < k and len(heap) > 0:
+        neg, v = heapq.heappop(heap)
+        if -neg != count[v]:
+            if count[v] > 0:
+                heapq.heappush(heap, (-count[v], v))
+            continue
+        seeds[n_seeds] = v
+        n_seeds += 1
+        for i in range(node_start[v], node_start[v + 1]):
+            j = node_sets[i]
+            if covered[j] == 0:
+                covered[j] = 1
+                n_covered += 1
+                for t in range(offsets[j], offsets[j + 1]):
+                    count[pool[t]] -= 1
+    return seeds[:n_seeds], n_covered
+
+
+def select_seeds(rr, k):
+    node_sets, node_start = rr.inverted_index()
+    seeds, n_covered = max_coverage(rr.pool, rr.offsets, node_sets, node_start, k)
+    return seeds, n_covered / max(len(rr), 1)
+
+
+def log_comb(n, k):
+    return math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
+
+
+# Ratio greedy for a node cost budget. key is coverage / cost (use_ratio) or
+# plain coverage (the unit-cost pass of CELF). Only nodes with
+# cost <= budget enter the heap, and a node that no longer fits the remaining
+# budget is dropped for good since the remaining budget only shrinks.
+@njit
+def budgeted_coverage(pool, offsets, node_sets, node_start, costs, budget, use_ratio):
+    n = len(node_start) - 1
+    theta = len(offsets) - 1
+    count = np.diff(node_start)
+    covered = np.zeros(theta, dtype=np.uint8)
+    heap = [(0.0, 0)]
+    heap.pop()
+    for v in range(n):
+        if costs[v] <= budget and count[v] > 0:
+            key = count[v] / costs[v] if use_ratio else float(count[v])
+            heap.append((-key, v))
+    heapq.heapify(heap)
+
+    seeds = np.empty(n, dtype=np.int32)
+    n_seeds = 0
+    n_covered = 0
+    spent = 0.0
+    while len(heap) > 0:
+        neg, v = heapq.heappop(heap)
+        if spent + costs[v] > budget:
+            continue
+        key = count[v] / costs[v] if use_ratio else float(count[v])
+        if -neg != key:
+            if count[v] > 0:
+                heapq.heappush(heap, (-key, v))
+            continue
+        seeds[n_seeds] = v
+        n_seeds += 1
+        spent += costs[v]
+        for i in range(node_start[v], node_start[v + 1]):
+            j = node_sets[i]
+            if covered[j] == 0:
+                covered[j] = 1
+                n_covered += 1
+                for t in range(offsets[j], offsets[j + 1]):
+                    count[pool[t]] -= 1
+    return seeds[:n_seeds], spent, n_covered
+
+
+# Best of the cost-benefit greedy, the unit-cost greedy and the best single
+# affordable node, which is what keeps the budgeted greedy within a constant
+# factor of the optimum.
+def budgeted_select(rr, costs, budget):
+    node_sets, node_start = rr.inverted_index()
+    candidates = []
+    for use_ratio in (True, False):
+        seeds, spent, n_covered = budgeted_coverage(
+            rr.pool, rr.offsets, node_sets, node_start, costs, budget, use_ratio
+        )
+        candidates.append((n_covered, seeds, spent))
+
+    counts = np.where(costs <= budget, np.diff(node_start), -1)
+    best = int(np.argmax(counts))
+    if counts[best] > 0:
+        candidates.append((int(counts[best]), np.array([best], dtype=np.int32), float(costs[best])))
+
+    n_covered, seeds, spent = max(candidates, key=lambda c: c[0])
+    return seeds, spent, n_covered / max(len(rr), 1)
+
+
+# IMM sampling: estimate a lower bound on OPT with a doubling search, then
+# draw theta = lambda* / LB RR sets so that greedy coverage is a
+# (1 - 1/e - epsilon) approximation with probability 1 - 1/n^ell.
+# `select(rr)` returns the coverage fraction of the selector being sized.
+def imm_pool(flat_adj, start_idx, k, p, epsilon, ell, master_seed, select):
+    n = len(start_idx) - 1
+    rr = RRPool(flat_adj, start_idx, p, master_seed)
+    ell = ell * (1 + math.log(2) / math.log(n))
+    log_nk = log_comb(n, k)
+    eps_prime = math.sqrt(2) * epsilon
+    lambda_prime = (
+        (2 + 2 * eps_prime / 3)
+        * (log_nk + ell * math.log(n) + math.log(max(math.log2(n), 1.0)))
+        * n / eps_prime ** 2
+    )
+    alpha = math.sqrt(ell * math.log(n) + math.log(2))
+    beta = math.sqrt((1 - 1 / math.e) * (log_nk + ell * math.log(n) + math.log(2)))
+    lambda_star = 2 * n * ((1 - 1 / math.e) * alpha + beta) ** 2 / epsilon ** 2
+
+    LB = 1.0
+    for i in range(1, max(int(math.log2(n)), 2)):
+        x = n / 2 ** i
+        rr.extend_to(math.ceil(lambda_prime / x))
+        fraction = select(rr)
+        if n * fraction >= (1 + eps_prime) * x:
+            LB = n * fraction / (1 + eps_prime)
+            break
+
+    rr.extend_to(math.ceil(lambda_star / LB))
+    return rr
+
+
+def IMM_K(flat_adj, start_idx, k=5, p=0.1, epsilon=0.5, ell=1.0, master_seed=None):
+    n = len(start_idx) - 1
+    k = min(k, n)
+    if n <= 1 or k == 0:
+        return set(range(k)), float(k)
+    if master_seed is None:
+        master_seed = next_master_seed()
+
+    rr = imm_pool(flat_adj, start_idx, k, p, epsilon, ell, master_seed, lambda rr: select_seeds(rr, k)[1])
+    seeds, fraction = select_seeds(rr, k)
+    for v in seeds:
+        print(f"Selected {v}")
+    print(f"RR sets: {len(rr)}, pool size: {len(rr.pool)}")
+    return set(seeds.tolist()), n * fraction
+
+
+# Budgeted RIS, the RR set counterpart of CELF_C. Costs default to the
+# degree based 1 + 0.01 * deg of CELF_COST. The IMM bounds are sized with
+# k = the most nodes the budget can buy, which bounds every affordable set.
+def IMM_C(flat_adj, start_idx, budget=30.0, p=0.1, epsilon=0.5, ell=1.0, costs=None, master_seed=None):
+    n = len(start_idx) - 1
+    if costs is None:
+        costs = node_costs(start_idx)
+    costs = np.asarray(costs, dtype=np.float64)
+    if master_seed is None:
+        master_seed = next_master_seed()
+    if n <= 1:
+        return set(), 0.0, 0.0
+    k = int(min(n, max(1, budget // costs.min())))
+
+    rr = imm_pool(
+        flat_adj, start_idx, k, p, epsilon, ell, master_seed,
+        lambda rr: budgeted_select(rr, costs, budget)[2],
+    )
+    seeds, spent, fraction = budgeted_select(rr, costs, budget)
+    for v in seeds:
+        print(f"Selected {v}, cost = {costs[v]:.2f}")
+    print(f"RR sets: {len(rr)}, pool size: {len(rr.pool)}")
+    return set(seeds.tolist()), spent, n * fraction
+
+
+def main(path, k=5, p=0.1, epsilon=0.5, stream=False):
+    print("Building adjacency list...")
+    start_time = time.time()
+    if stream:
+        flat_adj, start_idx, node_ids = stream_csr(path)
+    else:
+        flat_adj, start_idx = load_csr(path)
+
+    print("Running IMM...")
+    chosen_nodes, spread = IMM_K(flat_adj, start_idx, k, p, epsilon)
+    if stream:
+        chosen_nodes = {int(node_ids[v]) for v in chosen_nodes}
+
+    print("\nChosen nodes:", chosen_nodes)
+    print(f"Estimated spread: {spread:.2f}")
+    print(f"Elapsed time: {time.time() - start_time:.2f} seconds")
+    return chosen_nodes, spread
+
+
+if __name__ == "__main__":
+    np.random.seed(2)
+    seed_kernels(2)
+    path = "2007-cost-effective-outbreak-detection-in-networks/Data/soc-LiveJournal1.txt"
+    # Parameters
+    k = 5                # Number of seeds
+    p = 0.1              # Transmission probability
+    epsilon = 0.5        # Approximation slack, smaller = more RR sets
+
+    main(path, k, p, epsilon, stream=True)
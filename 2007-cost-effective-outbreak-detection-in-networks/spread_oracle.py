@@ -0,0 +1,247 @@
+import numpy as np
+from numba import get_num_threads
+
+from ic_kernels import (
+    crn_gain_parallel,
+    crn_singletons_kernel,
+    new_block_scratch,
+    new_scratch,
+    estimate_spread_sparse,
+    estimate_spread_parallel,
+    gain_pair_parallel,
+    next_master_seed,
+    singleton_spreads,
+    spread_samples_parallel,
+)
+from instrument import counted
+
+# A spread oracle is what the greedy / CELF selectors ask for spreads.
+# It keeps the committed seed set itself and answers three questions:
+#   initial_gains(progress=None) -> float64 array, spread of every {v}
+#   marginal_gain(v, threshold=None)
+#                                -> gain of adding v to the committed seeds
+#   add(v)                       -> commit v, returns the new spread
+# Any object with these methods can be passed as `spread_oracle=` to CELF_K,
+# CELF_C and greedy_naive. threshold is the gain the caller compares the
+# answer with (CELF: the next key in the heap); an oracle may use it to stop
+# as soon as the comparison is settled, or ignore it. CELF_K(celfpp=True)
+# also needs
+#   marginal_gain_pair(v, best)  -> (gain of v, gain of v once best is added)
+#                                   with best < 0 meaning no best yet (mg2 0)
+#   common_random_numbers = True    every answer comes from the same fixed
+#                                   worlds, so a saved mg2 can stand in for a
+#                                   later marginal_gain (CELF_K only runs the
+#                                   look-ahead for such oracles)
+# and resuming CELF_K / CELF_C from a checkpoint
+#   restore(selected, spread)    -> back to the state after add(v) for every
+#                                   v in selected, with that spread
+
+
+# The classic Monte Carlo oracle: fresh IC cascades for every question.
+# MC_init simulations for initial / lazy gains and MC_final for the spread
+# after a node is committed. parallel=True spreads the MC simulations over
+# all cores.
+class MonteCarloOracle:
+    common_random_numbers = False
+
+    def __init__(self, flat_adj, start_idx, MC_init=10, MC_final=100, p=0.1, parallel=False):
+        self.flat_adj = flat_adj
+        self.start_idx = start_idx
+        self.MC_init = MC_init
+        self.MC_final = MC_final
+        self.p = p
+        self.parallel = parallel
+        self.scratch = new_scratch(len(start_idx) - 1)
+        self.blocks = None
+        self.selected = []
+        self.current_spread = 0.0
+
+    # Per-thread buffers of the parallel kernels (ic_kernels.new_block_scratch),
+    # one set for the whole run, allocated on first use.
+    def block_scratch(self):
+        if self.blocks is None:
+            self.blocks = new_block_scratch(len(self.start_idx) - 1)
+        return self.blocks
+
+    # Cascades reuse `scratch` / block_scratch() buffers (see ic_kernels), so
+    # a simulation only costs the nodes and edges it touches.
+    def spread(self, seeds, MC):
+        seeds = np.asarray(seeds, dtype=np.int32)
+        if self.parallel:
+            return counted(
+                estimate_spread_parallel, self.flat_adj, self.start_idx, seeds, MC, self.p, next_master_seed(),
+                *self.block_scratch(),
+            )
+        return counted(estimate_spread_sparse, self.flat_adj, self.start_idx, seeds, MC, self.p, *self.scratch)
+
+    def initial_gains(self, progress=None):
+        return counted(
+            singleton_spreads, self.flat_adj, self.start_idx, self.MC_init, self.p, next_master_seed(), progress,
+            scratch=self.block_scratch(),
+        )
+
+    def marginal_gain(self, v, threshold=None):
+        return self.spread(self.selected + [v], self.MC_init) - self.current_spread
+
+    # Both gains come from the same MC_init worlds (see gain_pair_parallel)
+    def marginal_gain_pair(self, v, best):
+        seeds = np.asarray(self.selected, dtype=np.int32)
+        return counted(
+            gain_pair_parallel, self.flat_adj, self.start_idx, seeds, v, best, self.MC_init, self.p,
+            next_master_seed(), *self.block_scratch(),
+        )
+
+    def add(self, v):
+        self.selected.append(v)
+        self.current_spread = self.spread(self.selected, self.MC_final)
+        return self.current_spread
+
+    # No simulations: the spread is the estimate the interrupted run made
+    def restore(self, selected, spread):
+        self.selected = list(selected)
+        self.current_spread = spread
+
+
+# Monte Carlo with sequential stopping: simulations run in batches of
+# `batch` and a running mean / variance (Welford, merged per batch) gives a
+# confidence interval mean +- z * sd / sqrt(count). An estimate stops as
+# soon as
+#   - the interval lies entirely above or below `threshold` (the comparison
+#     CELF makes with the next heap key is settled), or
+#   - its half width is below rel_error * mean,
+# and at the latest after the fixed MC_init (gains) / MC_final (add) of the
+# plain oracle, so it never runs more simulations than MonteCarloOracle.
+# `used` / `fixed` count the simulations run and what fixed MC would have
+# run; summary() reports the difference.
+class SequentialMonteCarloOracle(MonteCarloOracle):
+    def __init__(self, flat_adj, start_idx, MC_init=100, MC_final=1000, p=0.1, parallel=False,
+                 batch=32, z=1.96, rel_error=0.02):
+        super().__init__(flat_adj, start_idx, MC_init, MC_final, p, parallel)
+        self.batch = batch
+        self.z = z
+        self.rel_error = rel_error
+        self.used = 0
+        self.fixed = 0
+
+    # (mean, half width, simulations run) of the spread of `seeds`
+    def sequential_spread(self, seeds, MC, threshold=None):
+        seeds = np.asarray(seeds, dtype=np.int32)
+        master_seed = next_master_seed()
+        count, mean, m2 = 0, 0.0, 0.0
+        half = np.inf
+        while count < MC:
+            size = min(self.batch, MC - count)
+            x = counted(
+                spread_samples_parallel, self.flat_adj, self.start_idx, seeds, count, size, self.p, master_seed,
+                *self.block_scratch(),
+            )
+            x_mean = x.mean()
+            delta = x_mean - mean
+            total = count + size
+            mean += delta * size / total
+            m2 += ((x - x_mean) ** 2).sum() + delta * delta * count * size / total
+            count = total
+            if count < 2:
+                continue
+            half = self.z * np.sqrt(m2 / (count - 1) / count)
+            if threshold is not None and (mean + half < threshold or mean - half > threshold):
+                break
+            if half <= self.rel_error * mean:
+                break
+        self.used += count
+        self.fixed += MC
+        return mean, half, count
+
+    def marginal_gain(self, v, threshold=None):
+        if threshold is not None:
+            threshold += self.current_spread
+        mean, _, _ = self.sequential_spread(self.selected + [v], self.MC_init, threshold)
+        return mean - self.current_spread
+
+    # The fixed MC pair would run all MC_init simulations and the look-ahead
+    # does not pay off without common random numbers (see CELF_K), so there
+    # is no sequential version.
+    def marginal_gain_pair(self, v, best):
+        raise ValueError("SequentialMonteCarloOracle has no CELF++ look-ahead, use CELF_K(celfpp=False)")
+
+    def add(self, v):
+        self.selected.append(v)
+        self.current_spread, _, _ = self.sequential_spread(self.selected, self.MC_final)
+        return self.current_spread
+
+    def summary(self):
+        saved = self.fixed - self.used
+        return (
+            f"Simulations: {self.used} run, {self.fixed} with fixed MC "
+            f"({saved} saved, {100.0 * saved / max(self.fixed, 1):.1f}%)"
+        )
+
+
+# Common random numbers: every question is answered in the same MC worlds
+# (edge coins hashed from the world and the edge, see ic_kernels.edge_live),
+# so spread(S + v) and spread(S) are never drawn independently. R(S) is kept
+# per world as a bitset, and a gain only walks what v adds beyond it, which
+# also makes it exact on the sample and never negative. Much lower MC than
+# MonteCarloOracle gives the same selection quality (bench_crn_variance.py).
+class CRNOracle:
+    common_random_numbers = True
+
+    def __init__(self, flat_adj, start_idx, MC=100, p=0.1, master_seed=None):
+        if master_seed is None:
+            master_seed = next_master_seed()
+        n = len(start_idx) - 1
+        self.flat_adj = flat_adj
+        self.start_idx = start_idx
+        self.MC = MC
+        self.p = p
+        self.master_seed = master_seed
+        self.covered = np.zeros((MC, (n + 63) // 64), dtype=np.uint64)
+        n_blocks = max(1, min(get_num_threads(), MC))
+        self.visited = np.zeros((n_blocks, n), dtype=np.uint32)
+        self.queue = np.empty((n_blocks, n), dtype=np.int32)
+        self.epochs = np.zeros(n_blocks, dtype=np.uint32)
+        self.selected = []
+        self.current_spread = 0.0
+        self.lookahead = None
+        self.lookahead_key = None
+
+    def gain(self, covered, v, commit=False):
+        return counted(
+            crn_gain_parallel, self.flat_adj, self.start_idx, covered, v, commit, self.p, self.master_seed,
+            self.visited, self.queue, self.epochs,
+        )
+
+    def initial_gains(self, progress=None):
+        return counted(
+            singleton_spreads, self.flat_adj, self.start_idx, self.MC, self.p, self.master_seed, progress,
+            kernel=crn_singletons_kernel, scratch=(self.visited, self.queue, self.epochs),
+        )
+
+    def marginal_gain(self, v, threshold=None):
+        return self.gain(self.covered, v)
+
+    # mg2 on a copy of covered with best committed, built once per (best,
+    # number of seeds) like LiveEdgeOracle's look-ahead
+    def marginal_gain_pair(self, v, best):
+        if best < 0:
+            return self.marginal_gain(v), 0.0
+        key = (best, len(self.selected))
+        if self.lookahead_key != key:
+            self.lookahead = self.covered.copy()
+            self.gain(self.lookahead, best, commit=True)
+            self.lookahead_key = key
+        return self.marginal_gain(v), self.gain(self.lookahead, v)
+
+    def add(self, v):
+        self.current_spread += self.gain(self.covered, v, commit=True)
+        self.selected.append(v)
+        return self.current_spread
+
+    # Replays the adds, the worlds only depend on master_seed
+    def restore(self, selected, spread):
+        self.covered[:] = 0
+        self.selected = []
+        self.current_spread = 0.0
+        self.lookahead_key = None
+        for v in selected:
+            self.add(v)
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import networkx as nx
+import numpy as np
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from graph_loader import build_csr  # noqa: E402
+
+
+# Small graphs as (flat_adj, start_idx), built in memory so the tests do not
+# depend on the data files or the loader cache.
+def ba_csr(n, m=3, seed=0):
+    edges = np.array(nx.barabasi_albert_graph(n, m, seed=seed).edges(), dtype=np.int64)
+    return build_csr(edges, n)
+
+
+@pytest.fixture(scope="session")
+def ba_graph():
+    return ba_csr(300)
+
+
+# A path 0 - 1 - ... - 9: its cascades have closed form distributions
+@pytest.fixture(scope="session")
+def path_graph():
+    edges = np.array([(i, i + 1) for i in range(9)], dtype=np.int64)
+    return build_csr(edges, 10)
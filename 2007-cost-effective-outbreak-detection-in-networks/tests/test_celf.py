@@ -0,0 +1,37 @@
+import re
+
+import numpy as np
+import pytest
+
+from CELF_SET_K import CELF_K
+from live_edge import LiveEdgeOracle
+from spread_oracle import CRNOracle, MonteCarloOracle
+
+
+# "avoided by CELF++ look-ahead: N" of every CELF_K run in the output
+def avoided_calls(output):
+    return [int(n) for n in re.findall(r"avoided by CELF\+\+ look-ahead: (\d+)", output)]
+
+
+# With common random numbers mg2 is exactly the gain a later re-evaluation
+# would measure, so CELF++ only skips oracle calls and never changes a pick
+@pytest.mark.parametrize("make_oracle", [
+    lambda fa, si: CRNOracle(fa, si, MC=30, p=0.1, master_seed=3),
+    lambda fa, si: LiveEdgeOracle(fa, si, p=0.1, R=30, master_seed=3),
+])
+def test_celfpp_matches_celf_with_crn(ba_graph, make_oracle, capsys):
+    flat_adj, start_idx = ba_graph
+    celf = CELF_K(flat_adj, start_idx, 5, spread_oracle=make_oracle(flat_adj, start_idx))
+    celfpp = CELF_K(flat_adj, start_idx, 5, spread_oracle=make_oracle(flat_adj, start_idx), celfpp=True)
+    assert celfpp == celf
+    plain, lookahead = avoided_calls(capsys.readouterr().out)
+    assert plain == 0 and lookahead > 0
+
+
+def test_celfpp_falls_back_without_crn(ba_graph, capsys):
+    flat_adj, start_idx = ba_graph
+    np.random.seed(1)
+    oracle = MonteCarloOracle(flat_adj, start_idx, 10, 10, 0.1)
+    with pytest.warns(RuntimeWarning, match="common random numbers"):
+        CELF_K(flat_adj, start_idx, 2, spread_oracle=oracle, celfpp=True)
+    assert avoided_calls(capsys.readouterr().out) == [0]
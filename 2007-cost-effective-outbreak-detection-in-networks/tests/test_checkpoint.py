@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pytest
+
+from CELF_COST import CELF_C
+from CELF_SET_K import CELF_K
+from ic_kernels import seed_kernels
+from spread_oracle import CRNOracle, MonteCarloOracle
+
+
+class Crash(Exception):
+    pass
+
+
+# Makes the oracle's marginal_gain raise after `calls` answers, as if the
+# process died there (the oracle key, from the type, is unchanged)
+def crash_after(oracle, calls):
+    gain = oracle.marginal_gain
+    answered = [0]
+
+    def marginal_gain(v, threshold=None):
+        if answered[0] == calls:
+            raise Crash
+        answered[0] += 1
+        return gain(v, threshold)
+
+    oracle.marginal_gain = marginal_gain
+
+
+ORACLES = {
+    "monte_carlo": lambda fa, si: MonteCarloOracle(fa, si, 10, 50, 0.1),
+    "crn": lambda fa, si: CRNOracle(fa, si, 20, 0.1),
+}
+SELECTORS = {
+    "CELF_K": lambda fa, si, oracle, directory, k=4: CELF_K(
+        fa, si, k, spread_oracle=oracle, checkpoint_dir=directory, checkpoint_every=5
+    ),
+    "CELF_C": lambda fa, si, oracle, directory: CELF_C(
+        fa, si, 6.0, spread_oracle=oracle, checkpoint_dir=directory, checkpoint_every=5
+    ),
+}
+
+
+# Every run starts from the same seeds, as a script's main does
+def run(graph, oracle_name, select, directory, crash=None, **kwargs):
+    flat_adj, start_idx = graph
+    np.random.seed(3)
+    seed_kernels(3)
+    oracle = ORACLES[oracle_name](flat_adj, start_idx)
+    if crash is not None:
+        crash_after(oracle, crash)
+    return select(flat_adj, start_idx, oracle, directory, **kwargs)
+
+
+# A run killed between checkpoints and resumed from them ends with the same
+# seeds and spread, to the bit, as one that was never interrupted
+@pytest.mark.parametrize("oracle_name", ORACLES)
+@pytest.mark.parametrize("selector", SELECTORS)
+def test_resume_is_bit_identical(ba_graph, tmp_path, oracle_name, selector):
+    select = SELECTORS[selector]
+    expected = run(ba_graph, oracle_name, select, str(tmp_path / "whole"))
+    directory = str(tmp_path / "crashed")
+    with pytest.raises(Crash):
+        run(ba_graph, oracle_name, select, directory, crash=12)
+    assert len(os.listdir(directory)) == 2  # initial gains and a selection state
+    assert run(ba_graph, oracle_name, select, directory) == expected
+
+
+# CELF_K with a larger k continues a smaller k's checkpoint, and a smaller k
+# is answered from a larger one without running anything
+@pytest.mark.parametrize("oracle_name", ORACLES)
+def test_celf_k_continues_other_k(ba_graph, tmp_path, oracle_name):
+    select = SELECTORS["CELF_K"]
+    expected = run(ba_graph, oracle_name, select, str(tmp_path / "whole"), k=4)
+    directory = str(tmp_path / "grown")
+    run(ba_graph, oracle_name, select, directory, k=2)
+    assert run(ba_graph, oracle_name, select, directory, k=4) == expected
+    seeds, _ = run(ba_graph, oracle_name, select, directory, crash=0, k=3)
+    assert len(seeds) == 3 and seeds <= expected[0]
@@ -0,0 +1,100 @@
+import numba
+import numpy as np
+
+from ic_kernels import (
+    crn_singletons_kernel,
+    estimate_spread_parallel,
+    new_block_scratch,
+    new_scratch,
+    run_IC_sparse,
+    seed_kernels,
+    singleton_spreads,
+    singleton_spreads_kernel,
+)
+from instrument import KERNEL_COUNTERS
+
+
+# The estimate only depends on master_seed, not on how the simulations are
+# split into blocks or how many threads run them.
+def test_parallel_spread_reproducible_across_threads(ba_graph):
+    flat_adj, start_idx = ba_graph
+    n = len(start_idx) - 1
+    seeds = np.array([0, 5, 17], dtype=np.int32)
+    reference = estimate_spread_parallel(flat_adj, start_idx, seeds, 500, 0.1, 7, *new_block_scratch(n, 1))
+    for n_blocks in (2, 3, 8, 64):
+        blocks = new_block_scratch(n, n_blocks)
+        assert estimate_spread_parallel(flat_adj, start_idx, seeds, 500, 0.1, 7, *blocks) == reference
+    max_threads = numba.config.NUMBA_NUM_THREADS
+    try:
+        for threads in range(1, max_threads + 1):
+            numba.set_num_threads(threads)
+            blocks = new_block_scratch(n)
+            assert estimate_spread_parallel(flat_adj, start_idx, seeds, 500, 0.1, 7, *blocks) == reference
+    finally:
+        numba.set_num_threads(max_threads)
+    assert estimate_spread_parallel(flat_adj, start_idx, seeds, 500, 0.1, 8, *new_block_scratch(n, 1)) != reference
+
+
+# Buffers kept across calls give the same estimates as fresh ones
+def test_parallel_spread_reuses_buffers(ba_graph):
+    flat_adj, start_idx = ba_graph
+    blocks = new_block_scratch(len(start_idx) - 1, 4)
+    seeds = np.array([3], dtype=np.int32)
+    first = [estimate_spread_parallel(flat_adj, start_idx, seeds, 50, 0.2, s, *blocks) for s in range(5)]
+    again = [
+        estimate_spread_parallel(flat_adj, start_idx, seeds, 50, 0.2, s, *new_block_scratch(len(start_idx) - 1, 4))
+        for s in range(5)
+    ]
+    assert first == again
+    # one epoch per simulation, nothing was reset in between
+    assert blocks[2].tolist() == [65, 65, 60, 60]
+
+
+
+# Spread of {0} on the path 0 - ... - 9 is k with probability p^(k-1) (1-p)
+# for k < 10 and p^9 for k = 10.
+def test_run_IC_sparse_matches_reference_distribution(path_graph):
+    flat_adj, start_idx = path_graph
+    p, runs = 0.6, 20000
+    seed_kernels(3)
+    visited, queue, epoch = new_scratch(10)
+    tally = np.zeros(len(KERNEL_COUNTERS), dtype=np.int64)
+    seeds = np.array([0], dtype=np.int32)
+    sizes = np.array([run_IC_sparse(flat_adj, start_idx, seeds, p, visited, queue, epoch, tally) for _ in range(runs)])
+    expected = np.array([p ** (k - 1) * (1 - p) for k in range(1, 10)] + [p ** 9])
+    observed = np.bincount(sizes, minlength=11)[1:] / runs
+    # every frequency within 4 standard errors
+    assert np.all(np.abs(observed - expected) <= 4 * np.sqrt(expected * (1 - expected) / runs))
+    assert epoch[0] == runs
+
+
+# Stamps are only unique until the uint32 epoch wraps, then visited is cleared
+def test_run_IC_sparse_epoch_wrap(path_graph):
+    flat_adj, start_idx = path_graph
+    visited, queue, epoch = new_scratch(10)
+    visited[:] = 1  # stale marks that equal the first stamp after the wrap
+    epoch[0] = np.uint32(2**32 - 1)
+    tally = np.zeros(len(KERNEL_COUNTERS), dtype=np.int64)
+    seeds = np.array([0], dtype=np.int32)
+    assert run_IC_sparse(flat_adj, start_idx, seeds, 1.0, visited, queue, epoch, tally) == 10
+    assert epoch[0] == 1
+    assert run_IC_sparse(flat_adj, start_idx, seeds, 1.0, visited, queue, epoch, tally) == 10
+    assert epoch[0] == 2
+
+
+# Chunks with a progress callback share one buffer set and give the same
+# spreads as a single call, for both kinds of worlds
+def test_singleton_spreads_chunked(ba_graph):
+    flat_adj, start_idx = ba_graph
+    n = len(start_idx) - 1
+    for kernel in (singleton_spreads_kernel, crn_singletons_kernel):
+        whole = singleton_spreads(flat_adj, start_idx, 20, 0.1, 11, kernel=kernel)
+        scratch = new_block_scratch(n, 3)
+        done = []
+        chunked = singleton_spreads(
+            flat_adj, start_idx, 20, 0.1, 11, lambda hi, total: done.append(hi), chunk=64, kernel=kernel,
+            scratch=scratch,
+        )
+        assert np.array_equal(whole, chunked)
+        assert done == [64, 128, 192, 256, 300]
+        assert scratch[2].sum() == n * 20
@@ -0,0 +1,44 @@
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+from conftest import ba_csr
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+# Instrumentation is frozen into the kernels at import, so the instrumented
+# runs go in a child process. Two identical runs of a main in one process
+# must export the same counters, not cumulative ones.
+def test_main_records_do_not_carry_over(tmp_path):
+    flat_adj, start_idx = ba_csr(200)
+    edges = [(u, int(v)) for u in range(len(start_idx) - 1) for v in flat_adj[start_idx[u]:start_idx[u + 1]] if u < v]
+    graph = tmp_path / "ba.txt"
+    graph.write_text("".join(f"{u} {v}\n" for u, v in edges))
+    metrics = tmp_path / "metrics.jsonl"
+    script = textwrap.dedent(f"""
+        import numpy as np
+        from ic_kernels import seed_kernels
+        import CELF_COST, CELF_SET_K, Naive_Algo
+        runs = [
+            lambda: CELF_SET_K.main({str(graph)!r}, 2, 10, 20, metrics={str(metrics)!r}),
+            lambda: CELF_COST.main({str(graph)!r}, 2.0, 10, 20, metrics={str(metrics)!r}),
+            lambda: Naive_Algo.main({str(graph)!r}, 2, 10, metrics={str(metrics)!r}),
+        ]
+        for run in runs:
+            for _ in range(2):
+                np.random.seed(1)
+                seed_kernels(1)
+                run()
+    """)
+    env = dict(os.environ, IM_INSTRUMENT="1")
+    subprocess.run([sys.executable, "-c", script], cwd=os.path.dirname(HERE), env=env, check=True,
+                   capture_output=True)
+    records = [json.loads(line) for line in metrics.read_text().splitlines()]
+    assert [r["algorithm"] for r in records] == ["CELF_K"] * 2 + ["CELF_C"] * 2 + ["greedy_naive"] * 2
+    for first, second in zip(records[::2], records[1::2]):
+        assert first["counters"]["cascades"] > 0
+        assert second["counters"] == first["counters"]
+        assert second["timers"]["selection"]["calls"] == 1
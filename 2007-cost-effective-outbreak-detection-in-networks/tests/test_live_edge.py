@@ -0,0 +1,19 @@
+import numpy as np
+
+from live_edge import LiveEdgeOracle, reach_uncovered
+
+
+# The condensation DP gives every node the exact number of nodes it reaches
+# over the live edges of each world
+def test_initial_gains_match_bfs(ba_graph):
+    flat_adj, start_idx = ba_graph
+    n = len(start_idx) - 1
+    for p in (0.05, 0.3, 0.8):
+        oracle = LiveEdgeOracle(flat_adj, start_idx, p, R=8, master_seed=5)
+        covered = np.zeros((n + 63) // 64, dtype=np.uint64)
+        visited, queue, epoch = oracle.visited[0], oracle.queue[0], oracle.epochs[:1]
+        expected = np.zeros(n)
+        for mask in oracle.masks:
+            for v in range(n):
+                expected[v] += reach_uncovered(flat_adj, start_idx, mask, covered, v, False, visited, queue, epoch)
+        assert np.array_equal(oracle.initial_gains(), expected / oracle.R)
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from CELF_SET_K import CELF_K
+from ic_kernels import estimate_spread_parallel, new_block_scratch
+from spread_oracle import CRNOracle, SequentialMonteCarloOracle
+
+
+# Stopping on rel_error: the interval it stops with is at most rel_error of
+# the mean wide and, over many master seeds, covers a high-MC reference
+# about as often as its confidence level says.
+def test_sequential_stops_within_error(ba_graph):
+    flat_adj, start_idx = ba_graph
+    seeds = [0, 9]
+    reference = estimate_spread_parallel(
+        flat_adj, start_idx, np.array(seeds, dtype=np.int32), 200000, 0.1, 1, *new_block_scratch(300)
+    )
+    np.random.seed(4)
+    oracle = SequentialMonteCarloOracle(flat_adj, start_idx, MC_init=100, MC_final=100000, p=0.1, rel_error=0.02)
+    covered = 0
+    for _ in range(100):
+        mean, half, count = oracle.sequential_spread(seeds, oracle.MC_final)
+        assert count < oracle.MC_final
+        assert half <= oracle.rel_error * mean
+        covered += abs(mean - reference) <= half
+    assert covered >= 85
+    assert oracle.used < oracle.fixed
+
+
+# Stopping on threshold: with rel_error off a plain gain runs to the MC_init
+# cap, one far from the threshold is settled after a couple of batches
+def test_sequential_threshold_stopping(ba_graph):
+    flat_adj, start_idx = ba_graph
+    np.random.seed(5)
+    oracle = SequentialMonteCarloOracle(flat_adj, start_idx, MC_init=640, MC_final=640, p=0.1, rel_error=0.0)
+    gain = oracle.marginal_gain(0)
+    assert oracle.used == 640
+    oracle.marginal_gain(0, threshold=gain * 10)
+    assert oracle.used <= 640 + 2 * oracle.batch
+    assert oracle.fixed == 2 * 640
+
+
+def test_sequential_has_no_lookahead(ba_graph):
+    flat_adj, start_idx = ba_graph
+    oracle = SequentialMonteCarloOracle(flat_adj, start_idx, 100, 100, 0.1)
+    with pytest.raises(ValueError):
+        oracle.marginal_gain_pair(0, 1)
+    with pytest.warns(RuntimeWarning):
+        CELF_K(flat_adj, start_idx, 1, spread_oracle=oracle, celfpp=True)
+
+
+def spread_in_world(flat_adj, start_idx, seeds, world):
+    oracle = CRNOracle(flat_adj, start_idx, MC=1, p=0.2, master_seed=world)
+    for s in seeds:
+        oracle.add(s)
+    return oracle.current_spread
+
+
+# An MC=1 oracle is a single world. In every world the gain of v is
+# |R(S + v)| - |R(S)| exactly, never negative, and never larger for a
+# superset T of S.
+def test_crn_gains_monotone_submodular(ba_graph):
+    flat_adj, start_idx = ba_graph
+    n = len(start_idx) - 1
+    rng = np.random.default_rng(6)
+    for world in range(10):
+        T = rng.choice(n, 6, replace=False).tolist()
+        S = T[:3]
+        small = CRNOracle(flat_adj, start_idx, MC=1, p=0.2, master_seed=world)
+        large = CRNOracle(flat_adj, start_idx, MC=1, p=0.2, master_seed=world)
+        for s in S:
+            small.add(s)
+        spreads = [large.add(t) for t in T]
+        assert spreads == sorted(spreads)
+        base = small.current_spread
+        for v in rng.choice(n, 40, replace=False).tolist():
+            gain = small.marginal_gain(v)
+            assert 0 <= large.marginal_gain(v) <= gain
+            assert gain == spread_in_world(flat_adj, start_idx, S + [v], world) - base
@@ -1,14 +1,179 @@
 # kcore_analysis.py
 import networkx as nx
-from typing import Dict
+import numpy as np
+from numba import njit
+from typing import Dict, List, Set, Tuple
+
+
+# Undirected CSR straight from the edge list: self-loops and duplicate edges
+# dropped (like nx.read_edgelist + remove selfloop_edges). Node i of the CSR
+# is node_ids[i] in the file.
+def load_csr(path: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    edges = np.loadtxt(path, dtype=np.int64, comments="#", usecols=(0, 1), ndmin=2)
+    node_ids, dense = np.unique(edges, return_inverse=True)
+    dense = dense.reshape(-1, 2)
+    dense = dense[dense[:, 0] != dense[:, 1]]
+    n = len(node_ids)
+
+    src = np.concatenate((dense[:, 0], dense[:, 1]))
+    dst = np.concatenate((dense[:, 1], dense[:, 0]))
+    keys = np.unique(src * n + dst)
+    src, dst = keys // n, keys % n
+
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return indptr, dst.astype(np.int32), node_ids
+
+
+# Batagelj-Zaversnik O(m) core decomposition: nodes are kept sorted by
+# current degree in vert (bin[d] = first position of degree d), the lowest
+# one is peeled and each higher degree neighbour moves down one bin by a swap.
+@njit
+def core_numbers_kernel(indptr, indices):
+    n = len(indptr) - 1
+    deg = np.empty(n, dtype=np.int32)
+    max_deg = 0
+    for v in range(n):
+        deg[v] = indptr[v + 1] - indptr[v]
+        max_deg = max(max_deg, deg[v])
+
+    bins = np.zeros(max_deg + 1, dtype=np.int64)
+    for v in range(n):
+        bins[deg[v]] += 1
+    start = 0
+    for d in range(max_deg + 1):
+        count = bins[d]
+        bins[d] = start
+        start += count
+
+    pos = np.empty(n, dtype=np.int64)
+    vert = np.empty(n, dtype=np.int32)
+    for v in range(n):
+        pos[v] = bins[deg[v]]
+        vert[pos[v]] = v
+        bins[deg[v]] += 1
+    for d in range(max_deg, 0, -1):
+        bins[d] = bins[d - 1]
+    bins[0] = 0
+
+    for i in range(n):
+        v = vert[i]
+        for j in range(indptr[v], indptr[v + 1]):
+            u = indices[j]
+            if deg[u] > deg[v]:
+                du = deg[u]
+                pu = pos[u]
+                pw = bins[du]
+                w = vert[pw]
+                if u != w:
+                    pos[u] = pw
+                    vert[pu] = w
+                    pos[w] = pu
+                    vert[pw] = u
+                bins[du] += 1
+                deg[u] -= 1
+    return deg
+
+
+# Highest core first, ties by degree, remaining ties in node order (the same
+# order a stable sorted(..., reverse=True) gives).
+def rank_nodes(core: np.ndarray, degree: np.ndarray) -> np.ndarray:
+    return np.lexsort((np.arange(len(core)), -degree, -core))
+
+
+# Core numbers kept current under edge insertions / deletions with the
+# subcore algorithm (Sariyuce et al. 2013). An edge only changes the core of
+# nodes with core K = min(core[u], core[v]) that are connected to the
+# endpoints through other core-K nodes, and only by one, so just that
+# subcore is traversed and peeled.
+class CoreMaintainer:
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, core: np.ndarray = None):
+        n = len(indptr) - 1
+        self.adj: List[Set[int]] = [set(indices[indptr[v]:indptr[v + 1]].tolist()) for v in range(n)]
+        self.core = core_numbers_kernel(indptr, indices) if core is None else core.copy()
+
+    def subcore(self, roots: List[int], K: int) -> Set[int]:
+        core, adj = self.core, self.adj
+        seen = set(roots)
+        stack = list(roots)
+        while stack:
+            w = stack.pop()
+            for x in adj[w]:
+                if x not in seen and core[x] == K:
+                    seen.add(x)
+                    stack.append(x)
+        return seen
+
+    # Peel the subcore: nodes with at most `limit` neighbours of core >= K
+    # drop out, and what is left has the promoted / kept core number.
+    def peel(self, nodes: Set[int], K: int, limit: int) -> Set[int]:
+        core, adj = self.core, self.adj
+        cd = {w: sum(1 for x in adj[w] if core[x] >= K) for w in nodes}
+        stack = [w for w in nodes if cd[w] <= limit]
+        removed = set(stack)
+        while stack:
+            w = stack.pop()
+            for x in adj[w]:
+                if x in nodes and x not in removed:
+                    cd[x] -= 1
+                    if cd[x] <= limit:
+                        removed.add(x)
+                        stack.append(x)
+        return nodes - removed
+
+    def insert_edge(self, u: int, v: int) -> Set[int]:
+        # Returns the nodes whose core number went up
+        if u == v or v in self.adj[u]:
+            return set()
+        self.adj[u].add(v)
+        self.adj[v].add(u)
+        K = min(self.core[u], self.core[v])
+        roots = [w for w in (u, v) if self.core[w] == K]
+        promoted = self.peel(self.subcore(roots, K), K, K)
+        for w in promoted:
+            self.core[w] = K + 1
+        return promoted
+
+    def delete_edge(self, u: int, v: int) -> Set[int]:
+        # Returns the nodes whose core number went down
+        if v not in self.adj[u]:
+            return set()
+        self.adj[u].discard(v)
+        self.adj[v].discard(u)
+        K = min(self.core[u], self.core[v])
+        roots = [w for w in (u, v) if self.core[w] == K]
+        nodes = self.subcore(roots, K)
+        demoted = nodes - self.peel(nodes, K, K - 1)
+        for w in demoted:
+            self.core[w] = K - 1
+        return demoted
+
+
+# Compiled path for big graphs: numpy arrays only, no networkx graph.
+# order[i] is the dense id of the i-th ranked node.
+def load_and_rank_csr(path: str):
+    indptr, indices, node_ids = load_csr(path)
+    core = core_numbers_kernel(indptr, indices)
+    degree = np.diff(indptr)
+    order = rank_nodes(core, degree)
+    return indptr, indices, node_ids, core, degree, order
+
 
 def load_and_rank_graph(path: str):
     G = nx.read_edgelist(path, nodetype=int)
     G.remove_edges_from(nx.selfloop_edges(G))
 
-    core_numbers = nx.core_number(G)
-    degree_numbers = nx.degree_centrality(G)
-    sorted_nodes = sorted(G.nodes(), key=lambda n: (core_numbers[n], degree_numbers[n]), reverse=True)
+    nodes = list(G.nodes())
+    index = {v: i for i, v in enumerate(nodes)}
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    np.cumsum([G.degree(v) for v in nodes], out=indptr[1:])
+    indices = np.array([index[w] for v in nodes for w in G.neighbors(v)], dtype=np.int32)
+
+    core = core_numbers_kernel(indptr, indices)
+    degree = np.diff(indptr)
+    core_numbers: Dict[int, int] = dict(zip(nodes, core.tolist()))
+    degree_numbers: Dict[int, float] = dict(zip(nodes, (degree / max(len(nodes) - 1, 1)).tolist()))
+    sorted_nodes = [nodes[i] for i in rank_nodes(core, degree)]
     return G, core_numbers, degree_numbers, sorted_nodes
 
 if __name__ == "__main__":
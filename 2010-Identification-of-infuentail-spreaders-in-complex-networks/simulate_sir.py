@@ -1,44 +1,179 @@
 # simulate_sir.py
+import os
 import random
-from typing import Set
-from kcore_analysis import load_and_rank_graph 
+import sys
+import numpy as np
+from numba import njit, prange, get_num_threads
+from typing import Dict, Hashable, Optional, Sequence, Tuple
+from kcore_analysis import load_and_rank_csr
 
-def simulate_sir(G, seed: int, beta=0.05, mu=0.01, steps=50) -> int:
-    susceptible = set(G.nodes()) - {seed}
-    infected: Set[int] = {seed}
-    recovered: Set[int] = set()
+# Counter based RNG (splitmix64) shared with the 2007 Monte Carlo kernels: run
+# t of a batch draws from its own stream (master_seed, t), so results do not
+# depend on the number of threads.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "2007-cost-effective-outbreak-detection-in-networks"))
+from ic_kernels import stream_state, next_uniform
 
-    for _ in range(steps):
-        new_infected: Set[int] = set()
-        new_recovered: Set[int] = set()
+# S: untouched, NEW: infection step scheduled, I: infected (already spread)
+S, I, NEW = 0, 1, 2
 
-        for node in infected:
-            for neighbor in G.neighbors(node):
-                if neighbor in susceptible and random.random() < beta:
-                    new_infected.add(neighbor)
-            if random.random() < mu:
-                new_recovered.add(node)
+# Geometric number of Bernoulli(p) trials up to and including the first
+# success, capped at `never` (also returned when p is 0 or too small for
+# log1p(-p) to leave 0).
+@njit(inline="always")
+def geometric(rng, p, never):
+    if p <= 0.0:
+        return rng, never
+    if p >= 1.0:
+        return rng, 1
+    log_q = np.log1p(-p)
+    if log_q == 0.0:
+        return rng, never
+    rng, r = next_uniform(rng)
+    x = np.log1p(-r) / log_q
+    if x >= never:
+        return rng, never
+    return rng, 1 + int(x)
 
-        infected = (infected | new_infected) - new_recovered
-        susceptible -= new_infected
-        recovered |= new_recovered
 
-        if not infected:
-            break
+# One SIR outbreak from `seed`, returns the number of nodes recovered within
+# `steps` steps. Same model as the step by step simulation (an infected node
+# tries every susceptible neighbour with beta each step, then recovers with
+# mu, new infections act from the next step), but drawn per event: a node
+# infected at step t stays infectious for D ~ Geom(mu) steps and reaches a
+# neighbour after X ~ Geom(beta) steps if X <= D. Nodes wait in one bucket
+# per step (doubly linked through nxt / prv) until their earliest infection
+# step comes up, so every infected node scans its neighbours once instead
+# of once per step. state must be all S on entry; every node that got a
+# tentative infection time is in touched and is reset from there on return.
+@njit
+def sir_kernel(indptr, indices, seed, beta, mu, steps, rng, state, when, nxt, prv, head, touched):
+    head[:] = -1
+    state[seed] = NEW
+    when[seed] = 0
+    nxt[seed] = -1
+    prv[seed] = -1
+    head[0] = seed
+    touched[0] = seed
+    n_touched = 1
+    recovered = 0
+
+    for t in range(steps + 1):
+        while head[t] != -1:
+            u = head[t]
+            head[t] = nxt[u]
+            if nxt[u] != -1:
+                prv[nxt[u]] = -1
+            state[u] = I
+
+            rng, D = geometric(rng, mu, steps + 1)
+            if t + D <= steps:
+                recovered += 1
+            limit = min(D, steps - t)
+            for i in range(indptr[u], indptr[u + 1]):
+                w = indices[i]
+                if state[w] == I:
+                    continue
+                rng, X = geometric(rng, beta, steps + 1)
+                if X > limit or (state[w] == NEW and t + X >= when[w]):
+                    continue
+                if state[w] == NEW:
+                    # unlink from its later bucket
+                    if prv[w] != -1:
+                        nxt[prv[w]] = nxt[w]
+                    else:
+                        head[when[w]] = nxt[w]
+                    if nxt[w] != -1:
+                        prv[nxt[w]] = prv[w]
+                else:
+                    state[w] = NEW
+                    touched[n_touched] = w
+                    n_touched += 1
+                when[w] = t + X
+                prv[w] = -1
+                nxt[w] = head[t + X]
+                if nxt[w] != -1:
+                    prv[nxt[w]] = w
+                head[t + X] = w
+
+    for j in range(n_touched):
+        state[touched[j]] = S
+    return recovered
+
+
+# Outbreak sizes for every seed x run, shape (len(seeds), runs). The
+# len(seeds) * runs outbreaks are split into one block per thread, each with
+# its own state and queues.
+@njit(parallel=True)
+def sir_outbreaks(indptr, indices, seeds, runs, beta, mu, steps, master_seed):
+    n = len(indptr) - 1
+    total = len(seeds) * runs
+    sizes = np.zeros((len(seeds), runs), dtype=np.int32)
+    n_blocks = max(1, min(get_num_threads(), total))
+    for b in prange(n_blocks):
+        state = np.zeros(n, dtype=np.uint8)
+        when = np.empty(n, dtype=np.int32)
+        nxt = np.empty(n, dtype=np.int32)
+        prv = np.empty(n, dtype=np.int32)
+        head = np.empty(steps + 1, dtype=np.int32)
+        touched = np.empty(n, dtype=np.int32)
+        for t in range(b, total, n_blocks):
+            rng = stream_state(master_seed, t)
+            sizes[t // runs, t % runs] = sir_kernel(
+                indptr, indices, seeds[t // runs], beta, mu, steps, rng, state, when, nxt, prv, head, touched
+            )
+    return sizes
+
+
+def outbreak_stats(sizes: np.ndarray, quantiles: Sequence[float] = (0.05, 0.5, 0.95)) -> Dict[str, np.ndarray]:
+    stats = {"mean": sizes.mean(axis=1), "var": sizes.var(axis=1, ddof=1) if sizes.shape[1] > 1 else np.zeros(len(sizes))}
+    for q, values in zip(quantiles, np.quantile(sizes, quantiles, axis=1)):
+        stats[f"q{q:g}"] = values
+    return stats
+
+
+# Outbreak sizes of `runs` outbreaks from dense node `seed` of a CSR graph.
+def sir_sizes(
+    indptr: np.ndarray, indices: np.ndarray, seed: int, beta=0.05, mu=0.01, steps=50, runs: int = 1,
+    master_seed: Optional[int] = None,
+) -> np.ndarray:
+    if master_seed is None:
+        master_seed = random.getrandbits(63)
+    seeds = np.array([seed], dtype=np.int32)
+    return sir_outbreaks(indptr, indices, seeds, runs, beta, mu, steps, master_seed)[0]
+
+
+# networkx graph -> (indptr, indices, index), the CSR arrays over dense ids
+# and the node -> dense id map.
+def nx_to_csr(G) -> Tuple[np.ndarray, np.ndarray, Dict[Hashable, int]]:
+    nodes = list(G.nodes())
+    index = {v: i for i, v in enumerate(nodes)}
+    indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+    np.cumsum([G.degree(v) for v in nodes], out=indptr[1:])
+    indices = np.array([index[w] for v in nodes for w in G.neighbors(v)], dtype=np.int32)
+    return indptr, indices, index
+
+
+# One outbreak from `seed`, as before. G is a networkx graph or the
+# nx_to_csr(G) triple: converting costs O(n + m) Python work, so loops over
+# seeds or runs should convert once and pass the triple (or batch through
+# sir_sizes / sir_outbreaks). The master seed is drawn from `random`, so
+# random.seed() still makes runs repeatable.
+def simulate_sir(G, seed: Hashable, beta=0.05, mu=0.01, steps=50) -> int:
+    indptr, indices, index = G if isinstance(G, tuple) else nx_to_csr(G)
+    return int(sir_sizes(indptr, indices, index[seed], beta, mu, steps)[0])
 
-    return len(recovered)
 
 if __name__ == "__main__":
-    G, core_numbers, degree_numbers, sorted_nodes = load_and_rank_graph("Identification-of-infuentail-spreaders-in-complex-networks/data/email-Eu-core.txt")
-
-    seeds = sorted_nodes[:10]
-    results = {}
-
-    for seed in seeds:
-        total_recovered = 0
-        runs = 20
-        for _ in range(runs):
-            total_recovered += simulate_sir(G, seed, beta=0.05, mu=0.01, steps=50)
-        avg_recovered = total_recovered / runs
-        results[seed] = avg_recovered
-        print(f"Seed {seed}: Average outbreak size over {runs} runs = {avg_recovered:.2f}")
+    indptr, indices, node_ids, core, degree, order = load_and_rank_csr("Identification-of-infuentail-spreaders-in-complex-networks/data/email-Eu-core.txt")
+
+    seeds = order[:10].astype(np.int32)
+    runs = 20
+    sizes = sir_outbreaks(indptr, indices, seeds, runs, 0.05, 0.01, 50, 42)
+    stats = outbreak_stats(sizes)
+
+    for i, seed in enumerate(seeds):
+        print(
+            f"Seed {node_ids[seed]}: Average outbreak size over {runs} runs = {stats['mean'][i]:.2f} "
+            f"(sd {np.sqrt(stats['var'][i]):.2f}, median {stats['q0.5'][i]:.0f}, "
+            f"5-95% {stats['q0.05'][i]:.0f}-{stats['q0.95'][i]:.0f})"
+        )